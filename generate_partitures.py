@@ -1,30 +1,871 @@
 import argparse
-import cv2
+import gc
+import hashlib
+import itertools
+import multiprocessing
+import multiprocessing.connection
 import os
-from smashcima.orchestration import TweakedHandwrittenModel, BaseHandwrittenModel
+import random
+import sys
+import time
+import traceback
+from collections import deque
+from pathlib import Path
+from concurrent.futures import Future
+from typing import (Any, Dict, Iterator, List, NamedTuple, Optional, Set,
+                    Tuple, Union)
+
+import cv2
+import numpy as np
+
+from smashcima.batch import (BackgroundWriter, FolderSink, ImageEncoder,
+                             Manifest, ManifestRecord, NpyPageArray,
+                             NpyPageSink, Sample, Sink, SqliteSink,
+                             TarShardSink)
+from smashcima.exporting import AnnotationsExporter
+from smashcima.orchestration import TweakedHandwrittenModel, BaseHandwrittenModel, Model
 
-def main(model_type: str, input_path: str, output_path: str):
+
+def build_model(model_type: str) -> Model:
     if model_type == "base":
-        model = BaseHandwrittenModel()
+        return BaseHandwrittenModel()
     elif model_type == "tweaked":
-        model = TweakedHandwrittenModel()
+        return TweakedHandwrittenModel()
     else:
         raise ValueError("Model type must be either 'base' or 'tweaked'.")
 
-    for file in os.listdir(input_path):
-        scene = model(os.path.join(input_path, file))
-        for i, page in enumerate(scene.pages):
-            bitmap = scene.render(page)
-            cv2.imwrite(os.path.join(output_path, file[:-8] + "png"), bitmap)
+
+def file_seed(seed: int, file: str) -> int:
+    """Derives the seed for a single input file from the global seed.
+
+    The seed depends only on the file name, not on the order in which files
+    are processed, so serial and parallel runs produce the same output.
+    """
+    digest = hashlib.sha256(f"{seed}:{file}".encode("utf-8")).digest()
+    return int.from_bytes(digest[:4], "little")
+
+
+def file_shard(file: str, num_shards: int) -> int:
+    """Assigns an input file to one of the input shards.
+
+    The assignment is a stable hash of the file path relative to the input
+    folder, so independent machines agree on it without any coordination.
+    """
+    digest = hashlib.sha256(file.encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "little") % num_shards
+
+
+def select_pages(page_count: int, pages: Union[str, int]) -> List[int]:
+    """Returns indices of the pages to render given the --pages selection
+    ("first", "all" or a one-based page number). A score that does not have
+    the selected page is an error, it would produce no output, yet its file
+    would be recorded as completed."""
+    if pages == "all":
+        return list(range(page_count))
+    elif pages == "first":
+        return [0] if page_count > 0 else []
+    else:
+        assert isinstance(pages, int) and pages >= 1
+        if pages > page_count:
+            raise ValueError(
+                f"The score has {page_count} page(s), " +
+                f"page {pages} cannot be rendered."
+            )
+        return [pages - 1]
+
+
+def sample_key(file: str, page_index: int) -> str:
+    """Name of the sample for a page of a scene, "name-1", "name-2", ...
+
+    Every page gets its number, even the only page of a scene, so that
+    the pages of "a" and the only page of "a-1" cannot share a name and
+    the name does not depend on the number of rendered pages. Files with
+    distinct stems thus never produce the same name.
+    """
+    return f"{Path(file).stem}-{page_index + 1}"
+
+
+def scene_metadata(
+    scene: Any,
+    file: str,
+    seed: int,
+    model_type: str,
+    page_index: int
+) -> Dict[str, Any]:
+    """Describes how a page of the scene was synthesized"""
+    patch = getattr(scene, "mzk_background_patch", None)
+    return {
+        "file": file,
+        "seed": seed,
+        "model_type": model_type,
+        "page": page_index,
+        "mpp_writer": getattr(scene, "mpp_writer", None),
+        "mzk_background_patch": None if patch is None else {
+            "mzk_uuid": patch.mzk_uuid,
+            "rectangle": [
+                patch.rectangle.x,
+                patch.rectangle.y,
+                patch.rectangle.width,
+                patch.rectangle.height
+            ],
+            "dpi": patch.dpi
+        }
+    }
+
+
+def _encode_sample(
+    encoder: ImageEncoder,
+    bitmap: np.ndarray,
+    key: str,
+    annotations: Optional[Dict[str, Any]],
+    metadata: Dict[str, Any]
+) -> Sample:
+    return Sample(
+        key=key,
+        image=encoder.encode(bitmap),
+        image_extension=encoder.extension,
+        annotations=annotations,
+        metadata=metadata
+    )
+
+
+def _write_page_row(
+    page_array: NpyPageArray,
+    row: int,
+    bitmap: np.ndarray,
+    key: str,
+    annotations: Optional[Dict[str, Any]],
+    metadata: Dict[str, Any]
+) -> Sample:
+    fit = page_array.write(row, bitmap)
+    return Sample(
+        key=key,
+        image=b"", # the page is stored in the array already
+        image_extension="",
+        annotations=None if annotations is None else fit.apply(annotations),
+        metadata={**metadata, "row": row},
+        image_hash=page_array.row_hash(row)
+    )
+
+
+def process_file(
+    model: Model,
+    writer: BackgroundWriter,
+    encoder: Union[ImageEncoder, NpyPageArray],
+    model_type: str,
+    input_path: str,
+    file: str,
+    seed: int,
+    pages: Union[str, int] = "all",
+    annotations: bool = False,
+    row: Optional[int] = None
+) -> List["Future[Sample]"]:
+    """Synthesizes and renders a single file, the pages are encoded
+    by the background writer. Returns futures of the encoded samples.
+    
+    When given a page array instead of an image encoder, the page is
+    written into the given row of the array.
+    """
+    samples: List["Future[Sample]"] = []
+    scene = model(os.path.join(input_path, file), seed=seed)
+    page_indices = select_pages(len(scene.pages), pages)
+    for i in page_indices:
+        # only selected pages are rendered
+        page = scene.pages[i]
+        bitmap = scene.render(page)
+        key = sample_key(file, i)
+        page_annotations = AnnotationsExporter(dpi=scene.renderer.dpi) \
+            .export(page.view_box) if annotations else None
+        metadata = scene_metadata(scene, file, seed, model_type, i)
+        if isinstance(encoder, NpyPageArray):
+            assert row is not None and len(page_indices) == 1, \
+                "Page arrays hold exactly one page per file"
+            samples.append(writer.submit(
+                _write_page_row, encoder, row, bitmap,
+                key, page_annotations, metadata
+            ))
+        else:
+            samples.append(writer.submit(
+                _encode_sample, encoder, bitmap,
+                key, page_annotations, metadata
+            ))
+    return samples
+
+
+class Job(NamedTuple):
+    input_path: str
+    file: str
+    seed: int
+    pages: Union[str, int]
+    annotations: bool
+    row: Optional[int] = None
+    "Row of the page in the page array, when writing into one"
+
+
+class JobResult(NamedTuple):
+    file: str
+    seed: int
+    samples: Optional[List[Sample]]
+    "Encoded samples of the rendered pages, None if the job failed"
+    error: Optional[str]
+    "Traceback of the failure, None if the job succeeded"
+
+
+def estimate_cost(input_path: str, file: str) -> int:
+    """Estimates the relative cost of synthesizing a file.
+
+    The size of the MusicXML file grows with the staff-measure grid and
+    with the number of notes, which is what the synthesis cost grows with.
+    Unlike parsing the score, it is known without reading the file,
+    so the estimate does not delay the start of a large run.
+    """
+    try:
+        return os.path.getsize(os.path.join(input_path, file))
+    except OSError:
+        return 0 # the job fails quickly, the error is reported there
+
+
+def schedule_longest_first(jobs: List[Job]) -> List[Job]:
+    """Orders jobs by their estimated cost, the most expensive ones first,
+    so that no worker ends the run processing a large score on its own"""
+    costs = {job.file: estimate_cost(job.input_path, job.file) for job in jobs}
+    return sorted(jobs, key=lambda job: costs[job.file], reverse=True)
+
+
+class MemoryUsage(NamedTuple):
+    """Memory of a process split into pages shared with other processes
+    (e.g. copy-on-write pages inherited from a forking parent)
+    and pages private to the process, in bytes"""
+    shared: int
+    private: int
+
+    def __str__(self) -> str:
+        return f"{self.shared / 2**20:.1f} MB shared, " + \
+            f"{self.private / 2**20:.1f} MB private"
+
+
+def memory_usage(pid: int) -> Optional[MemoryUsage]:
+    """Reads the memory usage of a process, None if not supported (non-Linux)"""
+    try:
+        with open(f"/proc/{pid}/smaps_rollup", "r") as file:
+            lines = file.readlines()
+    except OSError:
+        return None
+
+    fields = {}
+    for line in lines:
+        parts = line.split()
+        if len(parts) == 3 and parts[2] == "kB":
+            fields[parts[0].rstrip(":")] = int(parts[1]) * 1024
+
+    return MemoryUsage(
+        shared=fields.get("Shared_Clean", 0) + fields.get("Shared_Dirty", 0),
+        private=fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0)
+    )
+
+
+_worker_model: Optional[Model] = None
+"""The model used by the current (worker) process, built only once"""
+
+_worker_model_type: Optional[str] = None
+"""Name of the model type used by the current (worker) process"""
+
+_worker_encoder: Union[ImageEncoder, NpyPageArray, None] = None
+"""Encodes the rendered pages in the current (worker) process"""
+
+_worker_writer: Optional[BackgroundWriter] = None
+"""Encodes pages in the background in the current (worker) process"""
+
+def _init_worker(
+    model_type: str,
+    encoder: Union[ImageEncoder, NpyPageArray],
+    writer_threads: int
+):
+    global _worker_model, _worker_model_type, _worker_encoder, _worker_writer
+
+    # with a warm start the model is inherited from the parent process
+    if _worker_model is None:
+        _worker_model = build_model(model_type)
+    _worker_model_type = model_type
+
+    _worker_encoder = encoder
+    _worker_writer = BackgroundWriter(threads=writer_threads)
+
+
+StartedJob = Tuple[Job, Optional[List["Future[Sample]"]], Optional[str]]
+
+
+def _start_job(job: Job) -> StartedJob:
+    """Synthesizes and renders the job, leaving the encoding in progress"""
+    assert _worker_model is not None, "The worker has not been initialized"
+    assert _worker_model_type is not None
+    assert _worker_encoder is not None and _worker_writer is not None
+
+    # a broken score must not take down the whole run
+    try:
+        samples = process_file(
+            _worker_model,
+            _worker_writer,
+            _worker_encoder,
+            _worker_model_type,
+            job.input_path,
+            job.file,
+            job.seed,
+            job.pages,
+            job.annotations,
+            job.row
+        )
+        return job, samples, None
+    except Exception:
+        return job, None, traceback.format_exc()
+
+
+def _finish_job(started: StartedJob) -> JobResult:
+    """Waits for the samples of a started job to be encoded"""
+    job, samples, error = started
+    if samples is None:
+        return JobResult(job.file, job.seed, None, error)
+    try:
+        return JobResult(
+            job.file,
+            job.seed,
+            [sample.result() for sample in samples],
+            None
+        )
+    except Exception:
+        return JobResult(job.file, job.seed, None, traceback.format_exc())
+
+
+def _serve_jobs(
+    tasks: Any,
+    connection: Any,
+    started_at: float,
+    *args
+):
+    """Body of a worker process, runs the jobs from its task queue until it
+    takes the end marker (None). Like the serial run, it keeps the previous
+    job in flight, so that its pages are encoded while the next score is
+    being synthesized. A job marked to run alone (a retry of a job that
+    may have crashed a worker) is run only after the previous job has been
+    reported, so that a crash in it takes down no other job.
+
+    Sends ("ready", (pid, latency, memory)) once initialized,
+    ("result", (index, result)) for every job and ("exit", (pid, memory))
+    before it exits through its own pipe, so that a worker that dies
+    while sending cannot block the others.
+    """
+    # parallelism comes from the worker processes,
+    # do not oversubscribe the CPU with opencv threads
+    cv2.setNumThreads(1)
+
+    _init_worker(*args)
+    assert _worker_writer is not None
+    connection.send(("ready", (
+        os.getpid(),
+        time.monotonic() - started_at,
+        memory_usage(os.getpid())
+    )))
+
+    previous: Optional[Tuple[int, StartedJob]] = None
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+        index, job, alone = task
+        if alone:
+            if previous is not None:
+                connection.send(
+                    ("result", (previous[0], _finish_job(previous[1])))
+                )
+                previous = None
+            connection.send(("result", (index, _finish_job(_start_job(job)))))
+            continue
+        started = _start_job(job)
+        if previous is not None:
+            connection.send(
+                ("result", (previous[0], _finish_job(previous[1])))
+            )
+        previous = (index, started)
+    if previous is not None:
+        connection.send(("result", (previous[0], _finish_job(previous[1]))))
+
+    _worker_writer.close()
+    connection.send(("exit", (os.getpid(), memory_usage(os.getpid()))))
+    connection.close()
+
+
+def run_jobs(
+    model_type: str,
+    jobs: List[Job],
+    workers: int,
+    warm_start: bool = False,
+    encoder: Union[ImageEncoder, NpyPageArray, None] = None,
+    writer_threads: int = 2
+) -> Iterator[JobResult]:
+    """Runs the jobs and yields their results in the order of the jobs
+
+    With a warm start, the model (and all the assets it loads, such as
+    the symbol repository) is built once in this process and the workers
+    are forked from it, sharing these read-only pages copy-on-write.
+    """
+    global _worker_model
+
+    encoder = encoder or ImageEncoder()
+
+    if workers <= 1:
+        _init_worker(model_type, encoder, writer_threads)
+        assert _worker_writer is not None
+        try:
+            # keep the previous job in flight, so that its pages are encoded
+            # while the next score is being synthesized
+            previous: Optional[StartedJob] = None
+            for job in jobs:
+                started = _start_job(job)
+                if previous is not None:
+                    yield _finish_job(previous)
+                previous = started
+            if previous is not None:
+                yield _finish_job(previous)
+        finally:
+            _worker_writer.close()
+        return
+
+    if warm_start:
+        start = time.monotonic()
+        _worker_model = build_model(model_type)
+        print(f"Model built in {time.monotonic() - start:.2f} s")
+
+        # move all objects into the permanent generation, so that garbage
+        # collections in the workers do not touch (and copy) their pages
+        gc.collect()
+        gc.freeze()
+        context = multiprocessing.get_context("fork")
+    else:
+        context = multiprocessing.get_context()
+
+    started_at = time.monotonic()
+
+    processes: Dict[int, Any] = {}
+    task_queues: Dict[int, Any] = {}
+    connections: Dict[int, Any] = {}
+    assigned: Dict[int, List[int]] = {}
+    "Jobs given to each worker whose results have not arrived yet"
+    closed: Set[int] = set()
+    pending = deque(range(len(jobs)))
+    deaths = [0] * len(jobs)
+    finished: Dict[int, JobResult] = {}
+    ready: Set[int] = set()
+    memories: List[Tuple[int, Optional[MemoryUsage]]] = []
+
+    def dispatch(worker_id: int):
+        if worker_id in closed:
+            return
+        # a worker holds two jobs, it synthesizes one of them
+        # while the pages of the other one are being encoded,
+        # a job retried after a worker death is run alone
+        while len(assigned[worker_id]) < 2 and len(pending) > 0:
+            if any(deaths[i] > 0 for i in assigned[worker_id]):
+                break # reported right away, the worker takes more after it
+            index = pending.popleft()
+            assigned[worker_id].append(index)
+            task_queues[worker_id].put((index, jobs[index], deaths[index] > 0))
+        if len(pending) == 0:
+            closed.add(worker_id)
+            task_queues[worker_id].put(None)
+
+    def start_worker():
+        # each worker builds (or inherits) its model once
+        # and then runs the jobs it is given
+        worker_id = next(worker_ids)
+        receiver, sender = context.Pipe(duplex=False)
+        task_queues[worker_id] = context.Queue()
+        connections[worker_id] = receiver
+        assigned[worker_id] = []
+        processes[worker_id] = context.Process(
+            target=_serve_jobs,
+            args=(
+                task_queues[worker_id],
+                sender,
+                started_at,
+                model_type,
+                encoder,
+                writer_threads
+            ),
+            daemon=True
+        )
+        processes[worker_id].start()
+        sender.close() # the pipe reports EOF once the worker is gone
+        dispatch(worker_id)
+
+    def receive(worker_id: int):
+        connection = connections[worker_id]
+        try:
+            while connection.poll():
+                kind, value = connection.recv()
+                if kind == "ready":
+                    ready.add(worker_id)
+                    pid, latency, memory = value
+                    print(
+                        f"Worker {pid} ready in {latency:.2f} s" +
+                        (f", {memory}" if memory is not None else "")
+                    )
+                elif kind == "result":
+                    index, result = value
+                    assigned[worker_id].remove(index)
+                    finished[index] = result
+                    if worker_id in processes:
+                        dispatch(worker_id)
+                elif kind == "exit":
+                    memories.append(value)
+        except (EOFError, OSError):
+            pass # the worker is gone, a partial message is dropped
+
+    def remove_worker(worker_id: int):
+        process = processes.pop(worker_id)
+        process.join()
+        receive(worker_id) # messages sent before the worker exited
+        connections.pop(worker_id).close()
+        held = assigned.pop(worker_id)
+        if process.exitcode == 0 and len(held) == 0:
+            return
+
+        # a worker that dies hard (e.g. killed for its memory or crashed
+        # in native code) is replaced and its jobs are retried, a job that
+        # takes down two workers fails, so that it cannot stall the run
+        if worker_id not in ready:
+            raise RuntimeError(
+                f"A worker failed to start (exit code {process.exitcode})."
+            )
+        for index in reversed(held):
+            deaths[index] += 1
+            if deaths[index] < 2:
+                pending.appendleft(index)
+                continue
+            finished[index] = JobResult(
+                jobs[index].file,
+                jobs[index].seed,
+                None,
+                f"The worker rendering the file died " +
+                f"(exit code {process.exitcode}).\n"
+            )
+        if len(pending) > 0:
+            start_worker()
+
+    worker_ids = itertools.count()
+    for _ in range(workers):
+        start_worker()
+
+    try:
+        # results arrive out of order, they are yielded in the job order
+        next_index = 0
+        while next_index < len(jobs):
+            waiting = {connections[w]: w for w in processes}
+            waiting.update({processes[w].sentinel: w for w in processes})
+            for handle in multiprocessing.connection.wait(list(waiting)):
+                worker_id = waiting[handle]
+                if worker_id not in processes:
+                    continue # both handles of a removed worker were ready
+                if handle is connections[worker_id]:
+                    receive(worker_id)
+                else:
+                    remove_worker(worker_id)
+
+            while next_index in finished:
+                yield finished.pop(next_index)
+                next_index += 1
+
+        # the workers report their memory and exit after the end marker
+        for worker_id in list(processes):
+            dispatch(worker_id)
+            remove_worker(worker_id)
+    finally:
+        for process in processes.values():
+            process.terminate()
+
+    for pid, memory in memories:
+        if memory is not None:
+            print(f"Worker {pid} after the run: {memory}")
+
+    if warm_start:
+        gc.unfreeze()
+        _worker_model = None
+
+
+def main(
+    model_type: str,
+    input_path: str,
+    output_path: str,
+    workers: int = 1,
+    seed: Optional[int] = None,
+    warm_start: bool = False,
+    manifest_path: Optional[str] = None,
+    verify_outputs: bool = False,
+    pages: Union[str, int] = "all",
+    encoder: Optional[ImageEncoder] = None,
+    writer_threads: int = 2,
+    sink_type: str = "folder",
+    shard_size: int = 2 ** 30,
+    sqlite_batch_size: int = 64,
+    num_shards: int = 1,
+    shard_index: int = 0,
+    schedule: str = "longest-first",
+    npy_shape: Optional[Tuple[int, int]] = None
+) -> int:
+    """Renders all files in the input folder, returns the number of failures.
+    
+    With `num_shards` greater than one, only the files of the input shard
+    `shard_index` are rendered. The npy sink needs the `npy_shape`
+    (height, width) of its pages.
+    """
+    if model_type not in ["base", "tweaked"]:
+        raise ValueError("Model type must be either 'base' or 'tweaked'.")
+    if not 0 <= shard_index < num_shards:
+        raise ValueError(
+            f"Shard index must be between 0 and {num_shards - 1}."
+        )
+    if num_shards > 1 and seed is None:
+        # the union of the input shards equals a single-machine run
+        # only when all the machines derive the file seeds from one seed
+        raise ValueError(
+            "Rendering an input shard needs the --seed shared by all shards."
+        )
+
+    # outputs of input shards can be collected without name clashes
+    output_suffix = ""
+    if num_shards > 1:
+        output_suffix = f"-{shard_index:03d}of{num_shards:03d}"
+
+    all_files = sorted(os.listdir(input_path))
+
+    # samples are named after the file stems (see sample_key), files that
+    # differ only in their extension (e.g. "a.musicxml" and "a.mxl") would
+    # overwrite each other, also across the shards of one output folder
+    # and with the files completed by a previous run
+    files_by_stem: Dict[str, str] = {}
+    for file in all_files:
+        stem = Path(file).stem
+        if stem in files_by_stem:
+            raise ValueError(
+                f"The files {files_by_stem[stem]} and {file} would be " +
+                f"stored under the same name {stem}, rename one of them."
+            )
+        files_by_stem[stem] = file
+
+    files = [
+        file for file in all_files
+        if num_shards == 1 or file_shard(file, num_shards) == shard_index
+    ]
+
+    page_array: Optional[NpyPageArray] = None
+    sink: Sink
+    if sink_type == "folder":
+        sink = FolderSink(Path(output_path))
+    elif sink_type == "tar":
+        sink = TarShardSink(
+            Path(output_path),
+            shard_size=shard_size,
+            prefix="shard" + output_suffix,
+            index_name=f"index{output_suffix}.jsonl"
+        )
+    elif sink_type == "sqlite":
+        sink = SqliteSink(
+            Path(output_path) / f"dataset{output_suffix}.sqlite",
+            batch_size=sqlite_batch_size
+        )
+    elif sink_type == "npy":
+        if npy_shape is None:
+            raise ValueError("The npy sink needs the shape of its pages.")
+        if pages == "all":
+            raise ValueError(
+                "The npy sink stores one page per file, select it by pages."
+            )
+        # every file has its own row, so that workers can write in parallel
+        page_array = NpyPageArray(
+            Path(output_path) / f"pages{output_suffix}.npy",
+            len(files),
+            *npy_shape
+        )
+        sink = NpyPageSink(
+            page_array,
+            annotations_name=f"annotations{output_suffix}.jsonl"
+        )
+    else:
+        raise ValueError(
+            "Sink type must be either 'folder', 'tar', 'sqlite' or 'npy'."
+        )
+
+    manifest: Optional[Manifest] = None
+    if manifest_path is not None:
+        manifest = Manifest(Path(manifest_path))
+
+        # a resumed run continues with the seed it was started with
+        if seed is None:
+            seed = manifest.run_seed
+
+        if verify_outputs:
+            for record in manifest.verify(sink.verify):
+                print(f"{record.file}: outputs are incomplete, re-rendering")
+
+    if seed is None:
+        seed = random.randrange(2 ** 32)
+        print(f"Using seed {seed}")
+
+    if manifest is not None:
+        manifest.start_run(seed)
+
+    jobs: List[Job] = []
+    skipped = 0
+    for row, file in enumerate(files):
+        job_seed = file_seed(seed, file)
+        if manifest is not None \
+                and manifest.is_done(file, job_seed, model_type):
+            skipped += 1
+            continue
+        jobs.append(Job(
+            input_path,
+            file,
+            job_seed,
+            pages,
+            annotations=(sink_type != "folder"),
+            row=row
+        ))
+
+    if skipped > 0:
+        print(f"Skipping {skipped} file(s) completed by a previous run")
+
+    if schedule == "longest-first" and workers > 1:
+        jobs = schedule_longest_first(jobs)
+    elif schedule not in ["longest-first", "in-order"]:
+        raise ValueError(
+            "Schedule must be either 'longest-first' or 'in-order'."
+        )
+
+    # files are recorded in the manifest only once the sink
+    # has committed all of their samples
+    pending_records: List[Tuple[ManifestRecord, int]] = []
+    written_count = 0
+
+    def record_committed():
+        while len(pending_records) > 0 \
+                and pending_records[0][1] <= sink.committed_count:
+            record, _ = pending_records.pop(0)
+            if manifest is not None:
+                manifest.add(record)
+
+    failures = 0
+    with sink:
+        for i, result in enumerate(
+            run_jobs(
+                model_type, jobs, workers, warm_start,
+                page_array if page_array is not None else encoder,
+                writer_threads
+            )
+        ):
+            if result.error is not None:
+                failures += 1
+                print(
+                    f"[{i + 1}/{len(jobs)}] {result.file}: FAILED",
+                    file=sys.stderr
+                )
+                print(result.error, file=sys.stderr)
+                continue
+
+            outputs = [sink.write(sample) for sample in result.samples]
+            written_count += len(outputs)
+            print(
+                f"[{i + 1}/{len(jobs)}] {result.file}: " +
+                f"{len(outputs)} output(s)"
+            )
+            pending_records.append((
+                ManifestRecord(
+                    file=result.file,
+                    seed=result.seed,
+                    model_type=model_type,
+                    outputs=outputs,
+                    hashes=[sample.image_hash for sample in result.samples]
+                ),
+                written_count
+            ))
+            record_committed()
+
+    # closing the sink commits everything written
+    record_committed()
+    if manifest is not None:
+        manifest.close()
+
+    if failures > 0:
+        print(f"{failures} of {len(jobs)} file(s) failed.", file=sys.stderr)
+    return failures
+
+
+def _pages_argument(value: str) -> Union[str, int]:
+    if value in ["first", "all"]:
+        return value
+    if value.isdigit() and int(value) >= 1:
+        return int(value)
+    raise argparse.ArgumentTypeError(
+        "must be 'first', 'all' or a page number (starting from 1)"
+    )
+
+
+def _shape_argument(value: str) -> Tuple[int, int]:
+    height, _, width = value.partition("x")
+    if height.isdigit() and width.isdigit() \
+            and int(height) > 0 and int(width) > 0:
+        return int(height), int(width)
+    raise argparse.ArgumentTypeError("must be HEIGHTxWIDTH (e.g. 1024x724)")
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Render MusicXML using Base or Tweaked Smashcima model.")
     parser.add_argument("model_type", choices=["base", "tweaked"], help="Which model to use: 'base' or 'tweaked'")
     parser.add_argument("input_path", type=str, help="Path to the MusicXML file")
-    parser.add_argument("output_path", type=str, help="Directory to save rendered PNG files")
+    parser.add_argument("output_path", type=str, help="Directory to save rendered PNG files (or tar shards)")
+    parser.add_argument("--workers", type=int, default=1, help="Number of worker processes (default: 1, no parallelism)")
+    parser.add_argument("--num-shards", type=int, default=1, help="Split the input files into this many shards, to be rendered on separate machines with the same --seed (default: 1)")
+    parser.add_argument("--shard-index", type=int, default=0, help="Which input shard to render, from 0 to num-shards - 1 (default: 0)")
+    parser.add_argument("--seed", type=int, default=None, help="Global seed, per-file seeds are derived from it (default: random)")
+    parser.add_argument("--pages", type=_pages_argument, default="all", help="Which pages to render: 'first', 'all' or a page number (default: all)")
+    parser.add_argument("--format", choices=ImageEncoder.FORMATS, default="png", help="Image format of the rendered pages (default: png)")
+    parser.add_argument("--png-compression", type=int, choices=range(10), default=None, metavar="0-9", help="PNG compression level, lower is faster (default: OpenCV default)")
+    parser.add_argument("--quality", type=int, choices=range(101), default=None, metavar="0-100", help="JPEG or WebP quality (default: OpenCV default)")
+    parser.add_argument("--writer-threads", type=int, default=2, help="Threads that encode and write pages in the background (default: 2)")
+    parser.add_argument("--sink", choices=["folder", "tar", "sqlite", "npy"], default="folder", help="Store images as loose files, stream them with annotations and metadata into tar shards, insert them into one SQLite database, or write fixed-size grayscale pages into one memory-mapped .npy array (default: folder)")
+    parser.add_argument("--npy-shape", type=_shape_argument, default=None, metavar="HxW", help="Height and width of the pages in the .npy array (e.g. 1024x724)")
+    parser.add_argument("--shard-size", type=int, default=1024, help="Size of a tar shard in MB (default: 1024)")
+    parser.add_argument("--sqlite-batch-size", type=int, default=64, help="Number of samples inserted into the SQLite database in one transaction (default: 64)")
+    parser.add_argument("--manifest", type=str, default=None, help="JSONL manifest of completed files, used to resume an interrupted run")
+    parser.add_argument("--verify-outputs", action="store_true", help="When resuming, re-render files whose recorded outputs are missing or corrupted")
+    parser.add_argument("--schedule", choices=["longest-first", "in-order"], default="longest-first", help="With multiple workers, dispatch the files with the largest scores first, or in the order of their names (default: longest-first)")
+    parser.add_argument("--warm-start", action="store_true", help="Build the model once and fork workers from it, sharing its memory (POSIX only)")
 
     args = parser.parse_args()
+    if args.num_shards > 1 and args.seed is None:
+        parser.error("--num-shards needs the --seed shared by all shards")
 
     os.makedirs(args.output_path, exist_ok=True)
-    main(args.model_type, args.input_path, args.output_path)
+    failures = main(
+        args.model_type,
+        args.input_path,
+        args.output_path,
+        workers=args.workers,
+        seed=args.seed,
+        warm_start=args.warm_start,
+        manifest_path=args.manifest,
+        verify_outputs=args.verify_outputs,
+        pages=args.pages,
+        encoder=ImageEncoder(
+            format=args.format,
+            png_compression=args.png_compression,
+            quality=args.quality
+        ),
+        writer_threads=args.writer_threads,
+        sink_type=args.sink,
+        shard_size=args.shard_size * 2 ** 20,
+        sqlite_batch_size=args.sqlite_batch_size,
+        num_shards=args.num_shards,
+        shard_index=args.shard_index,
+        schedule=args.schedule,
+        npy_shape=args.npy_shape
+    )
+    sys.exit(1 if failures > 0 else 0)
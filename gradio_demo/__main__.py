@@ -1,19 +1,25 @@
 from .asset_bundles import MXL_FILES, WRITERS, BACKGROUND_SAMPLES
-from .utils import img_smashcima2gradio
 from .DemoModel import DemoModel
-from typing import Optional, Tuple
+from smashcima.service import SynthesisRequest, SynthesisService
+from smashcima.LruCache import LruCache
 import gradio as gr
 import numpy as np
+import cv2
 import random
 
 
+SERVICE = SynthesisService(model_factory=DemoModel, workers=2)
+"""Warm models shared by all user sessions, started before the launch"""
+
+PREVIEW_CACHE: LruCache[bytes] = LruCache(max_entries=256)
+"""JPEG previews by (file, writer, background index, seed), so that toggling
+between already seen settings does not synthesize them again"""
+
+
 with gr.Blocks() as demo:
     
     # === state ===
 
-    model_cache = gr.State(None)
-    "Holds the model instance for the user session"
-
     background = gr.State(0)
     "The index of the selected background sample"
 
@@ -47,6 +53,12 @@ with gr.Blocks() as demo:
                     value=WRITERS[0]
                 )
 
+                seed_number = gr.Number(
+                    label="Seed",
+                    value=0,
+                    precision=0
+                )
+
                 background_gallery = gr.Gallery(
                     label="Background Sample",
                     columns=3,
@@ -69,57 +81,74 @@ with gr.Blocks() as demo:
         new_mxl_file_name = random.choice(MXL_FILES).name
         new_writer = random.choice(WRITERS)
         new_bg_index = random.randint(0, len(BACKGROUND_SAMPLES) - 1)
+        new_seed = random.randint(0, 2 ** 31 - 1)
         return (
             gr.Radio(value=new_mxl_file_name),
             gr.Radio(value=new_writer),
-            gr.Gallery(selected_index=new_bg_index)
+            gr.Gallery(selected_index=new_bg_index),
+            gr.Number(value=new_seed)
         )
 
     def synthesize(
-        model: Optional[DemoModel],
         mxl_file_name: str,
         writer: int,
-        bg_index: int
-    ) -> Tuple[np.ndarray, DemoModel]:
-        # create the model with the first user request
-        if model is None:
-            model = DemoModel()
-
-        # full path to the input MusicXML file
-        mxl_path = str(next(f for f in MXL_FILES if f.name == mxl_file_name))
-
-        # set the writer style
-        model.mpp_style_domain.current_writer = writer
-
-        # set the background paper style
-        model.paper_style_domain.current_patch \
-            = BACKGROUND_SAMPLES[bg_index].patch
-
-        # run the synthesizer
-        scene = model(mxl_path)
-        img = scene.render(scene.pages[0])
+        bg_index: int,
+        seed: int
+    ) -> np.ndarray:
+        key = (mxl_file_name, writer, bg_index, int(seed))
+        preview = PREVIEW_CACHE.get(key)
+
+        if preview is None:
+            # full path to the input MusicXML file
+            mxl_path = str(
+                next(f for f in MXL_FILES if f.name == mxl_file_name)
+            )
 
-        return img_smashcima2gradio(img), model
+            # run the synthesizer with the writer and background paper style
+            # (background samples are listed in the order of paper patches),
+            # the service keeps the parsed scores of the files
+            result = SERVICE.synthesize(SynthesisRequest(
+                file=mxl_path,
+                seed=int(seed),
+                sample_key=mxl_file_name,
+                writer=writer,
+                paper_patch=bg_index,
+                image_format="jpg",
+                quality=90
+            ))
+            preview = result.image
+            PREVIEW_CACHE.put(key, preview)
+
+        img = cv2.imdecode(
+            np.frombuffer(preview, dtype=np.uint8),
+            cv2.IMREAD_COLOR
+        )
+        return cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
     
     # === bind events ===
 
     synth_evt_args = (
         synthesize,
-        [model_cache, mxl_file_radio, writer_radio, background],
-        [output_canvas, model_cache]
+        [mxl_file_radio, writer_radio, background, seed_number],
+        [output_canvas]
     )
 
     randomize_btn.click(
         randomize, [],
-        [mxl_file_radio, writer_radio, background_gallery]
+        [mxl_file_radio, writer_radio, background_gallery, seed_number]
     )
     synthesize_btn.click(*synth_evt_args)
     mxl_file_radio.change(*synth_evt_args)
     writer_radio.change(*synth_evt_args)
+    seed_number.change(*synth_evt_args)
     background_gallery.select(change_background, [], [background]) \
         .then(*synth_evt_args)
 
 
 # .venv/bin/python3 -m gradio_demo
 if __name__ == "__main__":
-    demo.launch()
+    SERVICE.start()
+    try:
+        demo.launch()
+    finally:
+        SERVICE.close()
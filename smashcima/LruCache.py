@@ -0,0 +1,97 @@
+import threading
+from collections import OrderedDict
+from typing import Callable, Generic, Hashable, List, Optional, TypeVar
+
+V = TypeVar("V")
+
+
+class LruCache(Generic[V]):
+    """Thread-safe cache that evicts the least recently used values.
+
+    The cache is bounded by the number of entries, by the total size
+    of the values (as measured by `size_of`, e.g. in bytes), or both.
+    A value larger than the size bound is not cached at all.
+    """
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        max_size: Optional[int] = None,
+        size_of: Callable[[V], int] = lambda value: 1
+    ):
+        """
+        :param max_entries: Maximum number of cached values
+        :param max_size: Maximum total size of the cached values
+        :param size_of: Measures the size of a value
+        """
+        self.max_entries = max_entries
+        self.max_size = max_size
+        self.size_of = size_of
+
+        self.size = 0
+        "Total size of the cached values"
+
+        self.hits = 0
+        "Number of lookups that found their value"
+
+        self.misses = 0
+        "Number of lookups that did not find their value"
+
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, V]" = OrderedDict()
+        self._sizes: "dict[Hashable, int]" = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def get(self, key: Hashable) -> Optional[V]:
+        """Returns the cached value and marks it as recently used,
+        or None when it is not cached"""
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def put(self, key: Hashable, value: V):
+        """Caches the value, evicting the least recently used ones
+        until the cache fits its bounds"""
+        size = self.size_of(value)
+        with self._lock:
+            self._remove(key)
+            if self.max_size is not None and size > self.max_size:
+                return
+            self._entries[key] = value
+            self._sizes[key] = size
+            self.size += size
+            while (self.max_entries is not None
+                    and len(self._entries) > self.max_entries) \
+                    or (self.max_size is not None
+                    and self.size > self.max_size):
+                self._remove(next(iter(self._entries)))
+
+    def remove(self, key: Hashable):
+        """Removes the value, if it is cached"""
+        with self._lock:
+            self._remove(key)
+
+    def keys(self) -> List[Hashable]:
+        """Returns the keys from the least to the most recently used"""
+        with self._lock:
+            return list(self._entries.keys())
+
+    def _remove(self, key: Hashable):
+        if key in self._entries:
+            del self._entries[key]
+            self.size -= self._sizes.pop(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self.size = 0
@@ -0,0 +1,218 @@
+import json
+import threading
+import time
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# A stage node of the metrics tree is a JSON-serializable dictionary:
+# {"seconds": float, "calls": int, "stages": {name: node, ...}}
+
+
+def _new_node() -> Dict[str, Any]:
+    return {"seconds": 0.0, "calls": 0, "stages": {}}
+
+
+def _add_time(parent: Dict[str, Any], name: str, seconds: float):
+    node = parent["stages"].get(name)
+    if node is None:
+        node = _new_node()
+        parent["stages"][name] = node
+    node["seconds"] += seconds
+    node["calls"] += 1
+
+
+_active_timer: ContextVar[Optional["StageTimer"]] = \
+    ContextVar("smashcima_active_stage_timer", default=None)
+
+
+class _NullStage:
+    """Stands in for stages and laps when no timer is active"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+    def lap(self, name: str):
+        pass
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    def __init__(self, timer: "StageTimer", name: str):
+        self.timer = timer
+        self.name = name
+        self.started_at = 0.0
+
+    def __enter__(self):
+        stack = self.timer._stack
+        parent = stack[-1]
+        node = parent["stages"].get(self.name)
+        if node is None:
+            node = _new_node()
+            parent["stages"][self.name] = node
+        stack.append(node)
+        self.started_at = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        node = self.timer._stack.pop()
+        node["seconds"] += time.perf_counter() - self.started_at
+        node["calls"] += 1
+        return False
+
+
+class _MetricsStage:
+    """Times a stage straight into the metrics of a timed scene"""
+
+    def __init__(self, metrics: Dict[str, Any], name: str):
+        self.metrics = metrics
+        self.name = name
+        self.started_at = 0.0
+
+    def __enter__(self):
+        self.started_at = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        _add_time(
+            self.metrics,
+            self.name,
+            time.perf_counter() - self.started_at
+        )
+        return False
+
+
+class _Laps:
+    def __init__(self, timer: "StageTimer"):
+        self.timer = timer
+        self.last_at = time.perf_counter()
+
+    def lap(self, name: str):
+        now = time.perf_counter()
+        _add_time(self.timer._stack[-1], name, now - self.last_at)
+        self.last_at = now
+
+
+class _Sample:
+    def __init__(self, timer: "StageTimer", fields: Dict[str, Any]):
+        self.timer = timer
+        self.fields = fields
+        self.outermost = False
+        self.token: Any = None
+        self.started_at = 0.0
+
+    def __enter__(self):
+        # models call their base class within the sample (e.g. after
+        # loading the score), the whole call is timed as one sample
+        if len(self.timer._stack) > 0:
+            return self
+        self.outermost = True
+        root = _new_node()
+        self.timer.metrics = root
+        self.timer._stack.append(root)
+        self.token = _active_timer.set(self.timer)
+        self.started_at = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if not self.outermost:
+            return False
+        root = self.timer._stack.pop()
+        root["seconds"] = time.perf_counter() - self.started_at
+        root["calls"] = 1
+        _active_timer.reset(self.token)
+        if exc_type is None:
+            self.timer.emit({**self.fields, "metrics": root})
+        return False
+
+
+class StageTimer:
+    """Measures the time spent in the nested stages of the synthesis.
+
+    The timer of a model (`Model.timer`) is disabled by default, which
+    makes every timed stage a no-op. When enabled, each invocation
+    of the model produces a tree of stages (e.g. loading the score,
+    picking styles, synthesizing pages and their phases), with the total
+    seconds and the number of calls of each stage. The tree is attached
+    to the synthesized scene as `scene.metrics` and, when a JSONL path
+    is given, appended to that file as one line per sample.
+
+    Synthesizers mark their stages with `timed_stage` and `timed_laps`,
+    which find the timer of the model that is currently synthesizing.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = False,
+        jsonl_path: Optional[Path] = None
+    ):
+        self.enabled = enabled
+        "Whether the stages are timed"
+
+        self.jsonl_path = jsonl_path
+        "File the metrics of each sample are appended to, if given"
+
+        self.metrics: Dict[str, Any] = {}
+        "Stage tree of the last timed sample"
+
+        self._stack: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def sample(self, **fields: Any):
+        """Times one sample, the fields are written to the JSONL line
+        along with its metrics (e.g. the seed and the sample key)"""
+        if not self.enabled:
+            return _NULL_STAGE
+        return _Sample(self, fields)
+
+    def stage(self, name: str):
+        """Times a stage nested in the current stage"""
+        return _Stage(self, name)
+
+    def emit(self, record: Dict[str, Any]):
+        """Appends the record to the JSONL file, if there is one"""
+        if self.jsonl_path is None:
+            return
+        line = json.dumps(record) + "\n"
+        with self._lock:
+            with open(self.jsonl_path, "a", encoding="utf-8") as file:
+                file.write(line)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+
+def timed_stage(name: str, metrics: Optional[Dict[str, Any]] = None):
+    """Times a stage of the synthesis within a `with` block.
+
+    Does nothing, unless a model with an enabled timer is synthesizing.
+    Work done after the synthesis (e.g. rendering) is added to the given
+    metrics of a timed scene instead.
+    """
+    timer = _active_timer.get()
+    if timer is not None:
+        return timer.stage(name)
+    if metrics:
+        return _MetricsStage(metrics, name)
+    return _NULL_STAGE
+
+
+def timed_laps():
+    """Times consecutive stages of a long function without nesting
+    its code in `with` blocks: every call to `lap(name)` times the stage
+    that ended since the previous lap (or since `timed_laps` was called)"""
+    timer = _active_timer.get()
+    if timer is None:
+        return _NULL_STAGE
+    return _Laps(timer)
@@ -11,6 +11,7 @@ from .synthesis.LineSynthesizer import LineSynthesizer
 # -----------------------------------------------------------------------------
 # import sub-modules to make them accessible from this module
 # TODO: assets
+from smashcima import batch
 from smashcima import exporting
 from smashcima import geometry
 # smashcima.jupyter must always be imported explicitly, since it depends
@@ -18,5 +19,6 @@ from smashcima import geometry
 from smashcima import loading
 from smashcima import orchestration
 from smashcima import scene
+from smashcima import service
 from smashcima import synthesis
 from smashcima import config
@@ -1,6 +1,9 @@
 import pickle
-from typing import Optional
+from typing import List, Optional
 
+import numpy as np
+
+from smashcima.LruCache import LruCache
 from smashcima.scene import Glyph, LineGlyph
 
 from .MppGlyphMetadata import MppGlyphMetadata
@@ -17,6 +20,13 @@ class PackedGlyph:
     This trick speeds up loading the repository pickle file from about
     15 seconds down to under a second.
     """
+
+    shared_bitmaps: LruCache[List[np.ndarray]] = LruCache(
+        max_size=128 * 1024 * 1024,
+        size_of=lambda bitmaps: sum(bitmap.nbytes for bitmap in bitmaps)
+    )
+    """Sprite bitmaps of recently unpacked glyphs by their packed data,
+    shared by the glyphs unpacked from the same packed glyph"""
     
     def __init__(
         self,
@@ -45,4 +55,20 @@ class PackedGlyph:
         )
     
     def unpack(self) -> Glyph:
-        return pickle.loads(self.data)
+        """Unpickles the glyph. Its sprite bitmaps are read-only, they are
+        shared with the other glyphs recently unpacked from this packed
+        glyph, so that the renderer converts them only once (see
+        `PremultipliedCache`). Copy a bitmap before modifying it."""
+        glyph: Glyph = pickle.loads(self.data)
+
+        bitmaps = PackedGlyph.shared_bitmaps.get(self.data)
+        if bitmaps is None:
+            bitmaps = [sprite.bitmap for sprite in glyph.sprites]
+            for bitmap in bitmaps:
+                bitmap.flags.writeable = False
+            PackedGlyph.shared_bitmaps.put(self.data, bitmaps)
+        else:
+            for sprite, bitmap in zip(glyph.sprites, bitmaps):
+                sprite.bitmap = bitmap
+
+        return glyph
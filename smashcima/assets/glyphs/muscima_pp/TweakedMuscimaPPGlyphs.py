@@ -44,6 +44,7 @@ from .SymbolRepository import SymbolRepository
 from .MppGlyphMetadata import MppGlyphMetadata
 from pathlib import Path
 import pickle
+import random
 from tqdm import tqdm
 import shutil
 import cv2
@@ -54,6 +55,9 @@ from typing import Optional
 # .venv/bin/python3 -m smashcima.assets.glyphs.muscima_pp --debug
 
 class TweakedMuscimaPPGlyphs(AssetBundle):
+    EXTRACTION_SEED = 0
+    "Seed of the RNG that randomizes the sizes of extracted glyphs"
+
     def __post_init__(self) -> None:
         self._symbol_repository_cache: Optional[SymbolRepository] = None
 
@@ -73,19 +77,22 @@ class TweakedMuscimaPPGlyphs(AssetBundle):
         repository = SymbolRepository()
         
         print("HA ENTRAAAAAAAAAAAAAAAAT GOOOOOOOOOOOOOOOOOOOOD")
-        repository.add_glyphs(get_full_noteheads_images())
-        repository.add_glyphs(get_empty_noteheads_images())
-        repository.add_glyphs(get_quarter_rests_images())
-        repository.add_glyphs(get_eighth_rests_images())
-        repository.add_glyphs(get_sixteenth_rests_images())
-        repository.add_glyphs(get_whole_rests_images())
-        repository.add_glyphs(get_half_rests_images())
-        repository.add_glyphs(get_g_clefs_images())
-        repository.add_glyphs(get_f_clefs_images())
-        repository.add_glyphs(get_accidentals_images())
-        repository.add_glyphs(get_normal_barlines_images())
-        repository.add_glyphs(get_c_clefs_images())
-        repository.add_glyphs(get_beams_images())
+
+        # glyph sizes are randomized, but the bundle must be reproducible
+        rng = random.Random(self.EXTRACTION_SEED)
+        repository.add_glyphs(get_full_noteheads_images(rng))
+        repository.add_glyphs(get_empty_noteheads_images(rng))
+        repository.add_glyphs(get_quarter_rests_images(rng))
+        repository.add_glyphs(get_eighth_rests_images(rng))
+        repository.add_glyphs(get_sixteenth_rests_images(rng))
+        repository.add_glyphs(get_whole_rests_images(rng))
+        repository.add_glyphs(get_half_rests_images(rng))
+        repository.add_glyphs(get_g_clefs_images(rng))
+        repository.add_glyphs(get_f_clefs_images(rng))
+        repository.add_glyphs(get_accidentals_images(rng))
+        repository.add_glyphs(get_normal_barlines_images(rng))
+        repository.add_glyphs(get_c_clefs_images(rng))
+        repository.add_glyphs(get_beams_images(rng))
 
         # go through all the MUSCIMA++ XML files
         for document_path in tqdm(document_paths):
@@ -258,7 +258,7 @@ def get_full_noteheads(page: MppPage) -> List[Glyph]:
         label=SmuflLabels.noteheadBlack.value
     )
 
-def get_full_noteheads_images() -> List[Glyph]:
+def get_full_noteheads_images(rng: random.Random) -> List[Glyph]:
     print("noteheadfull bones")
     og_path = '/home/gasbert/Desktop/Projecte_GANs/Datasets/Handwritten/'
     base_dataset = "datasets_base"
@@ -283,7 +283,7 @@ def get_full_noteheads_images() -> List[Glyph]:
                 image_notehead = Image.open(os.path.join(notehead_path, files_notehead[i])).convert('L')
 
                 original_width, original_height = image_notehead.size
-                notehead_height = random.randint(25, 35)
+                notehead_height = rng.randint(25, 35)
                 notehead_width = int((notehead_height / original_height) * original_width)
                 image_notehead = image_notehead.resize((notehead_width, notehead_height))
                 image_array = np.array(image_notehead)
@@ -326,7 +326,7 @@ def get_empty_noteheads(page: MppPage) -> List[Glyph]:
         label=SmuflLabels.noteheadWhole.value
     )
 
-def get_empty_noteheads_images() -> List[Glyph]:
+def get_empty_noteheads_images(rng: random.Random) -> List[Glyph]:
     print("noteheadwhole bones")
     og_path = '/home/gasbert/Desktop/Projecte_GANs/Datasets/Handwritten/'
     base_dataset = "datasets_base"
@@ -351,7 +351,7 @@ def get_empty_noteheads_images() -> List[Glyph]:
                 image_notehead = Image.open(os.path.join(notehead_path, files_notehead[i])).convert('L')
 
                 original_width, original_height = image_notehead.size
-                notehead_height = random.randint(25, 35)
+                notehead_height = rng.randint(25, 35)
                 notehead_width = int((notehead_height / original_height) * original_width)
                 image_notehead = image_notehead.resize((notehead_width, notehead_height))
                 image_array = np.array(image_notehead)
@@ -398,7 +398,7 @@ def get_whole_rests(page: MppPage) -> List[Glyph]:
     return glyphs
 
 
-def get_whole_rests_images() -> List[Glyph]:
+def get_whole_rests_images(rng: random.Random) -> List[Glyph]:
     
     print("wholerests bones")
     og_path = '/home/gasbert/Desktop/Projecte_GANs/Datasets/Handwritten/'
@@ -424,7 +424,7 @@ def get_whole_rests_images() -> List[Glyph]:
                 image_notehead = Image.open(os.path.join(notehead_path, files_notehead[i])).convert('L')
 
                 original_width, original_height = image_notehead.size
-                notehead_width = random.randint(30, 40)
+                notehead_width = rng.randint(30, 40)
                 notehead_height = int((notehead_width / original_width) * original_height)
                 image_notehead = image_notehead.resize((notehead_width, notehead_height))
                 image_array = np.array(image_notehead)
@@ -472,7 +472,7 @@ def get_half_rests(page: MppPage) -> List[Glyph]:
     return glyphs
     
 
-def get_half_rests_images() -> List[Glyph]:
+def get_half_rests_images(rng: random.Random) -> List[Glyph]:
     
     print("halfrests bones")
     og_path = '/home/gasbert/Desktop/Projecte_GANs/Datasets/Handwritten/'
@@ -498,7 +498,7 @@ def get_half_rests_images() -> List[Glyph]:
                 image_notehead = Image.open(os.path.join(notehead_path, files_notehead[i])).convert('L')
 
                 original_width, original_height = image_notehead.size
-                notehead_width = random.randint(30, 40)
+                notehead_width = rng.randint(30, 40)
                 notehead_height = int((notehead_width / original_width) * original_height)
                 image_notehead = image_notehead.resize((notehead_width, notehead_height))
                 image_array = np.array(image_notehead)
@@ -538,7 +538,7 @@ def get_quarter_rests(page: MppPage) -> List[Glyph]:
         when_center_outside_recenter=True
     )
 
-def get_quarter_rests_images() -> List[Glyph]:
+def get_quarter_rests_images(rng: random.Random) -> List[Glyph]:
 
     print("quarterrests bones")
     og_path = '/home/gasbert/Desktop/Projecte_GANs/Datasets/Handwritten/'
@@ -564,7 +564,7 @@ def get_quarter_rests_images() -> List[Glyph]:
                 image_notehead = Image.open(os.path.join(notehead_path, files_notehead[i])).convert('L')
 
                 original_width, original_height = image_notehead.size
-                notehead_height = random.randint(50, 70)
+                notehead_height = rng.randint(50, 70)
                 notehead_width = int((notehead_height / original_height) * original_width)
                 image_notehead = image_notehead.resize((notehead_width, notehead_height))
                 image_array = np.array(image_notehead)
@@ -604,7 +604,7 @@ def get_eighth_rests(page: MppPage) -> List[Glyph]:
         when_center_outside_recenter=True
     )
 
-def get_eighth_rests_images() -> List[Glyph]:
+def get_eighth_rests_images(rng: random.Random) -> List[Glyph]:
     
     print("eighthrests bones")
     og_path = '/home/gasbert/Desktop/Projecte_GANs/Datasets/Handwritten/'
@@ -630,7 +630,7 @@ def get_eighth_rests_images() -> List[Glyph]:
                 image_notehead = Image.open(os.path.join(notehead_path, files_notehead[i])).convert('L')
 
                 original_width, original_height = image_notehead.size
-                notehead_height = random.randint(50, 70)
+                notehead_height = rng.randint(50, 70)
                 notehead_width = int((notehead_height / original_height) * original_width)
                 image_notehead = image_notehead.resize((notehead_width, notehead_height))
                 image_array = np.array(image_notehead)
@@ -672,7 +672,7 @@ def get_sixteenth_rests(page: MppPage) -> List[Glyph]:
     )
 
 
-def get_sixteenth_rests_images() -> List[Glyph]:
+def get_sixteenth_rests_images(rng: random.Random) -> List[Glyph]:
     
     print("sixteenthrests bones")
     og_path = '/home/gasbert/Desktop/Projecte_GANs/Datasets/Handwritten/'
@@ -698,7 +698,7 @@ def get_sixteenth_rests_images() -> List[Glyph]:
                 image_notehead = Image.open(os.path.join(notehead_path, files_notehead[i])).convert('L')
 
                 original_width, original_height = image_notehead.size
-                notehead_height = random.randint(50, 70)
+                notehead_height = rng.randint(50, 70)
                 notehead_width = int((notehead_height / original_height) * original_width)
                 image_notehead = image_notehead.resize((notehead_width, notehead_height))
                 image_array = np.array(image_notehead)
@@ -745,7 +745,7 @@ def get_normal_barlines(page: MppPage) -> List[Glyph]:
         label=SmuflLabels.barlineSingle.value
     )
 
-def get_normal_barlines_images() -> List[Glyph]:
+def get_normal_barlines_images(rng: random.Random) -> List[Glyph]:
     print("barlines bones")
     og_path = '/home/gasbert/Desktop/Projecte_GANs/Datasets/Handwritten/'
     base_dataset = "datasets_base"
@@ -770,7 +770,7 @@ def get_normal_barlines_images() -> List[Glyph]:
                 image_notehead = Image.open(os.path.join(notehead_path, files_notehead[i])).convert('L')
 
                 original_width, original_height = image_notehead.size
-                notehead_height = random.randint(110, 130)
+                notehead_height = rng.randint(110, 130)
                 notehead_width = int((notehead_height / original_height) * original_width)
                 
                 if(notehead_width < 2):
@@ -812,7 +812,7 @@ def get_g_clefs(page: MppPage) -> List[Glyph]:
         line_from_top=3
     )
 
-def get_g_clefs_images() -> List[Glyph]:
+def get_g_clefs_images(rng: random.Random) -> List[Glyph]:
     
     print("gclefs bones")
     og_path = '/home/gasbert/Desktop/Projecte_GANs/Datasets/Handwritten/'
@@ -838,7 +838,7 @@ def get_g_clefs_images() -> List[Glyph]:
                 image_notehead = Image.open(os.path.join(notehead_path, files_notehead[i])).convert('L')
 
                 original_width, original_height = image_notehead.size
-                notehead_height = random.randint(120, 160)
+                notehead_height = rng.randint(120, 160)
                 notehead_width = int((notehead_height / original_height) * original_width)
                 image_notehead = image_notehead.resize((notehead_width, notehead_height))
                 image_array = np.array(image_notehead)
@@ -876,7 +876,7 @@ def get_f_clefs(page: MppPage) -> List[Glyph]:
         line_from_top=1
     )
 
-def get_f_clefs_images() -> List[Glyph]:
+def get_f_clefs_images(rng: random.Random) -> List[Glyph]:
     
     print("fclefs bones")
     og_path = '/home/gasbert/Desktop/Projecte_GANs/Datasets/Handwritten/'
@@ -902,7 +902,7 @@ def get_f_clefs_images() -> List[Glyph]:
                 image_notehead = Image.open(os.path.join(notehead_path, files_notehead[i])).convert('L')
 
                 original_width, original_height = image_notehead.size
-                notehead_height = random.randint(120, 160)
+                notehead_height = rng.randint(120, 160)
                 notehead_width = int((notehead_height / original_height) * original_width)
                 image_notehead = image_notehead.resize((notehead_width, notehead_height))
                 image_array = np.array(image_notehead)
@@ -943,7 +943,7 @@ def get_c_clefs(page: MppPage) -> List[Glyph]:
         label=SmuflLabels.cClef.value
     )
 
-def get_c_clefs_images() -> List[Glyph]:
+def get_c_clefs_images(rng: random.Random) -> List[Glyph]:
     print("cclefs bones")
     og_path = '/home/gasbert/Desktop/Projecte_GANs/Datasets/Handwritten/'
     base_dataset = "datasets_base"
@@ -969,7 +969,7 @@ def get_c_clefs_images() -> List[Glyph]:
                     image_notehead = Image.open(os.path.join(notehead_path, files_notehead[i])).convert('L')
 
                     original_width, original_height = image_notehead.size
-                    notehead_height = random.randint(120, 160)
+                    notehead_height = rng.randint(120, 160)
                     notehead_width = int((notehead_height / original_height) * original_width)
                     image_notehead = image_notehead.resize((notehead_width, notehead_height))
                     image_array = np.array(image_notehead)
@@ -1026,7 +1026,7 @@ def get_beams(page: MppPage) -> List[LineGlyph]:
         in_increasing_direction=True # pointing to the right
     )
 
-def get_beams_images() -> List[Glyph]:
+def get_beams_images(rng: random.Random) -> List[Glyph]:
     print("beams bones")
     og_path = '/home/gasbert/Desktop/Projecte_GANs/Datasets/Handwritten/'
     base_dataset = "datasets_base"
@@ -1051,7 +1051,7 @@ def get_beams_images() -> List[Glyph]:
                 image_notehead = Image.open(os.path.join(notehead_path, files_notehead[i])).convert('L')
 
                 original_width, original_height = image_notehead.size
-                notehead_height = random.randint(25, 35)
+                notehead_height = rng.randint(25, 35)
                 notehead_width = int((notehead_height / original_height) * original_width)
                 image_notehead = image_notehead.resize((notehead_width, notehead_height))
                 image_array = np.array(image_notehead)
@@ -1388,7 +1388,7 @@ def get_accidentals(page: MppPage) -> List[Glyph]:
     return glyphs
 
 
-def get_accidentals_images() -> List[Glyph]:
+def get_accidentals_images(rng: random.Random) -> List[Glyph]:
     print("accidentals bones")
     _LABEL_LOOKUP: Dict[str, str] = {
         "accidentalsharp": SmuflLabels.accidentalSharp.value,
@@ -1424,7 +1424,7 @@ def get_accidentals_images() -> List[Glyph]:
                     image_notehead = Image.open(os.path.join(notehead_path, files_notehead[i])).convert('L')
 
                     original_width, original_height = image_notehead.size
-                    notehead_height = random.randint(55, 65)
+                    notehead_height = rng.randint(55, 65)
                     notehead_width = int((notehead_height / original_height) * original_width)
                     image_notehead = image_notehead.resize((notehead_width, notehead_height))
                     image_array = np.array(image_notehead)
@@ -0,0 +1,49 @@
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class BackgroundWriter:
+    """Runs encoding and writing tasks on a pool of background threads.
+
+    Image encoding in OpenCV and file writes release the GIL, so they
+    can run while the calling thread synthesizes and renders the next page.
+    The number of pending tasks is bounded: when the limit is reached,
+    `submit` blocks until a task finishes. This backpressure keeps the
+    memory held by not-yet-written bitmaps bounded.
+    """
+
+    def __init__(self, threads: int = 2, max_pending: Optional[int] = None):
+        assert threads >= 1
+
+        self.max_pending = max_pending or 2 * threads
+        "How many tasks may be queued or running at once"
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=threads,
+            thread_name_prefix="BackgroundWriter"
+        )
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+
+    def submit(self, fn: Callable[..., T], *args) -> "Future[T]":
+        """Schedules the task, blocks while there are too many pending"""
+        self._slots.acquire()
+        try:
+            future = self._executor.submit(fn, *args)
+        except:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def close(self):
+        """Waits for all pending tasks and stops the threads"""
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self) -> "BackgroundWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
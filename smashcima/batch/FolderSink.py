@@ -0,0 +1,40 @@
+import os
+from pathlib import Path
+
+from .Manifest import hash_file
+from .Sample import Sample
+from .Sink import Sink
+
+
+def write_atomically(path: Path, data: bytes):
+    """Writes the file under a temporary name and then renames it,
+    so that an interrupted write never leaves a half-written file behind"""
+    temporary_path = path.with_name(path.name + ".tmp")
+    with open(temporary_path, "wb") as file:
+        file.write(data)
+    os.replace(temporary_path, path)
+
+
+class FolderSink(Sink):
+    """Writes sample images as loose files into a folder"""
+    def __init__(self, folder: Path):
+        self.folder = folder
+        "The output folder"
+
+        self._written_count = 0
+
+        self.folder.mkdir(parents=True, exist_ok=True)
+
+    def write(self, sample: Sample) -> str:
+        output = sample.key + sample.image_extension
+        write_atomically(self.folder / output, sample.image)
+        self._written_count += 1
+        return output
+
+    @property
+    def committed_count(self) -> int:
+        return self._written_count
+
+    def verify(self, output: str, image_hash: str) -> bool:
+        path = self.folder / output
+        return path.exists() and hash_file(path) == image_hash
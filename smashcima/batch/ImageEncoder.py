@@ -0,0 +1,59 @@
+from typing import List, Optional
+
+import cv2
+import numpy as np
+
+
+class ImageEncoder:
+    """Encodes rendered BGRA bitmaps into image file bytes"""
+
+    FORMATS = ["png", "jpg", "webp"]
+    "Supported image formats"
+
+    def __init__(
+        self,
+        format: str = "png",
+        png_compression: Optional[int] = None,
+        quality: Optional[int] = None
+    ):
+        if format not in ImageEncoder.FORMATS:
+            raise ValueError(
+                f"Unsupported image format {format}, " +
+                f"use one of {ImageEncoder.FORMATS}"
+            )
+        
+        self.format = format
+        "The image format, one of `ImageEncoder.FORMATS`"
+
+        self.png_compression = png_compression
+        """PNG zlib compression level 0-9, None for the OpenCV default
+        (lower is faster, higher is smaller)"""
+
+        self.quality = quality
+        """JPEG or WebP quality 0-100, None for the OpenCV default"""
+
+    @property
+    def extension(self) -> str:
+        """File suffix of the encoded images, including the period"""
+        return "." + self.format
+
+    def _params(self) -> List[int]:
+        if self.format == "png" and self.png_compression is not None:
+            return [cv2.IMWRITE_PNG_COMPRESSION, self.png_compression]
+        if self.format == "jpg" and self.quality is not None:
+            return [cv2.IMWRITE_JPEG_QUALITY, self.quality]
+        if self.format == "webp" and self.quality is not None:
+            return [cv2.IMWRITE_WEBP_QUALITY, self.quality]
+        return []
+
+    def encode(self, bitmap: np.ndarray) -> bytes:
+        """Encodes a BGRA (or BGR, or grayscale) uint8 bitmap"""
+        # JPEG has no alpha channel
+        if self.format == "jpg" and len(bitmap.shape) == 3 \
+                and bitmap.shape[2] == 4:
+            bitmap = cv2.cvtColor(bitmap, cv2.COLOR_BGRA2BGR)
+        
+        success, buffer = cv2.imencode(self.extension, bitmap, self._params())
+        if not success:
+            raise Exception(f"Encoding the bitmap as {self.format} failed.")
+        return buffer.tobytes()
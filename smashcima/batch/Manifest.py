@@ -0,0 +1,146 @@
+import json
+import os
+from dataclasses import asdict, dataclass, field
+from hashlib import sha256
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+@dataclass
+class ManifestRecord:
+    """Describes one completed item of a batch run"""
+
+    file: str
+    "Name of the input file"
+
+    seed: int
+    "The seed the item was synthesized with"
+
+    model_type: str
+    "Name of the model that synthesized the item"
+
+    outputs: List[str] = field(default_factory=list)
+    "Paths of the written outputs, relative to the output folder"
+
+    hashes: List[str] = field(default_factory=list)
+    "SHA-256 hex digests of the outputs, in the same order"
+
+    @property
+    def key(self) -> Tuple[str, int, str]:
+        return (self.file, self.seed, self.model_type)
+
+
+class Manifest:
+    """Append-only JSONL log of batch items that have been completed.
+
+    The first line holds the run header (the global seed), every other line
+    is one completed `ManifestRecord`. A record is appended only after all
+    its outputs have been written, so an item interrupted by pre-emption
+    has no record and is synthesized again on restart. A trailing line
+    that was cut off mid-write is ignored and truncated away, so that
+    the next record starts on a line of its own.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        "Path to the JSONL manifest file"
+
+        self.run_seed: Optional[int] = None
+        "Global seed of the run, None until the header is written"
+
+        self.records: Dict[Tuple[str, int, str], ManifestRecord] = {}
+        "Completed items by their key"
+
+        if self.path.exists():
+            self._load()
+
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def _load(self):
+        complete_size = 0
+        with open(self.path, "rb") as file:
+            for line in file:
+                if not line.endswith(b"\n"):
+                    break # cut off mid-write
+                complete_size += len(line)
+                try:
+                    data = json.loads(line)
+                except json.JSONDecodeError:
+                    continue # half-written line
+                
+                if data.get("type") == "run":
+                    self.run_seed = data["seed"]
+                elif data.get("type") == "item":
+                    del data["type"]
+                    record = ManifestRecord(**data)
+                    self.records[record.key] = record
+
+        # appended records would be glued onto the cut off line
+        if self.path.stat().st_size > complete_size:
+            os.truncate(self.path, complete_size)
+
+    def _append(self, data: dict):
+        self._file.write(json.dumps(data) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def start_run(self, seed: int):
+        """Writes the run header, if the manifest does not have one yet"""
+        if self.run_seed is not None:
+            if self.run_seed != seed:
+                raise Exception(
+                    f"The manifest {self.path} belongs to a run with seed " +
+                    f"{self.run_seed}, not {seed}."
+                )
+            return
+        self.run_seed = seed
+        self._append({"type": "run", "seed": seed})
+
+    def is_done(self, file: str, seed: int, model_type: str) -> bool:
+        """Returns true if the item has already been completed"""
+        return (file, seed, model_type) in self.records
+
+    def add(self, record: ManifestRecord):
+        """Records a completed item"""
+        self.records[record.key] = record
+        self._append({"type": "item", **asdict(record)})
+
+    def verify(
+        self,
+        is_valid: Callable[[str, str], bool]
+    ) -> List[ManifestRecord]:
+        """Checks the recorded outputs, given a function that validates
+        an output by its name and hash (e.g. `Sink.verify`).
+
+        Records whose outputs are missing or do not match their hash
+        (i.e. were only partially written) are forgotten, so that their
+        items will be synthesized again. These records are returned.
+        """
+        invalid: List[ManifestRecord] = []
+        for record in list(self.records.values()):
+            for output, digest in zip(record.outputs, record.hashes):
+                if not is_valid(output, digest):
+                    invalid.append(record)
+                    del self.records[record.key]
+                    break
+        return invalid
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self) -> "Manifest":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def hash_bytes(data: bytes) -> str:
+    """Returns the SHA-256 hex digest of the data"""
+    return sha256(data).hexdigest()
+
+
+def hash_file(path: Path) -> str:
+    """Returns the SHA-256 hex digest of the file contents"""
+    with open(path, "rb") as file:
+        return hash_bytes(file.read())
@@ -0,0 +1,161 @@
+import copy
+import mmap
+from pathlib import Path
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from .Manifest import hash_bytes
+
+
+class PageFit(NamedTuple):
+    """How a page bitmap was fitted into a row of the `NpyPageArray`"""
+
+    scale: float
+    "Scale applied to the page bitmap"
+
+    offset_x: int
+    "Left padding of the scaled page in pixels"
+
+    offset_y: int
+    "Top padding of the scaled page in pixels"
+
+    def apply(self, annotations: Dict[str, Any]) -> Dict[str, Any]:
+        """Maps annotations of the page bitmap (see `AnnotationsExporter`)
+        onto the fitted page"""
+        fitted = copy.deepcopy(annotations)
+        for region in fitted["regions"]:
+            x, y, w, h = region["bbox"]
+            region["bbox"] = [
+                x * self.scale + self.offset_x,
+                y * self.scale + self.offset_y,
+                w * self.scale,
+                h * self.scale
+            ]
+        fitted["fit"] = {
+            "scale": self.scale,
+            "offset": [self.offset_x, self.offset_y],
+            "source_size": [annotations["width"], annotations["height"]]
+        }
+        return fitted
+
+
+class NpyPageArray:
+    """Fixed-shape grayscale pages stored in a memory-mapped `.npy` file.
+
+    The file holds one N x H x W uint8 array, that can be opened by any
+    reader with `np.load(path, mmap_mode="r")` for random access without
+    any decoding. Each page is flattened onto white, scaled to fit into
+    H x W (keeping its aspect ratio) and centered on a white background.
+
+    Every process opens its own mapping of the file, so that worker
+    processes can write their pages straight into their rows. The mapping
+    is not pickled with the object. Only the pages of a written row are
+    flushed to the disk, not the whole mapping.
+    """
+
+    def __init__(self, path: Path, count: int, height: int, width: int):
+        self.path = path
+        "Path to the .npy file"
+
+        self.count = count
+        "Number of rows (pages)"
+
+        self.height = height
+        "Height of a page in pixels"
+
+        self.width = width
+        "Width of a page in pixels"
+
+        self._array: Optional[np.ndarray] = None
+        self._mmap: Optional[mmap.mmap] = None
+        self._offset = 0 # of the pixels, after the .npy header
+
+    @property
+    def shape(self):
+        return (self.count, self.height, self.width)
+
+    def create(self):
+        """Allocates the file, or checks the shape of an existing one"""
+        if not self.path.exists():
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            array = np.lib.format.open_memmap(
+                self.path, mode="w+", dtype=np.uint8, shape=self.shape
+            )
+            del array
+        elif self.array.shape != self.shape:
+            raise ValueError(
+                f"The existing array {self.path} has shape " +
+                f"{self.array.shape}, expected {self.shape}."
+            )
+
+    @property
+    def array(self) -> np.ndarray:
+        """The memory-mapped array, opened on first use"""
+        if self._array is None:
+            # the mapping is opened directly (not by numpy),
+            # so that a range of it can be flushed
+            header = np.load(self.path, mmap_mode="r")
+            shape, self._offset = header.shape, header.offset
+            del header
+            with open(self.path, "r+b") as file:
+                self._mmap = mmap.mmap(file.fileno(), 0)
+            self._array = np.ndarray(
+                shape,
+                dtype=np.uint8,
+                buffer=self._mmap,
+                offset=self._offset
+            )
+        return self._array
+
+    def fit(self, bitmap: np.ndarray) -> Tuple[np.ndarray, PageFit]:
+        """Converts a BGRA page bitmap into a H x W grayscale page"""
+        alpha = bitmap[:, :, 3:4].astype(np.float32) / 255
+        gray = cv2.cvtColor(bitmap[:, :, :3], cv2.COLOR_BGR2GRAY)
+        flat = (gray * alpha[:, :, 0] + 255 * (1 - alpha[:, :, 0])) \
+            .astype(np.uint8)
+
+        h, w = flat.shape
+        scale = min(self.height / h, self.width / w)
+        scaled_w = max(1, min(self.width, round(w * scale)))
+        scaled_h = max(1, min(self.height, round(h * scale)))
+        scaled = cv2.resize(
+            flat,
+            (scaled_w, scaled_h),
+            interpolation=cv2.INTER_AREA if scale < 1 else cv2.INTER_LINEAR
+        )
+
+        fit = PageFit(
+            scale=scale,
+            offset_x=(self.width - scaled_w) // 2,
+            offset_y=(self.height - scaled_h) // 2
+        )
+        page = np.full((self.height, self.width), 255, dtype=np.uint8)
+        page[
+            fit.offset_y:fit.offset_y + scaled_h,
+            fit.offset_x:fit.offset_x + scaled_w
+        ] = scaled
+        return page, fit
+
+    def write(self, row: int, bitmap: np.ndarray) -> PageFit:
+        """Fits the BGRA page bitmap into the given row and flushes it"""
+        page, fit = self.fit(bitmap)
+        self.array[row] = page
+
+        # flushing starts on a page boundary of the mapping
+        assert self._mmap is not None
+        start = self._offset + row * self.height * self.width
+        aligned = start - start % mmap.ALLOCATIONGRANULARITY
+        self._mmap.flush(aligned, start + self.height * self.width - aligned)
+        return fit
+
+    def row_hash(self, row: int) -> str:
+        """SHA-256 hex digest of the pixels in a row"""
+        return hash_bytes(self.array[row].tobytes())
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        state["_array"] = None
+        state["_mmap"] = None
+        return state
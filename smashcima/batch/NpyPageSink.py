@@ -0,0 +1,91 @@
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict
+
+from .NpyPageArray import NpyPageArray
+from .Sample import Sample
+from .Sink import Sink
+
+
+class NpyPageSink(Sink):
+    """Records samples whose pages were written into an `NpyPageArray`.
+
+    The pages themselves are written into their rows by the workers that
+    render them, the sink only receives the samples with the row number
+    in their metadata. It appends the annotations and metadata of each
+    row to a side file next to the array (`annotations.jsonl` unless named
+    otherwise, e.g. per input shard). Rows that are not listed in the side
+    file hold no page (e.g. the input failed).
+    """
+
+    ANNOTATIONS_FILE = "annotations.jsonl"
+
+    def __init__(
+        self,
+        page_array: NpyPageArray,
+        annotations_name: str = ANNOTATIONS_FILE
+    ):
+        self.page_array = page_array
+        "The array the pages are written into"
+
+        self.annotations_name = annotations_name
+        "File name of the side file, next to the array"
+
+        self.rows: Dict[int, Dict[str, Any]] = {}
+        "Side file entries by their row"
+
+        self._written_count = 0
+
+        self.page_array.create()
+        self._load()
+        self._file = open(self.annotations_path, "ab")
+
+    @property
+    def annotations_path(self) -> Path:
+        return self.page_array.path.parent / self.annotations_name
+
+    def _load(self):
+        if not self.annotations_path.exists():
+            return
+        valid_length = 0
+        with open(self.annotations_path, "rb") as file:
+            for line in file:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    break # half-written line
+                self.rows[entry["row"]] = entry
+                valid_length += len(line)
+        with open(self.annotations_path, "r+b") as file:
+            file.truncate(valid_length)
+
+    def write(self, sample: Sample) -> str:
+        row = sample.metadata["row"]
+        entry = {
+            "row": row,
+            "key": sample.key,
+            "sha256": sample.image_hash,
+            "annotations": sample.annotations,
+            "metadata": sample.metadata
+        }
+        self._file.write((json.dumps(entry) + "\n").encode("utf-8"))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.rows[row] = entry
+        self._written_count += 1
+        return f"{self.page_array.path.name}/{row}"
+
+    @property
+    def committed_count(self) -> int:
+        return self._written_count
+
+    def verify(self, output: str, image_hash: str) -> bool:
+        row = int(output.rpartition("/")[2])
+        entry = self.rows.get(row)
+        return entry is not None \
+            and entry["sha256"] == image_hash \
+            and self.page_array.row_hash(row) == image_hash
+
+    def close(self):
+        self._file.close()
@@ -0,0 +1,32 @@
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+from .Manifest import hash_bytes
+
+
+@dataclass
+class Sample:
+    """One synthesized page, encoded and ready to be stored by a sink"""
+
+    key: str
+    "Unique name of the sample within the dataset (e.g. 'score-2')"
+
+    image: bytes
+    """The encoded image file, empty when the image has been stored
+    directly by the worker (see `NpyPageArray`)"""
+
+    image_extension: str
+    "Suffix of the image file format, including the period (e.g. '.png')"
+
+    annotations: Optional[Dict[str, Any]] = None
+    "JSON-serializable annotations of the image, if exported"
+
+    metadata: Dict[str, Any] = field(default_factory=dict)
+    "JSON-serializable information about how the sample was synthesized"
+
+    image_hash: str = ""
+    "SHA-256 hex digest of the image, computed when not given"
+
+    def __post_init__(self):
+        if not self.image_hash:
+            self.image_hash = hash_bytes(self.image)
@@ -0,0 +1,168 @@
+import multiprocessing
+import os
+from multiprocessing import shared_memory
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+
+class RingPage:
+    """A page received from the `SharedPageRing`.
+
+    The array is a view into shared memory, no data has been copied.
+    Release the page once the array is no longer needed (e.g. after it has
+    been copied into a training batch), so that producers can reuse the slot.
+    """
+
+    def __init__(
+        self,
+        ring: "SharedPageRing",
+        index: int,
+        array: np.ndarray,
+        metadata: Dict[str, Any]
+    ):
+        self.ring = ring
+        self.index = index
+        "Index of the slot holding the page"
+
+        self.array: Optional[np.ndarray] = array
+        "The page bitmap, viewed in shared memory"
+
+        self.metadata = metadata
+        "Metadata sent by the producer along with the page"
+
+    def release(self):
+        """Returns the slot to the producers, the array must not be used"""
+        if self.array is not None:
+            self.array = None
+            self.ring.release(self.index)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
+
+
+class SharedPageRing:
+    """Zero-copy transport of rendered pages between processes.
+
+    A fixed number of page slots is allocated in shared memory. A producer
+    process acquires a free slot, renders a page directly into it
+    (see the `out` argument of `BitmapRenderer.render`) and publishes it.
+    Only the slot index, the page shape and small metadata travel through
+    a queue to the consumer process, which views the page in place and
+    releases the slot when done. Producers block when all slots are taken,
+    which bounds the memory regardless of how far ahead they are.
+
+    The ring is created by the consumer and passed to producer processes
+    when they are started. The consumer must `close` it at the end, which
+    also frees the shared memory.
+    """
+
+    def __init__(
+        self,
+        slot_count: int,
+        slot_size: int,
+        context: Optional[Any] = None
+    ):
+        """
+        :param slot_count: Number of pages that can be in flight at once
+        :param slot_size: Size of one slot in bytes, must fit the largest page
+        :param context: Multiprocessing context the producers are started
+            with (the default context by default)
+        """
+        context = context or multiprocessing.get_context()
+
+        self.slot_count = slot_count
+        self.slot_size = slot_size
+
+        self.memory = shared_memory.SharedMemory(
+            create=True,
+            size=slot_count * slot_size
+        )
+        "The shared memory holding all the slots"
+
+        self._owner_pid = os.getpid()
+        self._free_slots = context.Queue()
+        self._published = context.Queue()
+        for i in range(slot_count):
+            self._free_slots.put(i)
+
+    def _check_fits(self, shape: Tuple[int, ...], dtype: Any):
+        size = int(np.prod(shape)) * np.dtype(dtype).itemsize
+        if size > self.slot_size:
+            raise ValueError(
+                f"Page of {size} bytes does not fit " +
+                f"into a slot of {self.slot_size} bytes."
+            )
+
+    def _view(
+        self,
+        index: int,
+        shape: Tuple[int, ...],
+        dtype: Any
+    ) -> np.ndarray:
+        return np.ndarray(
+            shape=shape,
+            dtype=dtype,
+            buffer=self.memory.buf,
+            offset=index * self.slot_size
+        )
+
+    # producer side
+
+    def acquire(
+        self,
+        shape: Tuple[int, ...],
+        dtype: Any = np.uint8
+    ) -> Tuple[int, np.ndarray]:
+        """Waits for a free slot, returns its index and a writable view
+        of the given shape, into which the page should be rendered"""
+        self._check_fits(shape, dtype)
+        index = self._free_slots.get()
+        return index, self._view(index, shape, dtype)
+
+    def publish(
+        self,
+        index: int,
+        array: np.ndarray,
+        metadata: Optional[Dict[str, Any]] = None
+    ):
+        """Hands the page rendered into the acquired slot to the consumer"""
+        self._published.put(
+            (index, array.shape, array.dtype.str, metadata or {})
+        )
+
+    def put_end(self):
+        """Tells the consumer that this producer has finished"""
+        self._published.put(None)
+
+    # consumer side
+
+    def get(self, timeout: Optional[float] = None) -> Optional[RingPage]:
+        """Waits for the next published page, returns None when a producer
+        signals its end (see `put_end`)"""
+        message = self._published.get(timeout=timeout)
+        if message is None:
+            return None
+        index, shape, dtype, metadata = message
+        return RingPage(self, index, self._view(index, shape, dtype), metadata)
+
+    def release(self, index: int):
+        """Returns the slot to the producers"""
+        self._free_slots.put(index)
+
+    def close(self):
+        """Detaches from the shared memory and frees it, if this is the ring
+        created by the consumer. No page arrays may be alive anymore."""
+        self.memory.close()
+        # producers (forked or spawned) attach to the memory of the consumer
+        if os.getpid() == self._owner_pid:
+            self.memory.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
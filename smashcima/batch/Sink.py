@@ -0,0 +1,38 @@
+import abc
+
+from .Sample import Sample
+
+
+class Sink(abc.ABC):
+    """Storage backend for synthesized samples"""
+
+    @abc.abstractmethod
+    def write(self, sample: Sample) -> str:
+        """Stores the sample and returns the name of its output.
+        
+        The sample may be buffered by the sink, it counts as durably stored
+        once `committed_count` reaches past it. Only then should it be
+        recorded as completed in a manifest.
+        """
+        raise NotImplementedError
+
+    @property
+    @abc.abstractmethod
+    def committed_count(self) -> int:
+        """Number of samples written so far that are durably stored"""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def verify(self, output: str, image_hash: str) -> bool:
+        """Checks that an output returned by `write` is stored completely"""
+        raise NotImplementedError
+
+    def close(self):
+        """Commits all written samples and releases resources"""
+        pass
+
+    def __enter__(self) -> "Sink":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
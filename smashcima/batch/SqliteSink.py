@@ -0,0 +1,166 @@
+import json
+import sqlite3
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .Sample import Sample
+from .Sink import Sink
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS samples (
+    id INTEGER PRIMARY KEY,
+    key TEXT NOT NULL UNIQUE,
+    image BLOB NOT NULL,
+    image_extension TEXT NOT NULL,
+    image_sha256 TEXT NOT NULL,
+    annotations TEXT,
+    metadata TEXT NOT NULL,
+    file TEXT,
+    seed INTEGER,
+    mpp_writer INTEGER,
+    mzk_background_patch TEXT
+)
+"""
+
+_INSERT = """
+INSERT OR IGNORE INTO samples (
+    key, image, image_extension, image_sha256, annotations, metadata,
+    file, seed, mpp_writer, mzk_background_patch
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+class SqliteSink(Sink):
+    """Stores samples as rows of a single local SQLite database.
+
+    Each sample becomes one row of the `samples` table with the encoded
+    image, the annotations and metadata as JSON, and the source file, seed,
+    MUSCIMA++ writer and MZK background patch broken out into their own
+    columns, so that the dataset can be filtered with plain SQL.
+
+    Rows are buffered and inserted in batches, each batch in one transaction.
+    The database runs in WAL mode, so readers can open the dataset while
+    a run is still writing into it. A sample is durable only once its batch
+    is committed, see `committed_count`.
+    """
+
+    def __init__(self, path: Path, batch_size: int = 64):
+        self.path = path
+        "Path to the database file"
+
+        self.batch_size = batch_size
+        "Number of samples inserted in one transaction"
+
+        self._pending: List[Tuple[Any, ...]] = []
+        self._written_count = 0
+        self._committed_count = 0
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(str(self.path))
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(_SCHEMA)
+        self.connection.commit()
+
+    def write(self, sample: Sample) -> str:
+        metadata = sample.metadata
+        patch = metadata.get("mzk_background_patch")
+        self._pending.append((
+            sample.key,
+            sample.image,
+            sample.image_extension,
+            sample.image_hash,
+            None if sample.annotations is None
+                else json.dumps(sample.annotations),
+            json.dumps(metadata),
+            metadata.get("file"),
+            metadata.get("seed"),
+            metadata.get("mpp_writer"),
+            None if patch is None else patch.get("mzk_uuid")
+        ))
+        self._written_count += 1
+
+        if len(self._pending) >= self.batch_size:
+            self.commit()
+
+        return sample.key
+
+    def commit(self):
+        """Inserts all buffered samples in one transaction"""
+        if len(self._pending) > 0:
+            # a resumed run may re-synthesize a sample that has been stored
+            # but not recorded in the manifest, the stored one is kept
+            with self.connection:
+                self.connection.executemany(_INSERT, self._pending)
+            self._pending = []
+        self._committed_count = self._written_count
+
+    @property
+    def committed_count(self) -> int:
+        return self._committed_count
+
+    def verify(self, output: str, image_hash: str) -> bool:
+        row = self.connection.execute(
+            "SELECT image_sha256 FROM samples WHERE key = ?", (output,)
+        ).fetchone()
+        return row is not None and row[0] == image_hash
+
+    def close(self):
+        self.commit()
+        self.connection.close()
+
+
+class SqliteDataset:
+    """Random-access reader of a database written by the `SqliteSink`"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.connection = sqlite3.connect(str(path))
+        self._ids: List[int] = [
+            row[0] for row in self.connection.execute(
+                "SELECT id FROM samples ORDER BY id"
+            )
+        ]
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __getitem__(self, index: int) -> Sample:
+        return self._read("id = ?", self._ids[index])
+
+    def __iter__(self) -> Iterator[Sample]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def get(self, key: str) -> Optional[Sample]:
+        """Returns the sample with the given key, if stored"""
+        try:
+            return self._read("key = ?", key)
+        except KeyError:
+            return None
+
+    def _read(self, condition: str, value: Any) -> Sample:
+        row = self.connection.execute(
+            "SELECT key, image, image_extension, annotations, metadata "
+            "FROM samples WHERE " + condition, (value,)
+        ).fetchone()
+        if row is None:
+            raise KeyError(value)
+        key, image, image_extension, annotations, metadata = row
+        annotations: Optional[Dict[str, Any]] = None \
+            if annotations is None else json.loads(annotations)
+        return Sample(
+            key=key,
+            image=image,
+            image_extension=image_extension,
+            annotations=annotations,
+            metadata=json.loads(metadata)
+        )
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
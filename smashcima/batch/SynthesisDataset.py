@@ -0,0 +1,142 @@
+import os
+import sys
+from pathlib import Path
+from typing import (Any, Callable, Dict, Iterator, List, Optional, Sequence,
+                    Tuple, Union)
+
+import numpy as np
+
+from smashcima.derive_seed import derive_seed
+from smashcima.exporting.AnnotationsExporter import AnnotationsExporter
+from smashcima.orchestration.BaseHandwrittenModel import BaseHandwrittenModel
+from smashcima.orchestration.Model import Model
+
+
+def _register_with_torch():
+    """Makes the dataset a virtual subclass of the torch `IterableDataset`,
+    so that the torch `DataLoader` iterates it. Torch is never imported here,
+    it is used only if the training code has already imported it."""
+    torch = sys.modules.get("torch")
+    if torch is None:
+        return
+    iterable_dataset = torch.utils.data.IterableDataset
+    if not issubclass(SynthesisDataset, iterable_dataset):
+        iterable_dataset.register(SynthesisDataset)
+
+
+def _loader_worker() -> Tuple[int, int]:
+    """Returns the id of the current data-loader worker process
+    and the number of these workers"""
+    torch = sys.modules.get("torch")
+    if torch is not None:
+        info = torch.utils.data.get_worker_info()
+        if info is not None:
+            return info.id, info.num_workers
+    return 0, 1
+
+
+class SynthesisDataset:
+    """Iterable dataset that synthesizes pages on the fly.
+
+    Iterating the dataset yields `(image, annotations)` pairs, one for each
+    synthesized page, where the image is the BGRA bitmap of the page and
+    the annotations are those of the `AnnotationsExporter`.
+
+    The dataset does not depend on any deep-learning framework. It is
+    an ordinary Python iterable and when torch has been imported (before
+    the dataset is created), it also counts as a torch `IterableDataset`.
+    When iterated within data-loader workers, each worker gets its own
+    part of the inputs and builds its own model on first use. Inputs can
+    be further split among machines by the `shard_index` and `num_shards`.
+
+    Every epoch synthesizes new variants of the inputs. The samples depend
+    only on the seed, the epoch and the path of the input relative to
+    the dataset root, not on the number of workers or machines.
+    """
+
+    def __init__(
+        self,
+        inputs: Sequence[Union[Path, str]],
+        seed: int = 0,
+        model_factory: Callable[[], Model] = BaseHandwrittenModel,
+        num_shards: int = 1,
+        shard_index: int = 0,
+        root: Union[Path, str, None] = None
+    ):
+        """
+        :param root: The folder the sample keys (which seed the samples)
+            are relative to, the common folder of the inputs by default
+        """
+        self.inputs: List[Union[Path, str]] = list(inputs)
+        "Paths to the scores to synthesize"
+
+        if root is None and len(self.inputs) > 0:
+            root = os.path.commonpath([
+                os.path.dirname(os.path.abspath(i)) for i in self.inputs
+            ])
+        self.keys: List[str] = [
+            Path(os.path.relpath(os.path.abspath(i), root or ".")).as_posix()
+            for i in self.inputs
+        ]
+        """Keys of the inputs, their paths relative to the dataset root,
+        so that files of the same name in different folders get
+        different seeds"""
+
+        self.seed = seed
+        "The seed from which the seeds of all samples are derived"
+
+        self.model_factory = model_factory
+        "Builds the model (e.g. the model class), called once in each worker"
+
+        self.num_shards = num_shards
+        "Number of machines the inputs are split among"
+
+        self.shard_index = shard_index
+        "Which part of the inputs belongs to this machine"
+
+        self.epoch = 0
+        "The current epoch, see `set_epoch`"
+
+        self._model: Optional[Model] = None
+
+        _register_with_torch()
+
+    def set_epoch(self, epoch: int):
+        """Sets the epoch, so that the next iteration synthesizes new
+        variants of the inputs. Call this before each epoch."""
+        self.epoch = epoch
+
+    @property
+    def model(self) -> Model:
+        """The model of the current worker, built on first use"""
+        if self._model is None:
+            self._model = self.model_factory()
+        return self._model
+
+    def _worker_slice(self) -> slice:
+        worker_id, num_workers = _loader_worker()
+        count = self.num_shards * num_workers
+        index = self.shard_index * num_workers + worker_id
+        return slice(index, None, count)
+
+    def worker_inputs(self) -> List[Union[Path, str]]:
+        """Returns the inputs to be synthesized by the current worker"""
+        return self.inputs[self._worker_slice()]
+
+    def __iter__(self) -> Iterator[Tuple[np.ndarray, Dict[str, Any]]]:
+        seed = derive_seed(self.seed, f"epoch-{self.epoch}")
+        for _, scene in self.model.stream(
+            self.worker_inputs(),
+            seeds=seed,
+            keys=self.keys[self._worker_slice()]
+        ):
+            exporter = AnnotationsExporter(dpi=scene.renderer.dpi)
+            for page in scene.pages:
+                yield scene.render(page), exporter.export(page.view_box)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # the dataset is sent to worker processes before iteration,
+        # each worker builds its own model
+        state = self.__dict__.copy()
+        state["_model"] = None
+        return state
@@ -0,0 +1,222 @@
+import io
+import json
+import os
+import tarfile
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, List, Optional, Tuple
+
+from .Sample import Sample
+from .Sink import Sink
+
+_BLOCK_SIZE = tarfile.BLOCKSIZE
+_END_OF_ARCHIVE = b"\0" * (2 * _BLOCK_SIZE)
+
+
+class TarShardSink(Sink):
+    """Streams samples into a sequence of fixed-size tar shards.
+
+    The layout follows the WebDataset convention: all files of a sample
+    share the sample key as their name and differ in the suffix
+    (`key.png`, `key.json` with annotations, `key.meta.json` with metadata).
+    Shards are written one after another and a new shard is started once
+    the current one reaches the size limit.
+
+    Every stored sample is appended to the index (`index.jsonl` unless
+    named otherwise, e.g. per input shard), which records
+    the shard, byte range and image hash of the sample. The index is written
+    only after the sample has been flushed into its shard. When a pre-empted
+    run is resumed, the last shard is truncated to the end of its last
+    indexed sample (dropping any half-written sample) and appending
+    continues from there.
+    """
+
+    INDEX_FILE = "index.jsonl"
+
+    def __init__(
+        self,
+        folder: Path,
+        shard_size: int = 2 ** 30,
+        prefix: str = "shard",
+        index_name: str = INDEX_FILE
+    ):
+        self.folder = folder
+        "The folder with the shards and the index"
+
+        self.shard_size = shard_size
+        "Size in bytes after which a new shard is started"
+
+        self.prefix = prefix
+        "Shard file name prefix, shards are named 'prefix-000000.tar'"
+
+        self.index_name = index_name
+        """File name of the index, sinks sharing the folder must use
+        different prefixes and index names"""
+
+        self.index: Dict[str, Dict[str, Any]] = {}
+        "Index entries of stored samples by their key"
+
+        self._written_count = 0
+        self._shard_number = 0
+        self._shard_file: Optional[BinaryIO] = None
+        self._index_file: Optional[BinaryIO] = None
+
+        self.folder.mkdir(parents=True, exist_ok=True)
+        self._resume()
+        self._index_file = open(self.index_path, "ab")
+
+    @property
+    def index_path(self) -> Path:
+        return self.folder / self.index_name
+
+    def _shard_name(self, number: int) -> str:
+        return f"{self.prefix}-{number:06d}.tar"
+
+    def _resume(self):
+        """Loads the index and reopens the last shard for appending"""
+        if not self.index_path.exists():
+            return
+
+        last_entry: Optional[Dict[str, Any]] = None
+        valid_length = 0
+        with open(self.index_path, "rb") as file:
+            for line in file:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    break # half-written line, the sample is dropped
+                self.index[entry["key"]] = entry
+                last_entry = entry
+                valid_length += len(line)
+
+        # drop the half-written index line
+        with open(self.index_path, "r+b") as file:
+            file.truncate(valid_length)
+
+        if last_entry is None:
+            return
+
+        # continue appending to the last shard after its last complete sample
+        self._shard_number = last_entry["shard_number"]
+        shard_path = self.folder / self._shard_name(self._shard_number)
+        self._shard_file = open(shard_path, "r+b")
+        self._shard_file.truncate(last_entry["end"])
+        self._shard_file.seek(last_entry["end"])
+
+        if last_entry["end"] >= self.shard_size:
+            self._finish_shard()
+
+    def _finish_shard(self):
+        assert self._shard_file is not None
+        self._shard_file.write(_END_OF_ARCHIVE)
+        self._shard_file.close()
+        self._shard_file = None
+        self._shard_number += 1
+
+    def _add_member(self, name: str, data: bytes):
+        assert self._shard_file is not None
+        info = tarfile.TarInfo(name)
+        info.size = len(data)
+        info.mode = 0o644
+        self._shard_file.write(info.tobuf(
+            format=tarfile.PAX_FORMAT,
+            encoding="utf-8",
+            errors="surrogateescape"
+        ))
+        self._shard_file.write(data)
+        self._shard_file.write(b"\0" * (-len(data) % _BLOCK_SIZE))
+
+    def write(self, sample: Sample) -> str:
+        # the key must not contain periods, WebDataset splits names on them
+        key = sample.key.replace(".", "_")
+
+        # a resumed run may re-synthesize a sample that has been stored
+        # but not recorded in the manifest, keep the stored one
+        if key in self.index:
+            self._written_count += 1
+            entry = self.index[key]
+            return self._shard_name(entry["shard_number"]) + "/" + key
+
+        output = self._shard_name(self._shard_number) + "/" + key
+        if self._shard_file is None:
+            self._shard_file = open(
+                self.folder / self._shard_name(self._shard_number), "wb"
+            )
+
+        members: List[Tuple[str, bytes]] = [
+            (key + sample.image_extension, sample.image)
+        ]
+        if sample.annotations is not None:
+            members.append((
+                key + ".json",
+                json.dumps(sample.annotations).encode("utf-8")
+            ))
+        members.append((
+            key + ".meta.json",
+            json.dumps(sample.metadata).encode("utf-8")
+        ))
+
+        start = self._shard_file.tell()
+        for name, data in members:
+            self._add_member(name, data)
+        end = self._shard_file.tell()
+        self._shard_file.flush()
+        os.fsync(self._shard_file.fileno())
+
+        entry = {
+            "key": key,
+            "shard": self._shard_name(self._shard_number),
+            "shard_number": self._shard_number,
+            "start": start,
+            "end": end,
+            "files": [name for name, _ in members],
+            "sha256": sample.image_hash
+        }
+        assert self._index_file is not None
+        self._index_file.write((json.dumps(entry) + "\n").encode("utf-8"))
+        self._index_file.flush()
+        os.fsync(self._index_file.fileno())
+        self.index[key] = entry
+        self._written_count += 1
+
+        if end >= self.shard_size:
+            self._finish_shard()
+
+        return output
+
+    @property
+    def committed_count(self) -> int:
+        # samples are flushed into the shard and indexed before returning
+        return self._written_count
+
+    def verify(self, output: str, image_hash: str) -> bool:
+        shard, _, key = output.partition("/")
+        entry = self.index.get(key)
+        return entry is not None \
+            and entry["shard"] == shard \
+            and entry["sha256"] == image_hash \
+            and (self.folder / shard).exists()
+
+    def close(self):
+        if self._shard_file is not None:
+            self._finish_shard()
+        if self._index_file is not None:
+            self._index_file.close()
+            self._index_file = None
+
+
+def read_tar_shard_sample(
+    folder: Path,
+    entry: Dict[str, Any]
+) -> Dict[str, bytes]:
+    """Reads the files of one sample from its shard given its index entry,
+    returns file contents by file name"""
+    with open(folder / entry["shard"], "rb") as file:
+        file.seek(entry["start"])
+        data = file.read(entry["end"] - entry["start"])
+    files: Dict[str, bytes] = {}
+    with tarfile.open(fileobj=io.BytesIO(data), mode="r:") as archive:
+        for member in archive.getmembers():
+            extracted = archive.extractfile(member)
+            assert extracted is not None
+            files[member.name] = extracted.read()
+    return files
@@ -0,0 +1,12 @@
+from .BackgroundWriter import BackgroundWriter
+from .FolderSink import FolderSink, write_atomically
+from .ImageEncoder import ImageEncoder
+from .Manifest import Manifest, ManifestRecord, hash_bytes, hash_file
+from .NpyPageArray import NpyPageArray, PageFit
+from .NpyPageSink import NpyPageSink
+from .Sample import Sample
+from .SharedPageRing import RingPage, SharedPageRing
+from .Sink import Sink
+from .SqliteSink import SqliteDataset, SqliteSink
+from .SynthesisDataset import SynthesisDataset
+from .TarShardSink import TarShardSink, read_tar_shard_sample
@@ -0,0 +1,12 @@
+import hashlib
+
+
+def derive_seed(seed: int, *names: str) -> int:
+    """Derives an independent 64-bit seed from a seed and a sequence of names.
+
+    The derivation is stable across processes, machines and Python versions
+    (unlike the built-in `hash` of strings), so that a seed derived for
+    a sample can be recomputed anywhere from the same inputs.
+    """
+    key = ":".join([str(seed), *names]).encode("utf-8")
+    return int.from_bytes(hashlib.sha256(key).digest()[:8], "little")
@@ -0,0 +1,98 @@
+from math import ceil
+from typing import Any, Dict, List
+
+from smashcima.geometry import Transform, mm_to_px
+from smashcima.scene import (AffineSpace, AffineSpaceVisitor, LabeledRegion,
+                             SceneObject, ViewBox)
+
+
+class AnnotationsExporter:
+    """Exports labeled regions visible in a view box as JSON-serializable
+    bounding box annotations, in the pixel space of the rendered bitmap"""
+    def __init__(self, dpi: float = 300):
+        self.dpi = float(dpi)
+        """DPI at which the view box is rasterized, must match the renderer"""
+
+    def export(self, view_box: ViewBox) -> Dict[str, Any]:
+        # converts from scene millimeter coordinate system
+        # to the bitmap pixel coordinate system
+        scene_to_bitmap_transform = (
+            Transform.translate(-view_box.rectangle.top_left_corner.vector)
+                .then(Transform.scale(mm_to_px(1, dpi=self.dpi)))
+        )
+
+        # only the subtree of the view box space (e.g. a page) is visited
+        space_to_bitmap_transform = (
+            view_box.space.get_root().transform_from(view_box.space)
+                .then(scene_to_bitmap_transform)
+        )
+
+        width = ceil(mm_to_px(view_box.rectangle.width, dpi=self.dpi))
+        height = ceil(mm_to_px(view_box.rectangle.height, dpi=self.dpi))
+
+        visitor = AnnotationsVisitor(
+            space=view_box.space,
+            transform_to_bitmap=space_to_bitmap_transform,
+            bitmap_width=width,
+            bitmap_height=height
+        )
+        visitor.run()
+
+        return {
+            "width": width,
+            "height": height,
+            "dpi": self.dpi,
+            "regions": visitor.regions
+        }
+
+
+class AnnotationsVisitor(AffineSpaceVisitor):
+    """Collects labeled regions with their bounding boxes in bitmap space"""
+
+    def __init__(
+        self,
+        space: AffineSpace,
+        transform_to_bitmap: Transform,
+        bitmap_width: int,
+        bitmap_height: int,
+        regions: List[Dict[str, Any]] = None
+    ):
+        super().__init__(space)
+
+        self.transform_to_bitmap = transform_to_bitmap
+        self.bitmap_width = bitmap_width
+        self.bitmap_height = bitmap_height
+        self.regions = regions if regions is not None else []
+
+    def create_sub_visitor(self, sub_space: AffineSpace) -> "AnnotationsVisitor":
+        return AnnotationsVisitor(
+            space=sub_space,
+            transform_to_bitmap=sub_space.transform.then(
+                self.transform_to_bitmap
+            ),
+            bitmap_width=self.bitmap_width,
+            bitmap_height=self.bitmap_height,
+            regions=self.regions
+        )
+
+    def accept_sub_visitor(self, sub_visitor: "AnnotationsVisitor"):
+        pass # regions are collected into the shared list
+
+    def visit_scene_object(self, obj: SceneObject):
+        if not isinstance(obj, LabeledRegion):
+            return
+        if sum(len(p.points) for p in obj.contours.polygons) == 0:
+            return
+        
+        bbox = self.transform_to_bitmap.apply_to(obj.contours).bbox()
+
+        # skip regions outside of the bitmap (e.g. on other pages)
+        if bbox.right < 0 or bbox.bottom < 0 \
+                or bbox.left > self.bitmap_width \
+                or bbox.top > self.bitmap_height:
+            return
+
+        self.regions.append({
+            "label": obj.label,
+            "bbox": [bbox.x, bbox.y, bbox.width, bbox.height]
+        })
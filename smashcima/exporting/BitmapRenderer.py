@@ -1,11 +1,14 @@
-from math import ceil
-from typing import Tuple
+import copy
+from math import ceil, floor, sqrt
+from typing import List, Optional, Tuple
 
 import cv2
 import numpy as np
 
 from smashcima.geometry import Quad, Rectangle, Transform, mm_to_px
-from smashcima.scene import Sprite, ViewBox
+from smashcima.scene import Sprite, SpriteIndex, ViewBox
+
+from .PremultipliedCache import PremultipliedCache
 
 # Alpha compositing via the "over" operator + alpha premultiplication:
 # https://en.wikipedia.org/wiki/Alpha_compositing
@@ -46,12 +49,299 @@ def _float32_to_uint8(img: np.ndarray) -> np.ndarray:
     return img
 
 
+_PRESHRINK_BELOW_SCALE = 0.5
+"""Sprites drawn at less than this scale are shrunk before being warped"""
+
+
+def _preshrink_size(bitmap: np.ndarray, scale: float) -> Tuple[int, int]:
+    """Width and height of the bitmap shrunk to about the scale
+    it is drawn at"""
+    height, width = bitmap.shape[:2]
+    return (max(1, round(width * scale)), max(1, round(height * scale)))
+
+
+def _preshrink(
+    bitmap: np.ndarray,
+    size: Tuple[int, int]
+) -> Tuple[np.ndarray, Transform]:
+    """Shrinks the bitmap by area averaging to the given size
+    and returns the transform from the shrunk to the original pixels"""
+    shrunk = cv2.resize(bitmap, size, interpolation=cv2.INTER_AREA)
+    return shrunk, _preshrink_transform(bitmap, size)
+
+
+def _preshrink_transform(
+    bitmap: np.ndarray,
+    size: Tuple[int, int]
+) -> Transform:
+    # maps shrunk pixel centers onto the original pixel centers
+    height, width = bitmap.shape[:2]
+    fx = width / size[0]
+    fy = height / size[1]
+    return Transform(np.array([
+        [fx, 0, 0.5 * (fx - 1)],
+        [0, fy, 0.5 * (fy - 1)]
+    ], dtype=np.float64))
+
+
+_UNIT_SCALE_TOLERANCE = 1e-6
+"""Sprites whose transform to the canvas differs from a translation
+by less than this are blitted instead of warped"""
+
+_INTEGER_SHIFT_TOLERANCE = 1e-3
+"""Translations closer than this to whole pixels are blitted
+without interpolation (in pixels)"""
+
+
+def _translation_of(transform: Transform) -> Optional[Tuple[float, float]]:
+    """Returns the translation of the transform, when it is
+    all the transform does (at unit scale, without any rotation)"""
+    m = transform.matrix
+    if abs(m[0, 0] - 1) > _UNIT_SCALE_TOLERANCE \
+            or abs(m[1, 1] - 1) > _UNIT_SCALE_TOLERANCE \
+            or abs(m[0, 1]) > _UNIT_SCALE_TOLERANCE \
+            or abs(m[1, 0]) > _UNIT_SCALE_TOLERANCE:
+        return None
+    return (float(m[0, 2]), float(m[1, 2]))
+
+
+class _SpriteDraw:
+    """One sprite to be composited onto the canvas, tile by tile"""
+
+    def __init__(
+        self,
+        sprite: Sprite,
+        to_canvas_transform: Transform,
+        canvas_window: Rectangle,
+        cache: PremultipliedCache,
+        subpixel_blit: bool = True
+    ):
+        self.sprite = sprite
+        self.to_canvas_transform = to_canvas_transform
+        self.canvas_window = canvas_window
+        "The part of the canvas the sprite paints over (integer pixels)"
+
+        self.cache = cache
+        "Cache of the premultiplied float32 bitmaps"
+
+        self.translation = _translation_of(to_canvas_transform)
+        """Translation of the sprite pixels onto the canvas, when it is
+        all the transform does (e.g. unrotated sprites drawn at the DPI
+        of their bitmap), None otherwise"""
+
+        self.subpixel_blit = subpixel_blit
+        """Whether translations by fractions of a pixel are blitted
+        with a bilinear shift, instead of being warped"""
+
+        self._shrunk: Optional[Tuple[np.ndarray, Transform]] = None
+
+    def composite(self, canvas: np.ndarray, tile: Rectangle, window: Rectangle):
+        """Composites the sprite over the canvas of a tile
+        within the given window (both in the canvas pixel space)"""
+        if self.translation is not None:
+            tx, ty = self.translation
+            ix, iy = round(tx), round(ty)
+            if abs(tx - ix) <= _INTEGER_SHIFT_TOLERANCE \
+                    and abs(ty - iy) <= _INTEGER_SHIFT_TOLERANCE:
+                self._blit(canvas, tile, window, ix, iy)
+                return
+            if self.subpixel_blit:
+                self._shift_blit(canvas, tile, window, tx, ty)
+                return
+
+        _premultiplied_float32_alpha_overlay_in_window(
+            canvas,
+            Rectangle(
+                window.x - tile.x,
+                window.y - tile.y,
+                window.width,
+                window.height
+            ),
+            self.warp(window)
+        )
+
+    def _premultiplied_pixels(self, source: Rectangle) -> np.ndarray:
+        """Returns the premultiplied float32 pixels of the bitmap
+        in the given integer rectangle (within the bitmap)"""
+        rows = slice(int(source.top), int(source.bottom))
+        columns = slice(int(source.left), int(source.right))
+        cached = self.cache.get(self.sprite.bitmap)
+        if cached is not None:
+            return cached[rows, columns]
+        return _uint8_to_float32(cv2.cvtColor(
+            self.sprite.bitmap[rows, columns],
+            cv2.COLOR_RGBA2mRGBA
+        ))
+
+    def _blit(
+        self,
+        canvas: np.ndarray,
+        tile: Rectangle,
+        window: Rectangle,
+        ix: int,
+        iy: int
+    ):
+        """Composites the bitmap shifted by whole pixels straight
+        from its pixels, without any intermediate layer"""
+        source = Rectangle(
+            window.x - ix, window.y - iy, window.width, window.height
+        ).intersect_with(self.sprite.pixels_bbox)
+        if source.has_no_area:
+            return
+        top = int(source.top) + iy - int(tile.top)
+        left = int(source.left) + ix - int(tile.left)
+        _premultiplied_float32_alpha_overlay(
+            canvas[
+                top:top + int(source.height),
+                left:left + int(source.width)
+            ],
+            self._premultiplied_pixels(source)
+        )
+
+    def _shift_blit(
+        self,
+        canvas: np.ndarray,
+        tile: Rectangle,
+        window: Rectangle,
+        tx: float,
+        ty: float
+    ):
+        """Composites the bitmap shifted by fractions of a pixel,
+        interpolated bilinearly (as warping would do)"""
+        ix, iy = floor(tx), floor(ty)
+        fx, fy = tx - ix, ty - iy
+
+        # canvas pixel x samples the bitmap between the pixels
+        # x - ix - 1 (weighted fx) and x - ix (weighted 1 - fx),
+        # the bitmap is padded with transparent pixels
+        width, height = int(window.width), int(window.height)
+        padded = np.zeros((height + 1, width + 1, 4), dtype=np.float32)
+        padded_rectangle = Rectangle(
+            window.x - ix - 1, window.y - iy - 1, width + 1, height + 1
+        )
+        source = padded_rectangle.intersect_with(self.sprite.pixels_bbox)
+        if source.has_no_area:
+            return
+        top = int(source.top - padded_rectangle.top)
+        left = int(source.left - padded_rectangle.left)
+        padded[
+            top:top + int(source.height),
+            left:left + int(source.width)
+        ] = self._premultiplied_pixels(source)
+
+        shifted = cv2.addWeighted(
+            padded[:, :-1], fx, padded[:, 1:], 1 - fx, 0
+        )
+        shifted = cv2.addWeighted(
+            shifted[:-1], fy, shifted[1:], 1 - fy, 0
+        )
+        _premultiplied_float32_alpha_overlay_in_window(
+            canvas,
+            Rectangle(
+                window.x - tile.x,
+                window.y - tile.y,
+                window.width,
+                window.height
+            ),
+            shifted
+        )
+
+    def _source(self) -> Tuple[np.ndarray, Transform, bool]:
+        """Returns the bitmap to warp, the transform from its pixels
+        to the canvas and whether it has been premultiplied already
+        (float32 bitmaps are premultiplied and converted already)"""
+        bitmap = self.sprite.bitmap
+        scale = sqrt(abs(self.to_canvas_transform.determinant))
+        if scale >= _PRESHRINK_BELOW_SCALE:
+            cached = self.cache.get(bitmap)
+            if cached is not None:
+                return cached, self.to_canvas_transform, True
+            return bitmap, self.to_canvas_transform, False
+
+        # sprites drawn much smaller than their resolution (e.g. at
+        # a preview DPI) are shrunk first, so that the float conversion
+        # and the warp process only the pixels that are actually drawn,
+        # the shrunk bitmap is shared by all the tiles
+        size = _preshrink_size(bitmap, scale)
+        cached = self.cache.get(bitmap, size)
+        if cached is not None:
+            shrunk = cached
+            to_original = _preshrink_transform(bitmap, size)
+        else:
+            if self._shrunk is None:
+                premultiplied = cv2.cvtColor(bitmap, cv2.COLOR_RGBA2mRGBA)
+                self._shrunk = _preshrink(premultiplied, size)
+            shrunk, to_original = self._shrunk
+        return shrunk, to_original.then(self.to_canvas_transform), True
+
+    def warp(self, window: Rectangle) -> np.ndarray:
+        """Returns the premultiplied float layer of the sprite within
+        the given window of the canvas"""
+        bitmap, to_canvas_transform, premultiplied = self._source()
+        to_window_transform = to_canvas_transform.then(
+            Transform.translate(-window.top_left_corner.vector)
+        )
+
+        # only the part of the bitmap that lands in the window is warped
+        # (and converted into float), grown by 2 pixels to keep
+        # the interpolation exact
+        source_height, source_width = bitmap.shape[:2]
+        source = (
+            to_window_transform.inverse().apply_to(
+                Quad.from_rectangle(
+                    Rectangle(0, 0, window.width, window.height)
+                )
+            )
+            .bbox()
+            .dilate(2.0)
+            .snap_grow()
+            .intersect_with(Rectangle(0, 0, source_width, source_height))
+        )
+        if source.has_no_area:
+            return np.zeros(
+                shape=(int(window.height), int(window.width), 4),
+                dtype=np.float32
+            )
+        crop = bitmap[
+            int(source.top):int(source.bottom),
+            int(source.left):int(source.right)
+        ]
+        if not premultiplied:
+            crop = cv2.cvtColor(crop, cv2.COLOR_RGBA2mRGBA)
+        if crop.dtype != np.float32:
+            crop = _uint8_to_float32(crop)
+        crop_to_window_transform = Transform.translate(
+            source.top_left_corner.vector
+        ).then(to_window_transform)
+
+        return cv2.warpAffine(
+            src=crop,
+            M=crop_to_window_transform.matrix,
+            dsize=(int(window.width), int(window.height)),
+            flags=(
+                cv2.INTER_AREA # used for downscaling
+                if crop_to_window_transform.determinant < 1.0
+                else cv2.INTER_LINEAR # used for upscaling
+            ),
+            borderMode=cv2.BORDER_CONSTANT
+        )
+
+
 class BitmapRenderer:
-    """Renders a scene into a bitmap RGBA opencv representation"""
+    """Renders a scene into a bitmap RGBA opencv representation.
+
+    The canvas is composited tile by tile. Only the sprites overlapping
+    a tile are drawn into it and only in the float precision of one tile,
+    which is then written into the uint8 output. This keeps the memory
+    needed for rendering large pages at little more than the output itself.
+    """
     def __init__(
         self,
         dpi: float = 300,
-        background_color = (0, 0, 0, 0)
+        background_color = (0, 0, 0, 0),
+        tile_size: int = 512,
+        bitmap_cache: Optional[PremultipliedCache] = None,
+        subpixel_blit: bool = True
     ):
         self.dpi = float(dpi)
         """DPI at which the scene should be rasterized"""
@@ -60,27 +350,73 @@ class BitmapRenderer:
         """Color to use for the blank canvas, transparent by default
         (BGRA uint8 format)"""
 
-    def render(self, view_box: ViewBox) -> np.ndarray:
-        # bounding box of the canvas in pixel space
-        canvas_px_bbox = Rectangle(
-            x=0,
-            y=0,
-            width=ceil(mm_to_px(view_box.rectangle.width, dpi=self.dpi)),
-            height=ceil(mm_to_px(view_box.rectangle.height, dpi=self.dpi)),
-        )
+        self.tile_size = tile_size
+        """Width and height of the tiles composited one by one, in pixels"""
 
-        # the canvas pixel array in alpha premultiplied float32 format
-        canvas = np.zeros(
-            shape=(int(canvas_px_bbox.height), int(canvas_px_bbox.width), 4),
-            dtype=np.float32
+        self.bitmap_cache = bitmap_cache
+        """Keeps the premultiplied float32 sprite bitmaps across renders,
+        the shared cache (`PremultipliedCache.default()`) when None"""
+
+        self.subpixel_blit = subpixel_blit
+        """Sprites that are only translated onto the canvas (most glyphs
+        drawn at the DPI of their bitmaps) are blitted instead of warped.
+        When enabled, also those shifted by fractions of a pixel are,
+        with a bilinear shift, otherwise only those shifted by whole
+        pixels are"""
+
+    def at_dpi(self, dpi: float) -> "BitmapRenderer":
+        """Returns the same renderer, rasterizing at a different DPI
+        (e.g. a low DPI for quick previews)"""
+        renderer = copy.copy(self)
+        renderer.dpi = float(dpi)
+        return renderer
+
+    def bitmap_shape(self, view_box: ViewBox) -> Tuple[int, int, int]:
+        """Shape of the bitmap that the view box renders into"""
+        return (
+            ceil(mm_to_px(view_box.rectangle.height, dpi=self.dpi)),
+            ceil(mm_to_px(view_box.rectangle.width, dpi=self.dpi)),
+            4
         )
 
-        # fill with background color
+    def render(
+        self,
+        view_box: ViewBox,
+        out: Optional[np.ndarray] = None,
+        sprite_index: Optional[SpriteIndex] = None
+    ) -> np.ndarray:
+        """Renders the view box into a BGRA uint8 bitmap.
+
+        Only the sprites within the space of the view box are rendered,
+        so rendering a page does not visit the sprites of the other pages.
+
+        :param view_box: The part of the scene to render
+        :param out: Array to render into instead of allocating a new one
+            (e.g. a slot in shared memory), must be uint8 and have the shape
+            given by `bitmap_shape`
+        :param sprite_index: Index of the view box space, only the sprites
+            it finds in the view box rectangle are drawn (e.g. for crops
+            of a page), the space is traversed when not given
+        """
+        height, width, _ = self.bitmap_shape(view_box)
+        if out is not None:
+            assert out.shape == (height, width, 4) and out.dtype == np.uint8, \
+                "The output array must match the bitmap shape and be uint8"
+        else:
+            out = np.empty(shape=(height, width, 4), dtype=np.uint8)
+
+        # bounding box of the canvas in pixel space
+        canvas_px_bbox = Rectangle(x=0, y=0, width=width, height=height)
+
+        bitmap_cache = self.bitmap_cache
+        if bitmap_cache is None:
+            bitmap_cache = PremultipliedCache.default()
+
+        # background color in alpha premultiplied float32 format
         background_color_premultiplied = _uint8_to_float32(cv2.cvtColor(
             np.array([[self.background_color]], dtype=np.uint8),
             cv2.COLOR_RGBA2mRGBA
         ))
-        canvas[:, :] = background_color_premultiplied
 
         # converts from scene millimeter coordinate system
         # to the canvas pixel coordinate system
@@ -89,16 +425,42 @@ class BitmapRenderer:
                 .then(Transform.scale(mm_to_px(1, dpi=self.dpi)))
         )
 
-        # root scene space
-        root_space = view_box.space.get_root()
+        # sprites with the transforms from their pixels to the scene space
+        sprites: List[Tuple[Sprite, Transform]]
+        if sprite_index is not None:
+            assert sprite_index.space is view_box.space, \
+                "The sprite index must be built over the view box space"
+            sprites = [
+                (entry.sprite, entry.transform)
+                for entry in sprite_index.query(view_box.rectangle)
+            ]
+        else:
+            # only the subtree of the view box space is traversed (e.g.
+            # a single page of the scene), the sprites of the other pages
+            # are never visited, the subtree is mapped into the scene
+            # coordinates in which the view box rectangle is placed
+            space_to_scene_transform = \
+                view_box.space.get_root().transform_from(view_box.space)
+            sprites = [
+                (sprite, sprite_transform.then(space_to_scene_transform))
+                for sprite, sprite_transform in Sprite.traverse_sprites(
+                    view_box.space,
+                    include_pixels_transform=True,
+                    include_sprite_transform=True,
+                    include_root_space_transform=False
+                )
+            ]
+
+        # the sprites drawn in each tile, in the rendering order
+        tile_size = self.tile_size
+        tiles_x = max(1, ceil(width / tile_size))
+        tiles_y = max(1, ceil(height / tile_size))
+        tile_draws: List[List[_SpriteDraw]] = [
+            [] for _ in range(tiles_x * tiles_y)
+        ]
 
-        # go through all the sprites in the scene
-        for (sprite, sprite_transform) in Sprite.traverse_sprites(
-            root_space,
-            include_pixels_transform=True,
-            include_sprite_transform=True,
-            include_root_space_transform=False
-        ):
+        # go through all the sprites in the view box space
+        for (sprite, sprite_transform) in sprites:
             # build up a transform that converts from sprite's local pixel space
             # to canvas global pixel space, while going through the scene space
             to_canvas_transform = (
@@ -118,40 +480,63 @@ class BitmapRenderer:
                 .snap_grow() # round to integer by growing
                 .intersect_with(canvas_px_bbox) # clamp inside of canvas
             )
-            to_window_transform = to_canvas_transform.then(
-                Transform.translate(-canvas_window.top_left_corner.vector)
-            )
 
             # viewport culling:
             # do not render sprites that have no overlap with the canvas
             if canvas_window.has_no_area:
                 continue
 
-            # prepare the sprite bitmap into mRGBA float
-            sprite_bitmap = sprite.bitmap
-            sprite_bitmap = cv2.cvtColor(sprite_bitmap, cv2.COLOR_RGBA2mRGBA)
-            sprite_bitmap = _uint8_to_float32(sprite_bitmap)
-
-            # get the transformed bitmap of the sprite
-            new_layer = cv2.warpAffine(
-                src=sprite_bitmap,
-                M=to_window_transform.matrix,
-                dsize=(int(canvas_window.width), int(canvas_window.height)),
-                flags=(
-                    cv2.INTER_AREA # used for downscaling
-                    if to_window_transform.determinant < 1.0
-                    else cv2.INTER_LINEAR # used for upscaling
-                ),
-                borderMode=cv2.BORDER_CONSTANT
+            draw = _SpriteDraw(
+                sprite,
+                to_canvas_transform,
+                canvas_window,
+                bitmap_cache,
+                subpixel_blit=self.subpixel_blit
             )
+            for ty in range(
+                int(canvas_window.top) // tile_size,
+                (int(canvas_window.bottom) - 1) // tile_size + 1
+            ):
+                for tx in range(
+                    int(canvas_window.left) // tile_size,
+                    (int(canvas_window.right) - 1) // tile_size + 1
+                ):
+                    tile_draws[ty * tiles_x + tx].append(draw)
 
-            # composit the next layer over the canvas in the window
-            _premultiplied_float32_alpha_overlay_in_window(
-                canvas, canvas_window, new_layer
-            )
+        # composite tile by tile
+        for ty in range(tiles_y):
+            for tx in range(tiles_x):
+                tile = Rectangle(
+                    x=tx * tile_size,
+                    y=ty * tile_size,
+                    width=min(tile_size, width - tx * tile_size),
+                    height=min(tile_size, height - ty * tile_size)
+                )
+                if tile.has_no_area:
+                    continue
 
-        # convert to uint8 RGBA (BGRA actually) and return
-        return cv2.cvtColor(
-            _float32_to_uint8(canvas),
-            cv2.COLOR_mRGBA2RGBA
-        )
+                # the tile pixel array in alpha premultiplied float32 format
+                canvas = np.empty(
+                    shape=(int(tile.height), int(tile.width), 4),
+                    dtype=np.float32
+                )
+                canvas[:, :] = background_color_premultiplied
+
+                for draw in tile_draws[ty * tiles_x + tx]:
+                    window = draw.canvas_window.intersect_with(tile)
+                    if window.has_no_area:
+                        continue
+
+                    # composit the next sprite over the tile in the window
+                    draw.composite(canvas, tile, window)
+
+                # convert to uint8 RGBA (BGRA actually) into the output
+                out[
+                    int(tile.top):int(tile.bottom),
+                    int(tile.left):int(tile.right)
+                ] = cv2.cvtColor(
+                    _float32_to_uint8(canvas),
+                    cv2.COLOR_mRGBA2RGBA
+                )
+
+        return out
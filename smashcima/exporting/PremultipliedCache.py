@@ -0,0 +1,161 @@
+import threading
+import weakref
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from smashcima.LruCache import LruCache
+
+
+class PremultipliedCache:
+    """Keeps alpha premultiplied float32 versions of sprite bitmaps.
+
+    The `BitmapRenderer` composites premultiplied float32 layers and used
+    to convert every sprite bitmap again in every render, including
+    the page-sized paper texture. The cache keeps the converted bitmaps
+    across renders (e.g. of the same scene at several DPIs) and across
+    sprites that share the same source bitmap (e.g. glyphs unpacked from
+    the same packed glyph). The least recently used bitmaps are evicted
+    once the cached bitmaps take more than `max_bytes`. Bitmaps larger
+    than `max_entry_bytes` (e.g. a page-sized paper texture) are not cached,
+    the renderer converts only the parts of them it draws.
+
+    Bitmaps are identified by the array object and its data buffer.
+    The cache keeps a copy of each source bitmap and compares the bitmap
+    with it on every lookup, so a bitmap modified in place is converted
+    again. The cache never modifies the bitmaps it is given.
+    """
+
+    _default: Optional["PremultipliedCache"] = None
+
+    def __init__(
+        self,
+        max_bytes: int = 256 * 1024 * 1024,
+        max_entry_bytes: Optional[int] = None
+    ):
+        """
+        :param max_bytes: Maximum memory taken by the cached bitmaps,
+            0 disables the cache
+        :param max_entry_bytes: Maximum memory taken by one cached bitmap,
+            an eighth of `max_bytes` by default
+        """
+        self.max_bytes = max_bytes
+        "Maximum memory taken by the cached bitmaps"
+
+        self.max_entry_bytes = max_bytes // 8 if max_entry_bytes is None \
+            else min(max_entry_bytes, max_bytes)
+        "Maximum memory taken by one cached bitmap"
+
+        # (weak reference to the bitmap, its copy, converted bitmap)
+        self._entries: LruCache[Tuple[Any, np.ndarray, np.ndarray]] = \
+            LruCache(
+                max_size=max_bytes,
+                size_of=lambda entry: entry[1].nbytes + entry[2].nbytes
+            )
+
+        # keys of garbage collected bitmaps, removed on the next lookup
+        # (weakref callbacks may run while the cache is locked)
+        self._dead_keys: List[Hashable] = []
+        self._dead_keys_lock = threading.Lock()
+
+    @staticmethod
+    def default() -> "PremultipliedCache":
+        """The cache shared by renderers that are not given one"""
+        if PremultipliedCache._default is None:
+            PremultipliedCache._default = PremultipliedCache()
+        return PremultipliedCache._default
+
+    @staticmethod
+    def set_default(cache: "PremultipliedCache"):
+        """Replaces the shared cache (e.g. with a different memory cap)"""
+        PremultipliedCache._default = cache
+
+    @property
+    def size(self) -> int:
+        """Memory taken by the cached bitmaps in bytes"""
+        return self._entries.size
+
+    @property
+    def hits(self) -> int:
+        return self._entries.hits
+
+    @property
+    def misses(self) -> int:
+        return self._entries.misses
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def _key(
+        bitmap: np.ndarray,
+        size: Optional[Tuple[int, int]]
+    ) -> Hashable:
+        return (
+            id(bitmap),
+            bitmap.__array_interface__["data"][0],
+            bitmap.shape,
+            size
+        )
+
+    def get(
+        self,
+        bitmap: np.ndarray,
+        size: Optional[Tuple[int, int]] = None
+    ) -> Optional[np.ndarray]:
+        """Returns the premultiplied float32 version of the BGRA uint8
+        bitmap (read-only), converting it on the first request.
+
+        :param size: Width and height to shrink the bitmap to
+            (by area averaging) before the conversion
+        :returns: None when the converted bitmap is too large to be cached
+        """
+        width, height = size or (bitmap.shape[1], bitmap.shape[0])
+        if width * height * 4 * 4 + bitmap.nbytes > self.max_entry_bytes:
+            return None
+
+        # renders may run concurrently (e.g. `render_async` of scenes)
+        with self._dead_keys_lock:
+            while self._dead_keys:
+                self._entries.remove(self._dead_keys.pop())
+
+        key = self._key(bitmap, size)
+        entry = self._entries.get(key)
+        if entry is not None and entry[0]() is bitmap \
+                and np.array_equal(entry[1], bitmap):
+            return entry[2]
+
+        converted = cv2.cvtColor(bitmap, cv2.COLOR_RGBA2mRGBA)
+        if size is not None:
+            converted = cv2.resize(
+                converted, size, interpolation=cv2.INTER_AREA
+            )
+        converted = converted.astype(np.float32)
+        converted /= 255
+        converted.flags.writeable = False
+
+        # the entry is dropped once the bitmap is garbage collected
+        dead_keys = self._dead_keys
+        reference = weakref.ref(bitmap, lambda _: dead_keys.append(key))
+        self._entries.put(key, (reference, bitmap.copy(), converted))
+        return converted
+
+    def invalidate(self, bitmap: np.ndarray):
+        """Drops all the cached versions of the bitmap"""
+        for key in self._entries.keys():
+            if key[0] == id(bitmap):
+                self._entries.remove(key)
+
+    def clear(self):
+        self._entries.clear()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # cached bitmaps are not worth pickling (e.g. to worker processes)
+        return {
+            "max_bytes": self.max_bytes,
+            "max_entry_bytes": self.max_entry_bytes
+        }
+
+    def __setstate__(self, state: Dict[str, Any]):
+        self.__init__(**state)
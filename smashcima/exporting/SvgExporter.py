@@ -4,9 +4,9 @@ from typing import Optional
 
 import cv2
 
-from smashcima.geometry import Transform
+from smashcima.geometry import Quad, Rectangle, Transform
 from smashcima.scene import (AffineSpace, AffineSpaceVisitor, LabeledRegion,
-                             SceneObject, Sprite, ViewBox)
+                             SceneObject, Sprite, SpriteIndex, ViewBox)
 
 SVG_NS = "{http://www.w3.org/2000/svg}"
 XLINK_NS = "{http://www.w3.org/1999/xlink}"
@@ -21,11 +21,16 @@ class SvgExporter:
         self.background_fill = background_fill
         self.render_labeled_regions = render_labeled_regions
 
-    def export_string(self, view_box: ViewBox, pretty=False) -> str:
+    def export_string(
+        self,
+        view_box: ViewBox,
+        pretty=False,
+        sprite_index: Optional[SpriteIndex] = None
+    ) -> str:
         """Exports the provided scene into an SVG string"""
         
         # build the element tree
-        root = self.export(view_box)
+        root = self.export(view_box, sprite_index=sprite_index)
 
         # prettify
         if pretty and hasattr(ET, "indent"):
@@ -51,8 +56,17 @@ class SvgExporter:
             xml_declaration=True
         ), "utf-8")
 
-    def export(self, view_box: ViewBox) -> ET.Element:
-        """Exports the provided scene into and SVG XML element tree"""
+    def export(
+        self,
+        view_box: ViewBox,
+        sprite_index: Optional[SpriteIndex] = None
+    ) -> ET.Element:
+        """Exports the provided scene into and SVG XML element tree
+
+        :param sprite_index: Index of the view box space, when given, only
+            the sprites it finds in the view are exported as a flat list
+            of images, instead of the whole affine space hierarchy
+        """
         
         # build the root SVG element
         root_element = ET.Element(SVG_NS + "svg")
@@ -84,16 +98,30 @@ class SvgExporter:
             .inverse()
         
         # extract visible object hierarchy
-        svg_visitor = SvgVisitor(space=root_space)
-        svg_visitor.run()
+        if sprite_index is not None:
+            assert sprite_index.space is view_box.space, \
+                "The sprite index must be built over the view box space"
+            group_element = ET.Element(SVG_NS + "g")
+            view_rectangle = root_to_view_transform.inverse().apply_to(
+                Quad.from_rectangle(Rectangle(0, 0, width, height))
+            ).bbox()
+            for entry in sprite_index.query(view_rectangle):
+                group_element.append(sprite_to_image_element(
+                    sprite=entry.sprite,
+                    transform=entry.origin_transform
+                ))
+        else:
+            svg_visitor = SvgVisitor(space=root_space)
+            svg_visitor.run()
+            group_element = svg_visitor.group_element
 
         # set the viewport transofrm to the root space group
         # (i.e. position the whole scene so that it aligns with the viewport)
-        svg_visitor.group_element.attrib = {
+        group_element.attrib = {
             "transform": svg_matrix_from_transform(root_to_view_transform),
             "id": "RootAffineSpace_" + str(id(root_space))
         }
-        root_element.append(svg_visitor.group_element)
+        root_element.append(group_element)
 
         # extract labeled regions overlay
         if self.render_labeled_regions:
@@ -184,8 +212,12 @@ def svg_matrix_from_transform(t: Transform) -> str:
     return f"matrix({a} {b} {c} {d} {e} {f})"
 
 
-def sprite_to_image_element(sprite: Sprite) -> ET.Element:
-    """Converts a Sprite instance to an SVG image element"""
+def sprite_to_image_element(
+    sprite: Sprite,
+    transform: Optional[Transform] = None
+) -> ET.Element:
+    """Converts a Sprite instance to an SVG image element, placed by
+    the given transform instead of the sprite transform, if given"""
     image_element = ET.Element(SVG_NS + "image")
     
     png_binary_data = cv2.imencode(".png", sprite.bitmap)[1].tobytes()
@@ -195,7 +227,9 @@ def sprite_to_image_element(sprite: Sprite) -> ET.Element:
     height = sprite.physical_height
 
     image_element.attrib = {
-        "transform": svg_matrix_from_transform(sprite.transform),
+        "transform": svg_matrix_from_transform(
+            sprite.transform if transform is None else transform
+        ),
         "x": str(-width * sprite.bitmap_origin.x),
         "y": str(-height * sprite.bitmap_origin.y),
         "width": str(width),
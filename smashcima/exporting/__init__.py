@@ -1,3 +1,5 @@
+from .AnnotationsExporter import AnnotationsExporter
 from .BitmapRenderer import BitmapRenderer
 from .DebugGlyphRenderer import DebugGlyphRenderer
+from .PremultipliedCache import PremultipliedCache
 from .SvgExporter import SvgExporter
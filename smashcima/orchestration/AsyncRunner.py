@@ -0,0 +1,70 @@
+import asyncio
+import functools
+import weakref
+from concurrent.futures import Executor
+from typing import Any, Callable, Optional, TypeVar
+
+R = TypeVar("R")
+
+
+class AsyncRunner:
+    """Runs blocking synthesis and rendering calls from asyncio code.
+
+    Synthesis (e.g. layout and paper quilting) and rendering are CPU-bound
+    and would block the event loop of an async front end. The runner
+    offloads them to an executor instead, with at most `max_concurrency`
+    calls running at once. The other calls wait without blocking the loop.
+    """
+
+    _default: Optional["AsyncRunner"] = None
+
+    def __init__(
+        self,
+        executor: Optional[Executor] = None,
+        max_concurrency: int = 4
+    ):
+        """
+        :param executor: Thread or process pool executing the calls,
+            the default thread pool of the event loop when None
+        :param max_concurrency: Maximum number of calls running at once
+        """
+        self.executor = executor
+        "Executes the calls, the default executor of the loop when None"
+
+        self.max_concurrency = max_concurrency
+        "Maximum number of calls running at once"
+
+        # asyncio primitives belong to one event loop
+        self._semaphores: "weakref.WeakKeyDictionary[Any, asyncio.Semaphore]" \
+            = weakref.WeakKeyDictionary()
+
+    @staticmethod
+    def default() -> "AsyncRunner":
+        """The runner shared by models and scenes that are not given one"""
+        if AsyncRunner._default is None:
+            AsyncRunner._default = AsyncRunner()
+        return AsyncRunner._default
+
+    @staticmethod
+    def set_default(runner: "AsyncRunner"):
+        """Replaces the shared runner (e.g. to set up a process pool),
+        affects models built afterwards"""
+        AsyncRunner._default = runner
+
+    def _semaphore(self, loop: asyncio.AbstractEventLoop) -> asyncio.Semaphore:
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphores[loop] = semaphore
+        return semaphore
+
+    async def run(self, function: Callable[..., R], *args, **kwargs) -> R:
+        """Calls the function in the executor and waits for its result.
+        With a process executor, the function and its arguments are pickled
+        into the worker process."""
+        loop = asyncio.get_running_loop()
+        async with self._semaphore(loop):
+            return await loop.run_in_executor(
+                self.executor,
+                functools.partial(function, *args, **kwargs)
+            )
@@ -1,13 +1,12 @@
 import copy
 from pathlib import Path
-from typing import List, Optional, Union
-
-import numpy as np
+from typing import Optional, Union
 
 from smashcima.geometry import Vector2
 from smashcima.loading import load_score
 from smashcima.exporting import BitmapRenderer
-from smashcima.scene import AffineSpace, Page, Scene, Score
+from smashcima.scene import AffineSpace, Score
+from smashcima.StageTimer import timed_stage
 from smashcima.synthesis import (BeamStemSynthesizer, ColumnLayoutSynthesizer,
                                  LineSynthesizer, MuscimaPPGlyphSynthesizer,
                                  MuscimaPPLineSynthesizer,
@@ -19,49 +18,16 @@ from smashcima.synthesis import (BeamStemSynthesizer, ColumnLayoutSynthesizer,
                                  SolidColorPaperSynthesizer,
                                  StafflinesSynthesizer,
                                  GlyphSynthesizer)
-from smashcima.synthesis.style.MzkPaperStyleDomain import Patch
 
-from .Model import Model
+from .HandwrittenModel import HandwrittenModel
+from .HandwrittenScene import HandwrittenScene
 
 
-class BaseHandwrittenScene(Scene):
+class BaseHandwrittenScene(HandwrittenScene):
     """Scene synthesized by the `BaseHandwrittenModel`"""
-    def __init__(
-        self,
-        root_space: AffineSpace,
-        score: Score,
-        mpp_writer: int,
-        mzk_background_patch: Patch,
-        pages: List[Page],
-        renderer: BitmapRenderer
-    ):
-        super().__init__(root_space)
-        
-        self.score = score
-        """The semantic score based on which the scene was synthesized"""
-
-        self.mpp_writer = mpp_writer
-        """The MUSCIMA++ writer number that was used for this scene"""
-
-        self.mzk_background_patch = mzk_background_patch
-        """The MZK texture patch used for the background paper"""
-
-        self.pages = pages
-        """All the pages of music that were synthesized"""
-
-        self.renderer = renderer
-        """The renderer to be used for page rasterization"""
-
-        # add to the list of scene objects
-        self.add_many([score, *pages])
-
-    def render(self, page: Page) -> np.ndarray:
-        """Renders the bitmap BGRA image of a page"""
-        assert page in self.pages, "Given page is not in this scene"
-        return self.renderer.render(page.view_box)
 
 
-class BaseHandwrittenModel(Model[BaseHandwrittenScene]):
+class BaseHandwrittenModel(HandwrittenModel[BaseHandwrittenScene]):
     """Synthesizes handwritten pages of music notation.
 
     This model provides similar functionality as MuseScore when it comes
@@ -88,6 +54,7 @@ class BaseHandwrittenModel(Model[BaseHandwrittenScene]):
         c.type(MzkPaperStyleDomain)
         # c.interface(PaperSynthesizer, SolidColorPaperSynthesizer)
         c.interface(PaperSynthesizer, MzkQuiltingPaperSynthesizer)
+        c.instance(BitmapRenderer, BitmapRenderer(dpi=300))
 
     def resolve_services(self):
         super().resolve_services()
@@ -96,6 +63,9 @@ class BaseHandwrittenModel(Model[BaseHandwrittenScene]):
         self.layout_synthesizer = c.resolve(ColumnLayoutSynthesizer)
         self.page_synthesizer = c.resolve(SimplePageSynthesizer)
 
+        self.renderer = c.resolve(BitmapRenderer)
+        """Renderer given to the synthesized scenes"""
+
         self.mpp_style_domain = c.resolve(MuscimaPPStyleDomain)
         self.mzk_paper_style_domain = c.resolve(MzkPaperStyleDomain)
     
@@ -111,13 +81,37 @@ class BaseHandwrittenModel(Model[BaseHandwrittenScene]):
             self.container.resolve(MzkPaperStyleDomain)
         )
 
+        # give each group of synthesizers its own stream of randomness,
+        # so that e.g. swapping the paper does not change the layout
+        c = self.container
+        self.split_rng_stream(
+            "style",
+            self.mpp_style_domain,
+            self.mzk_paper_style_domain
+        )
+        self.split_rng_stream(
+            "layout",
+            self.layout_synthesizer,
+            c.resolve(BeamStemSynthesizer)
+        )
+        self.split_rng_stream(
+            "glyphs",
+            c.resolve(GlyphSynthesizer),
+            c.resolve(LineSynthesizer)
+        )
+        paper_synthesizer = c.resolve(PaperSynthesizer)
+        if isinstance(paper_synthesizer, MzkQuiltingPaperSynthesizer):
+            self.split_rng_stream("paper", paper_synthesizer.quilter)
+
     def __call__(
         self,
         file: Union[Path, str, None] = None,
         data: Union[bytes, str, None] = None,
         format: Optional[str] = None,
         score: Optional[Score] = None,
-        clone_score: bool = False
+        clone_score: bool = False,
+        seed: Optional[int] = None,
+        sample_key: str = ""
     ) -> BaseHandwrittenScene:
         """Synthesizes handwritten pages given a musical content.
         
@@ -136,6 +130,10 @@ class BaseHandwrittenModel(Model[BaseHandwrittenScene]):
             Smashcima Score
         :param clone_score: Should the score be cloned before being embedded
             in the resulting scene
+        :param seed: Seeds the synthesis of this sample, so that it can
+            be reproduced (by default the randomness just continues)
+        :param sample_key: Distinguishes samples synthesized with the same
+            seed (e.g. the input file name)
         :returns: The synthesized scene with all the pages
         """
 
@@ -147,16 +145,19 @@ class BaseHandwrittenModel(Model[BaseHandwrittenScene]):
         # you can do any post-processing and updates to the model state.
         # For example, the Model base class sets the self.scene property here.
         print("entra base model")
-        if score is None:
-            score = self.load_score(
-                file=file,
-                data=data,
-                format=format
-            )
-        elif clone_score:
-            score = copy.deepcopy(score)
-
-        return super().__call__(score)
+        # the score loading is timed as a part of the sample
+        with self.timer.sample(seed=seed, sample_key=sample_key):
+            if score is None:
+                with timed_stage("load_score"):
+                    score = self.load_score(
+                        file=file,
+                        data=data,
+                        format=format
+                    )
+            elif clone_score:
+                score = copy.deepcopy(score)
+
+            return super().__call__(score, seed=seed, sample_key=sample_key)
 
     def load_score(
         self,
@@ -191,7 +192,8 @@ class BaseHandwrittenModel(Model[BaseHandwrittenScene]):
         _PAGE_SPACING = 10 # 1cm
         while next_measure_index < score.measure_count:
             # prepare the next page of music
-            page = self.page_synthesizer.synthesize_page(next_page_origin)
+            with timed_stage("synthesize_page"):
+                page = self.page_synthesizer.synthesize_page(next_page_origin)
             page.space.parent_space = root_space
             pages.append(page)
 
@@ -201,11 +203,12 @@ class BaseHandwrittenModel(Model[BaseHandwrittenScene]):
             )
 
             # synthesize music onto the page
-            systems = self.layout_synthesizer.fill_page(
-                page,
-                score,
-                start_on_measure=next_measure_index
-            )
+            with timed_stage("fill_page"):
+                systems = self.layout_synthesizer.fill_page(
+                    page,
+                    score,
+                    start_on_measure=next_measure_index
+                )
             next_measure_index = systems[-1].last_measure_index + 1
 
         # construct the complete scene and return
@@ -215,5 +218,5 @@ class BaseHandwrittenModel(Model[BaseHandwrittenScene]):
             mpp_writer=self.mpp_style_domain.current_writer,
             mzk_background_patch=self.mzk_paper_style_domain.current_patch,
             pages=pages,
-            renderer=BitmapRenderer(dpi=300)
+            renderer=self.renderer
         )
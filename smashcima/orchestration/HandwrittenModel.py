@@ -0,0 +1,63 @@
+from typing import Iterator, List, Optional, Sequence, TypeVar
+
+import numpy as np
+
+from smashcima.scene import LinkSnapshot, Score
+
+from .HandwrittenScene import HandwrittenScene
+from .Model import Model
+
+S = TypeVar("S", bound=HandwrittenScene)
+"""The scene type the handwritten model returns"""
+
+
+class HandwrittenModel(Model[S]):
+    """Methods common to the `BaseHandwrittenModel` and
+    the `TweakedHandwrittenModel`, which synthesize a `HandwrittenScene`
+    from a score given to `__call__` as the `score` keyword argument"""
+
+    def generate_variants(
+        self,
+        score: Score,
+        k: int,
+        seeds: Optional[Sequence[int]] = None,
+        sample_key: str = ""
+    ) -> Iterator[S]:
+        """Synthesizes K variants of the same score, one at a time.
+
+        The score is parsed once by the caller (see `load_score`) and shared
+        by all variants, it is neither re-parsed nor copied. Scenes are
+        synthesized lazily, as the iterator is advanced. When the next
+        variant is requested, the links that the previous scene attached
+        to the score are detached. The previous scene can still be rendered
+        and exported, but its visual objects can no longer be looked up
+        from the semantic objects of the score (e.g. `Notehead.of_note`).
+        Once the iterator finishes or is closed, the score is left
+        exactly as it was given.
+
+        :param score: The parsed score to synthesize
+        :param k: Number of variants
+        :param seeds: Seeds of the individual variants (see `__call__`),
+            by default the randomness just continues
+        :param sample_key: Passed to `__call__` together with the seeds
+        """
+        if seeds is not None and len(seeds) != k:
+            raise ValueError(
+                f"Expected {k} seeds, one per variant, got {len(seeds)}."
+            )
+
+        snapshot = LinkSnapshot(score)
+        try:
+            for i in range(k):
+                snapshot.restore()
+                yield self(
+                    score=score,
+                    seed=None if seeds is None else seeds[i],
+                    sample_key=sample_key
+                )
+        finally:
+            # leave the score as it was given
+            snapshot.restore()
+
+    def render_scene(self, scene: S) -> List[np.ndarray]:
+        return [scene.render(page) for page in scene.pages]
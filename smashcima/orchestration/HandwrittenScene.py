@@ -0,0 +1,129 @@
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+
+from smashcima.exporting import BitmapRenderer
+from smashcima.geometry import Rectangle
+from smashcima.scene import (AffineSpace, Page, Scene, Score, SpriteIndex,
+                             ViewBox)
+from smashcima.StageTimer import timed_stage
+from smashcima.synthesis.style.MzkPaperStyleDomain import Patch
+
+from .AsyncRunner import AsyncRunner
+
+
+class HandwrittenScene(Scene):
+    """Scene of handwritten pages, common to the scenes synthesized by
+    the `BaseHandwrittenModel` and the `TweakedHandwrittenModel`"""
+    def __init__(
+        self,
+        root_space: AffineSpace,
+        score: Score,
+        mpp_writer: int,
+        mzk_background_patch: Patch,
+        pages: List[Page],
+        renderer: BitmapRenderer
+    ):
+        super().__init__(root_space)
+        
+        self.score = score
+        """The semantic score based on which the scene was synthesized"""
+
+        self.mpp_writer = mpp_writer
+        """The MUSCIMA++ writer number that was used for this scene"""
+
+        self.mzk_background_patch = mzk_background_patch
+        """The MZK texture patch used for the background paper"""
+
+        self.pages = pages
+        """All the pages of music that were synthesized"""
+
+        self.renderer = renderer
+        """The renderer to be used for page rasterization"""
+
+        self._sprite_indices: Dict[int, SpriteIndex] = {}
+
+        # add to the list of scene objects
+        self.add_many([score, *pages])
+
+    def _renderer_at(self, dpi: Optional[float]) -> BitmapRenderer:
+        if dpi is None:
+            return self.renderer
+        return self.renderer.at_dpi(dpi)
+
+    def render(
+        self,
+        page: Page,
+        out: Optional[np.ndarray] = None,
+        dpi: Optional[float] = None
+    ) -> np.ndarray:
+        """Renders the bitmap BGRA image of a page, optionally into
+        a preallocated array (see `BitmapRenderer.render`)
+
+        :param dpi: Renders at this DPI instead of the renderer's one
+            (e.g. 75 DPI for a quick preview)
+        """
+        assert page in self.pages, "Given page is not in this scene"
+        with timed_stage("render", self.metrics):
+            return self._renderer_at(dpi).render(page.view_box, out=out)
+
+    def render_progressive(
+        self,
+        page: Page,
+        preview_dpi: float = 75
+    ) -> Iterator[np.ndarray]:
+        """Yields a quick low-DPI preview of the page and then
+        the page rendered at the full DPI of the renderer"""
+        yield self.render(page, dpi=preview_dpi)
+        yield self.render(page)
+
+    async def render_async(
+        self,
+        page: Page,
+        runner: Optional[AsyncRunner] = None,
+        dpi: Optional[float] = None
+    ) -> np.ndarray:
+        """Renders the bitmap BGRA image of a page without blocking
+        the event loop (see `AsyncRunner`, the shared one by default)"""
+        assert page in self.pages, "Given page is not in this scene"
+        runner = runner or AsyncRunner.default()
+        return await runner.run(self.render, page, dpi=dpi)
+
+    def sprite_index(self, page: Page) -> SpriteIndex:
+        """Returns the spatial index of the sprites of a page,
+        it is built on first use and kept, since the synthesized scene
+        is not expected to change"""
+        assert page in self.pages, "Given page is not in this scene"
+        index = self._sprite_indices.get(id(page))
+        if index is None:
+            index = SpriteIndex(page.space)
+            self._sprite_indices[id(page)] = index
+        return index
+
+    def render_region(
+        self,
+        page: Page,
+        region: Rectangle,
+        dpi: Optional[float] = None
+    ) -> np.ndarray:
+        """Renders the bitmap BGRA image of a region of a page (e.g. a crop
+        around a staff), only the sprites in the region are drawn
+
+        :param region: The region in millimeters, relative to the top left
+            corner of the page
+        """
+        page_rectangle = page.view_box.rectangle
+        view_box = ViewBox(
+            space=page.space,
+            rectangle=Rectangle(
+                page_rectangle.x + region.x,
+                page_rectangle.y + region.y,
+                region.width,
+                region.height
+            )
+        )
+        with timed_stage("render", self.metrics):
+            return self._renderer_at(dpi).render(
+                view_box,
+                sprite_index=self.sprite_index(page)
+            )
@@ -1,14 +1,25 @@
 import abc
+import gc
 import random
-from typing import Generic, Optional, TypeVar
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import (Any, Dict, Generic, Iterable, Iterator, List, Optional,
+                    Sequence, Tuple, TypeVar, Union)
+
+import numpy as np
 
 from smashcima.assets.AssetRepository import AssetRepository
+from smashcima.derive_seed import derive_seed
+from smashcima.scene.Scene import Scene
+from smashcima.StageTimer import StageTimer, timed_stage
 from smashcima.synthesis.style.Styler import Styler
 
 import importlib.util
 import sys
 
 from . import Container
+from .AsyncRunner import AsyncRunner
 
 T = TypeVar("T")
 """The scene type the model returns (does NOT need to inherit from `Scene`)"""
@@ -35,6 +46,15 @@ class Model(Generic[T], abc.ABC):
         self.scene: Optional[T] = None
         """The scene synthesized during the last invocation of this model"""
 
+        self.async_runner: AsyncRunner = AsyncRunner.default()
+        """Executes the synthesis for `synthesize_async`"""
+
+        self._call_lock = threading.Lock()
+
+        self.timer = StageTimer()
+        """Times the stages of the synthesis when enabled
+        (e.g. `model.timer.enabled = True`), see `StageTimer`"""
+
         self.register_services()
         self.resolve_services()
         self.configure_services()
@@ -69,6 +89,9 @@ class Model(Generic[T], abc.ABC):
         self.rng: random.Random = self.container.resolve(random.Random)
         """The RNG that should be used for all synthesis randomness"""
 
+        self.rng_streams: Dict[str, random.Random] = {"default": self.rng}
+        """Independently seeded RNGs by their name, see `split_rng_stream`"""
+
         self.styler: Styler = self.container.resolve(Styler)
         """Controls the style selection for all the synthesizers"""
     
@@ -79,24 +102,177 @@ class Model(Generic[T], abc.ABC):
         Here, services should be set-up after their instantiation.
         """
         pass
-    
-    def __call__(self, *args, **kwargs) -> T:
+
+    def split_rng_stream(self, name: str, *services: Any) -> random.Random:
+        """Gives services their own RNG stream, independent of the others.
+
+        The services must store their RNG in the `rng` field. Services
+        sharing a stream should be those that always consume randomness
+        together (e.g. layout and beaming), while services that may be
+        changed or skipped independently should get separate streams,
+        so that changing one does not shift the random choices of another.
+        Call this from the `configure_services` method.
+        """
+        rng = self.rng_streams.get(name)
+        if rng is None:
+            rng = random.Random()
+            self.rng_streams[name] = rng
+        for service in services:
+            service.rng = rng
+        return rng
+
+    def seed(self, seed: int, sample_key: str = ""):
+        """Seeds all RNG streams for the synthesis of one sample.
+
+        Each stream is seeded from the `(seed, sample_key, stream name)`
+        triple, so a sample can be re-synthesized in isolation, on any
+        machine, without synthesizing the samples that came before it.
+        """
+        for name, rng in self.rng_streams.items():
+            rng.seed(derive_seed(seed, sample_key, name))
+
+    def __call__(
+        self,
+        *args,
+        seed: Optional[int] = None,
+        sample_key: str = "",
+        **kwargs
+    ) -> T:
         """Synthesizes a new scene based on the arguments and returns it.
 
         Override this to specify what arguments your model expects
         and perform any pre-synthesis and post-synthesis state changes
         to the model instance (e.g. select styles, remember the scene).
+
+        :param seed: When given, all RNG streams are seeded for this sample
+            (see the `seed` method), otherwise they continue where they are
+        :param sample_key: Name of the sample within the dataset, used
+            together with the seed to seed the RNG streams
         """
 
-        # select the styles used for synthesis of this sample
-        self.styler.pick_style()
+        with self.timer.sample(seed=seed, sample_key=sample_key):
+            # seed the randomness of this sample
+            if seed is not None:
+                self.seed(seed, sample_key)
+
+            # select the styles used for synthesis of this sample
+            with timed_stage("pick_style"):
+                self.styler.pick_style()
 
-        # run the synthesis pipeline and build the scene
-        self.scene = self.call(*args, **kwargs)
+            # run the synthesis pipeline and build the scene
+            self.scene = self.call(*args, **kwargs)
+
+            # attach the stage timings to the scene
+            if self.timer.enabled and isinstance(self.scene, Scene):
+                self.scene.metrics = self.timer.metrics
 
         # return the new scene
         return self.scene
 
+    async def synthesize_async(self, *args, **kwargs) -> T:
+        """Synthesizes a new scene without blocking the event loop.
+
+        Takes the same arguments as `__call__`, which is run by the
+        `async_runner`. The model holds state (e.g. its RNGs and styles),
+        so concurrent invocations of one model are run one after another.
+        Rendering the scenes (e.g. `render_async`) can still overlap.
+        For synthesis in other processes, use the `SynthesisService`,
+        which keeps a model in each of its worker processes.
+        """
+        if isinstance(self.async_runner.executor, ProcessPoolExecutor):
+            raise TypeError(
+                "The model cannot be sent to a process pool, " +
+                "use the SynthesisService to synthesize in other processes."
+            )
+        return await self.async_runner.run(self._locked_call, *args, **kwargs)
+
+    def _locked_call(self, *args, **kwargs) -> T:
+        with self._call_lock:
+            return self(*args, **kwargs)
+
+    def stream(
+        self,
+        inputs: Iterable[Any],
+        seeds: Union[int, Sequence[int], None] = None,
+        render: bool = False,
+        collect_every: int = 1,
+        keys: Optional[Sequence[str]] = None
+    ) -> Iterator[Tuple[str, Any]]:
+        """Synthesizes scenes for a sequence of inputs, one at a time.
+
+        Each input is passed to `__call__` as its first argument (e.g. a path
+        to a MusicXML file). For every input, a `(key, scene)` pair is
+        yielded, or `(key, pages)` with the rendered page bitmaps when
+        `render` is set. The key is the file name for path inputs and
+        the input index otherwise, unless the keys are given.
+
+        The model keeps no reference to a yielded scene (unlike `__call__`,
+        which stores it in `self.scene`), so it can be released as soon as
+        the consumer drops it. Scene objects form reference cycles, which
+        only the garbage collector releases. A full collection therefore
+        runs after every sample by default, so that the bitmaps of the
+        previous scene are freed before the next one is synthesized and
+        the memory stays constant. It costs a pass over all live objects
+        (including the assets of the model), `collect_every` can make it
+        less frequent.
+
+        :param inputs: Inputs of the individual samples
+        :param seeds: Either one seed for the whole stream, combined with
+            each sample key (see `seed`), or one seed for each input.
+            By default the randomness just continues.
+        :param render: Yield the rendered pages instead of the scene
+            (see `render_scene`)
+        :param collect_every: Run a full garbage collection after every
+            this many samples (every sample by default), 0 leaves it
+            to the automatic collection
+        :param keys: Keys of the individual inputs, used together with
+            the seeds (e.g. paths relative to the dataset folder, when
+            files in different folders share their name)
+        """
+        for i, model_input in enumerate(inputs):
+            if keys is not None:
+                key = keys[i]
+            elif isinstance(model_input, (str, Path)):
+                key = Path(model_input).name
+            else:
+                key = str(i)
+
+            seed: Optional[int] = None
+            if isinstance(seeds, int):
+                seed = seeds
+            elif seeds is not None:
+                seed = seeds[i]
+
+            # the rendering is timed as a part of the sample
+            with self.timer.sample(seed=seed, sample_key=key):
+                scene = self(model_input, seed=seed, sample_key=key)
+                self.scene = None
+                if render:
+                    pages = self.render_scene(scene)
+
+            if render:
+                del scene
+                yield key, pages
+                del pages
+            else:
+                yield key, scene
+                del scene
+
+            # scene objects form reference cycles (links point both ways),
+            # collect them now, before the next scene allocates its bitmaps
+            if collect_every > 0 and (i + 1) % collect_every == 0:
+                gc.collect()
+
+    def render_scene(self, scene: T) -> List[np.ndarray]:
+        """Renders all pages of a scene synthesized by this model.
+        
+        Override this to let `stream` yield rendered pages.
+        """
+        raise NotImplementedError(
+            f"Model {self.__class__.__name__} does not have the "
+            "`render_scene()` method implemented."
+        )
+
     @abc.abstractmethod
     def call(self, *args, **kwargs) -> T:
         """Implements the synthesis process, returns a new scene.
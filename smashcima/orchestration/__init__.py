@@ -1,7 +1,12 @@
 # core types
+from .AsyncRunner import AsyncRunner
 from .Container import Container
 from .Model import Model
 
+# shared by the handwritten models
+from .HandwrittenModel import HandwrittenModel
+from .HandwrittenScene import HandwrittenScene
+
 # specific models
 from .BaseHandwrittenModel import BaseHandwrittenModel, BaseHandwrittenScene
 from .TweakedHandwrittenModel import TweakedHandwrittenModel, TweakedHandwrittenScene
@@ -0,0 +1,50 @@
+from typing import List, Set
+
+from .SceneObject import Link, SceneObject
+
+
+class LinkSnapshot:
+    """Remembers all links of a connected graph of scene objects, so that
+    links attached to the graph later on can be detached again.
+
+    This lets multiple scenes be synthesized on top of one semantic score
+    without copying it: before each synthesis, the links that the previous
+    synthesis attached to the score (e.g. noteheads pointing to notes)
+    are detached, which returns the score to its original state.
+    """
+
+    def __init__(self, root: SceneObject):
+        self.objects: List[SceneObject] = []
+        "All scene objects connected to the root when the snapshot was taken"
+
+        self.links: List[Link] = []
+        "All links between these objects when the snapshot was taken"
+
+        self._link_ids: Set[int] = set()
+
+        visited: Set[int] = set()
+        stack = [root]
+        while len(stack) > 0:
+            obj = stack.pop()
+            if id(obj) in visited:
+                continue
+            visited.add(id(obj))
+            self.objects.append(obj)
+            for link in obj.outlinks:
+                self._remember(link)
+                stack.append(link.target)
+            for link in obj.inlinks:
+                self._remember(link)
+                stack.append(link.source)
+
+    def _remember(self, link: Link):
+        if id(link) not in self._link_ids:
+            self._link_ids.add(id(link))
+            self.links.append(link)
+
+    def restore(self):
+        """Detaches all links attached to the objects since the snapshot"""
+        for obj in self.objects:
+            for link in obj.outlinks + obj.inlinks:
+                if id(link) not in self._link_ids:
+                    link.detach()
@@ -1,4 +1,4 @@
-from typing import TypeVar, Type, Optional, List, Dict
+from typing import Any, TypeVar, Type, Optional, List, Dict
 from .AffineSpace import AffineSpace
 from .SceneObject import SceneObject
 
@@ -19,6 +19,10 @@ class Scene:
         self.objects: Dict[int, SceneObject] = {}
         "Tracks all scene objects"
 
+        self.metrics: Dict[str, Any] = {}
+        """Timings of the synthesis stages, empty unless the model
+        timed them (see `StageTimer`)"""
+
         # add the root space into the scene as a scene object
         self.add(self.root_space)
     
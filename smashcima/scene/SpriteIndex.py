@@ -0,0 +1,104 @@
+from math import floor
+from typing import Dict, List, NamedTuple, Tuple
+
+from smashcima.geometry import Quad, Rectangle, Transform
+
+from .AffineSpace import AffineSpace
+from .Sprite import Sprite
+
+
+class SpriteIndexEntry(NamedTuple):
+    """One sprite of the `SpriteIndex` with its world-space placement"""
+
+    sprite: Sprite
+    "The indexed sprite"
+
+    transform: Transform
+    """Transform from the sprite's pixel space to the scene space
+    (the space of the root, in which view box rectangles are placed)"""
+
+    origin_transform: Transform
+    """Transform from the sprite's origin space to the scene space
+    (excludes the pixels transform)"""
+
+    bbox: Rectangle
+    "Bounding box of the sprite in the scene space (millimeters)"
+
+
+class SpriteIndex:
+    """Uniform grid over the scene-space bounding boxes of sprites.
+
+    The index is built once (e.g. after the synthesis) over all the sprites
+    within an affine space (e.g. a page) and then answers which sprites
+    overlap a rectangle without walking the affine space hierarchy and
+    composing its transforms again. Renderers and exporters accept
+    the index to draw only a region of a page (e.g. crops).
+
+    The index is a snapshot, it is not updated when the scene changes.
+    """
+
+    def __init__(self, space: AffineSpace, cell_size: float = 10.0):
+        """
+        :param space: The indexed space, all sprites in its subtree
+            are indexed
+        :param cell_size: Width and height of a grid cell in millimeters
+        """
+        self.space = space
+        "The indexed affine space"
+
+        self.cell_size = float(cell_size)
+        "Width and height of a grid cell in millimeters"
+
+        self.entries: List[SpriteIndexEntry] = []
+        "The indexed sprites in the rendering order"
+
+        self._cells: Dict[Tuple[int, int], List[int]] = {}
+
+        space_to_scene = space.get_root().transform_from(space)
+        for sprite, origin_transform in Sprite.traverse_sprites(
+            space,
+            include_pixels_transform=False,
+            include_sprite_transform=True,
+            include_root_space_transform=False
+        ):
+            origin_transform = origin_transform.then(space_to_scene)
+            transform = sprite.get_pixels_to_origin_space_transform() \
+                .then(origin_transform)
+            bbox = transform.apply_to(
+                Quad.from_rectangle(sprite.pixels_bbox.dilate(1.0))
+            ).bbox()
+            self._insert(SpriteIndexEntry(
+                sprite=sprite,
+                transform=transform,
+                origin_transform=origin_transform,
+                bbox=bbox
+            ))
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def _cell_range(self, rectangle: Rectangle):
+        left = floor(rectangle.left / self.cell_size)
+        right = floor(rectangle.right / self.cell_size)
+        top = floor(rectangle.top / self.cell_size)
+        bottom = floor(rectangle.bottom / self.cell_size)
+        for cy in range(top, bottom + 1):
+            for cx in range(left, right + 1):
+                yield (cx, cy)
+
+    def _insert(self, entry: SpriteIndexEntry):
+        i = len(self.entries)
+        self.entries.append(entry)
+        for cell in self._cell_range(entry.bbox):
+            self._cells.setdefault(cell, []).append(i)
+
+    def query(self, rectangle: Rectangle) -> List[SpriteIndexEntry]:
+        """Returns the sprites whose bounding box overlaps the rectangle
+        (in the scene space), in the rendering order"""
+        found = set()
+        for cell in self._cell_range(rectangle):
+            found.update(self._cells.get(cell, ()))
+        return [
+            self.entries[i] for i in sorted(found)
+            if not self.entries[i].bbox.intersect_with(rectangle).has_no_area
+        ]
@@ -6,6 +6,7 @@ from .ComposedGlyph import ComposedGlyph
 from .Glyph import Glyph
 from .LabeledRegion import LabeledRegion
 from .LineGlyph import LineGlyph
+from .LinkSnapshot import LinkSnapshot
 from .Region import Region
 from .Scene import Scene
 from .SceneObject import SceneObject
@@ -13,6 +14,7 @@ from .ScenePoint import ScenePoint
 from .SmashcimaLabels import SmashcimaLabels
 from .SmuflLabels import SmuflLabels
 from .Sprite import Sprite
+from .SpriteIndex import SpriteIndex, SpriteIndexEntry
 from .ViewBox import ViewBox
 
 # -----------------------------------------------------------------------------
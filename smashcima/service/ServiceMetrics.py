@@ -0,0 +1,106 @@
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Tuple
+
+
+def _summary(values: List[float]) -> Dict[str, float]:
+    """Mean, median, 95th percentile and maximum of latencies in seconds"""
+    if len(values) == 0:
+        return {"mean": 0.0, "p50": 0.0, "p95": 0.0, "max": 0.0}
+    ordered = sorted(values)
+    return {
+        "mean": sum(ordered) / len(ordered),
+        "p50": ordered[(len(ordered) - 1) // 2],
+        "p95": ordered[int(round(0.95 * (len(ordered) - 1)))],
+        "max": ordered[-1]
+    }
+
+
+class ServiceMetrics:
+    """Thread-safe throughput and latency counters of the `SynthesisService`.
+
+    Latencies are summarized over the most recent requests only and
+    the recent throughput over a sliding time window.
+    """
+
+    def __init__(self, window: float = 60.0, history: int = 1000):
+        """
+        :param window: Length of the throughput window in seconds
+        :param history: Number of recent requests the latencies are
+            summarized over
+        """
+        self.window = window
+        self.history = history
+
+        self.started_at = time.monotonic()
+        self.submitted = 0
+        self.rejected = 0
+        self.completed = 0
+        self.failed = 0
+
+        self._lock = threading.Lock()
+        self._finished_at: Deque[float] = deque()
+        self._latencies: Deque[Tuple[float, float, float]] = \
+            deque(maxlen=history)
+
+    def record_submitted(self):
+        with self._lock:
+            self.submitted += 1
+
+    def record_rejected(self):
+        with self._lock:
+            self.rejected += 1
+
+    def record_finished(
+        self,
+        queue_seconds: float,
+        synthesis_seconds: float,
+        total_seconds: float,
+        failed: bool
+    ):
+        """Records a request that has been served (or has failed)"""
+        now = time.monotonic()
+        with self._lock:
+            if failed:
+                self.failed += 1
+            else:
+                self.completed += 1
+            self._finished_at.append(now)
+            self._latencies.append(
+                (queue_seconds, synthesis_seconds, total_seconds)
+            )
+            self._drop_old(now)
+
+    def _drop_old(self, now: float):
+        while len(self._finished_at) > 0 \
+                and self._finished_at[0] < now - self.window:
+            self._finished_at.popleft()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Returns the current metrics as a JSON-serializable dictionary"""
+        now = time.monotonic()
+        with self._lock:
+            self._drop_old(now)
+            uptime = now - self.started_at
+            finished = self.completed + self.failed
+            latencies = list(self._latencies)
+            return {
+                "uptime_seconds": uptime,
+                "submitted": self.submitted,
+                "rejected": self.rejected,
+                "completed": self.completed,
+                "failed": self.failed,
+                "in_flight": self.submitted - finished,
+                "throughput": {
+                    "overall_per_second": finished / uptime \
+                        if uptime > 0 else 0.0,
+                    "recent_per_second": len(self._finished_at) \
+                        / min(self.window, uptime) if uptime > 0 else 0.0
+                },
+                "latency_seconds": {
+                    "queue": _summary([l[0] for l in latencies]),
+                    "synthesis": _summary([l[1] for l in latencies]),
+                    "total": _summary([l[2] for l in latencies])
+                }
+            }
@@ -0,0 +1,39 @@
+from typing import Callable, List
+
+from smashcima.orchestration.BaseHandwrittenModel import BaseHandwrittenModel
+from smashcima.orchestration.TweakedHandwrittenModel import \
+    TweakedHandwrittenModel
+from smashcima.synthesis.style.Styler import Styler
+
+
+class ServiceStyler(Styler):
+    """Picks the styles randomly, like the `Styler`, and then applies
+    the style overrides of the request being served"""
+
+    def __init__(self):
+        super().__init__()
+
+        self.overrides: List[Callable[[], None]] = []
+        "Called in order, after the styles have been picked"
+
+    def pick_style(self):
+        super().pick_style()
+        for override in self.overrides:
+            override()
+
+
+class BaseServiceModel(BaseHandwrittenModel):
+    """The `BaseHandwrittenModel` with styles that can be set per request"""
+
+    def register_services(self):
+        super().register_services()
+        self.container.interface(Styler, ServiceStyler)
+
+
+class TweakedServiceModel(TweakedHandwrittenModel):
+    """The `TweakedHandwrittenModel` with styles that can be set
+    per request"""
+
+    def register_services(self):
+        super().register_services()
+        self.container.interface(Styler, ServiceStyler)
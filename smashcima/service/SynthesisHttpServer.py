@@ -0,0 +1,98 @@
+import json
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict
+
+from .SynthesisRequest import SynthesisRequest
+from .SynthesisService import ServiceBusyError, SynthesisService
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    server: "SynthesisHttpServer"
+
+    def _send_json(self, status: int, body: Dict[str, Any]):
+        content = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def _send_error(self, status: int, error: Exception):
+        self._send_json(status, {"error": str(error)})
+
+    def _read_request(self) -> SynthesisRequest:
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length))
+        if not isinstance(body, dict):
+            raise ValueError("The request must be a JSON object.")
+        request = SynthesisRequest.from_json(body)
+        if request.file is not None and not self.server.allow_files:
+            raise ValueError(
+                "Reading files is not allowed, send the score data instead."
+            )
+        if request.file is None and request.data is None:
+            raise ValueError("Either the file or the data must be given.")
+        return request
+
+    def do_GET(self):
+        if self.path == "/metrics":
+            self._send_json(200, self.server.service.metrics())
+        else:
+            self._send_json(404, {"error": f"Unknown path {self.path}"})
+
+    def do_POST(self):
+        if self.path != "/synthesize":
+            self._send_json(404, {"error": f"Unknown path {self.path}"})
+            return
+
+        try:
+            request = self._read_request()
+            future = self.server.service.submit(request)
+            result = future.result(self.server.request_timeout)
+        except (ValueError, TypeError) as e:
+            self._send_error(400, e)
+        except ServiceBusyError as e:
+            self._send_error(503, e)
+        except FutureTimeoutError as e:
+            self._send_error(504, e)
+        except Exception as e:
+            self._send_error(500, e)
+        else:
+            self._send_json(200, result.to_json())
+
+
+class SynthesisHttpServer(ThreadingHTTPServer):
+    """Local HTTP/JSON interface of the `SynthesisService`.
+
+    - `POST /synthesize` takes a `SynthesisRequest` as a JSON object
+      and responds with the `SynthesisResult` (the image in base64).
+      Status 400 means an invalid request and 503 a full request queue.
+    - `GET /metrics` responds with the service metrics.
+
+    The server listens on localhost by default. Requests must send the
+    score data, reading files of the server is allowed only explicitly.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        service: SynthesisService,
+        host: str = "127.0.0.1",
+        port: int = 8000,
+        allow_files: bool = False,
+        request_timeout: float = 300.0
+    ):
+        """
+        :param service: The started service to serve requests with
+        :param host: Address to listen on
+        :param port: Port to listen on (0 picks a free port)
+        :param allow_files: Accept requests with file paths on the server
+        :param request_timeout: Seconds to wait for a result before
+            responding with status 504
+        """
+        super().__init__((host, port), _RequestHandler)
+        self.service = service
+        self.allow_files = allow_files
+        self.request_timeout = request_timeout
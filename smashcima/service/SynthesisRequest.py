@@ -0,0 +1,87 @@
+import base64
+from dataclasses import asdict, dataclass, field, fields
+from typing import Any, Dict, Optional
+
+
+@dataclass
+class SynthesisRequest:
+    """One page to be synthesized by the `SynthesisService`"""
+
+    file: Optional[str] = None
+    "Path to the input score file (on the machine running the service)"
+
+    data: Optional[str] = None
+    "Contents of the input score file, used instead of the file"
+
+    format: Optional[str] = None
+    "Format of the input data (e.g. '.musicxml'), see `load_score`"
+
+    seed: Optional[int] = None
+    "Seed of the sample, the randomness just continues when not given"
+
+    sample_key: str = ""
+    "Name of the sample, used together with the seed (see `Model.seed`)"
+
+    writer: Optional[int] = None
+    "MUSCIMA++ writer to use instead of a randomly picked one"
+
+    paper_patch: Optional[int] = None
+    """Index of the MZK paper patch (see `MzkPaperStyleDomain.all_patches`)
+    to use instead of a randomly picked one"""
+
+    page: int = 0
+    "Index of the page to render"
+
+    dpi: Optional[float] = None
+    "Renders at this DPI instead of the model's one (e.g. 75 for a preview)"
+
+    image_format: str = "png"
+    "Format of the returned image, see `ImageEncoder.FORMATS`"
+
+    quality: Optional[int] = None
+    "JPEG or WebP quality 0-100, None for the OpenCV default"
+
+    @staticmethod
+    def from_json(json: Dict[str, Any]) -> "SynthesisRequest":
+        """Builds the request from its JSON object, unknown keys are
+        rejected with a `ValueError`"""
+        known = set(f.name for f in fields(SynthesisRequest))
+        unknown = set(json.keys()) - known
+        if len(unknown) > 0:
+            raise ValueError(
+                f"Unknown request fields: {', '.join(sorted(unknown))}"
+            )
+        return SynthesisRequest(**json)
+
+    def to_json(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+@dataclass
+class SynthesisResult:
+    """The rendered page of a `SynthesisRequest`"""
+
+    image: bytes
+    "The encoded image file"
+
+    image_format: str
+    "Format of the image, see `ImageEncoder.FORMATS`"
+
+    page_count: int
+    "Number of pages the score has been synthesized into"
+
+    writer: int
+    "The MUSCIMA++ writer used for the page"
+
+    paper_patch: int
+    "Index of the MZK paper patch used for the page"
+
+    metadata: Dict[str, Any] = field(default_factory=dict)
+    """Information about how the request was served
+    (e.g. the time spent in the queue and in synthesis)"""
+
+    def to_json(self) -> Dict[str, Any]:
+        """JSON object of the result, with the image encoded in base64"""
+        json = asdict(self)
+        json["image"] = base64.b64encode(self.image).decode("ascii")
+        return json
@@ -0,0 +1,397 @@
+import asyncio
+import itertools
+import multiprocessing
+import os
+import pickle
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from smashcima.batch.ImageEncoder import ImageEncoder
+from smashcima.LruCache import LruCache
+from smashcima.orchestration.Model import Model
+from smashcima.scene import LinkSnapshot, Score
+
+from .ServiceMetrics import ServiceMetrics
+from .ServiceModels import BaseServiceModel, ServiceStyler
+from .SynthesisRequest import SynthesisRequest, SynthesisResult
+
+
+class ServiceBusyError(Exception):
+    """Raised when the request queue of the `SynthesisService` is full"""
+    pass
+
+
+def _cached_score(
+    model: Model,
+    request: SynthesisRequest,
+    score_cache: LruCache[Tuple[Score, LinkSnapshot]]
+) -> Tuple[Score, LinkSnapshot]:
+    """Returns the parsed score of the requested file, parsed again only
+    when the file has changed since"""
+    assert request.file is not None
+    path = Path(request.file).resolve()
+    key = (str(path), path.stat().st_mtime_ns, request.format)
+    entry = score_cache.get(key)
+    if entry is None:
+        score = model.load_score(file=path, format=request.format)
+        entry = (score, LinkSnapshot(score))
+        score_cache.put(key, entry)
+    return entry
+
+
+def synthesize_request(
+    model: Model,
+    request: SynthesisRequest,
+    score_cache: Optional[LruCache[Tuple[Score, LinkSnapshot]]] = None
+) -> SynthesisResult:
+    """Serves one request with a service model (see `BaseServiceModel`).
+
+    The requested styles are applied after the styler picks its random
+    styles, so a seeded request consumes the same randomness whether
+    its styles are overridden or not.
+
+    With a score cache, requested files are parsed only once and
+    the cached score is synthesized again and again, the links attached
+    to it by each synthesis are detached afterwards (see `LinkSnapshot`).
+    """
+    styler = model.styler
+    if not isinstance(styler, ServiceStyler):
+        raise TypeError(
+            "The model must use the ServiceStyler, see BaseServiceModel."
+        )
+    mpp_domain = model.mpp_style_domain
+    paper_domain = model.mzk_paper_style_domain
+
+    overrides: List[Callable[[], None]] = []
+    if request.writer is not None:
+        writer = request.writer
+        if writer not in mpp_domain.all_writers:
+            raise ValueError(f"There is no writer {writer}.")
+        overrides.append(
+            lambda: setattr(mpp_domain, "current_writer", writer)
+        )
+    if request.paper_patch is not None:
+        if not 0 <= request.paper_patch < len(paper_domain.all_patches):
+            raise ValueError(f"There is no paper patch {request.paper_patch}.")
+        patch = paper_domain.all_patches[request.paper_patch]
+        overrides.append(
+            lambda: setattr(paper_domain, "current_patch", patch)
+        )
+    encoder = ImageEncoder(request.image_format, quality=request.quality)
+
+    snapshot: Optional[LinkSnapshot] = None
+    if score_cache is not None and request.file is not None:
+        score, snapshot = _cached_score(model, request, score_cache)
+        input_kwargs: Dict[str, Any] = {"score": score}
+    else:
+        input_kwargs = {
+            "file": request.file,
+            "data": request.data,
+            "format": request.format
+        }
+
+    styler.overrides = overrides
+    try:
+        scene = model(
+            **input_kwargs,
+            seed=request.seed,
+            sample_key=request.sample_key
+        )
+        if not 0 <= request.page < len(scene.pages):
+            raise ValueError(
+                f"There is no page {request.page}, " +
+                f"the score has {len(scene.pages)} pages."
+            )
+        bitmap = scene.render(scene.pages[request.page], dpi=request.dpi)
+    finally:
+        styler.overrides = []
+        model.scene = None
+        if snapshot is not None:
+            snapshot.restore()
+
+    return SynthesisResult(
+        image=encoder.encode(bitmap),
+        image_format=request.image_format,
+        page_count=len(scene.pages),
+        writer=scene.mpp_writer,
+        paper_patch=paper_domain.all_patches.index(scene.mzk_background_patch)
+    )
+
+
+def _picklable(error: Exception) -> Exception:
+    try:
+        pickle.loads(pickle.dumps(error))
+        return error
+    except Exception:
+        return Exception(f"{type(error).__name__}: {error}")
+
+
+def _service_worker(
+    model_factory: Callable[[], Model],
+    score_cache_size: int,
+    requests: Any,
+    results: Any
+):
+    """Body of a worker process, serves requests with its own model"""
+    score_cache: Optional[LruCache[Tuple[Score, LinkSnapshot]]] = \
+        LruCache(max_entries=score_cache_size) if score_cache_size > 0 \
+        else None
+    try:
+        model = model_factory()
+    except Exception as e:
+        results.put(("failed", os.getpid(), _picklable(e)))
+        return
+    results.put(("ready", os.getpid(), None))
+
+    while True:
+        message = requests.get()
+        if message is None:
+            break
+        request_id, request = message
+        started_at = time.monotonic()
+        try:
+            result: Optional[SynthesisResult] = \
+                synthesize_request(model, request, score_cache)
+            error: Optional[Exception] = None
+        except Exception as e:
+            result = None
+            error = _picklable(e)
+        results.put(
+            ("done", request_id, (result, error, started_at, time.monotonic()))
+        )
+
+
+class SynthesisService:
+    """Long-running synthesis with a pool of warm models.
+
+    Building a model loads all the assets and takes much longer than
+    synthesizing a page. The service builds the models once, each in its
+    own worker process, and then serves synthesis requests from a bounded
+    queue, so that interactive front ends (e.g. the gradio demo) and batch
+    clients share the same warm models. When the queue is full, requests
+    are rejected (or the caller waits, see `submit`), which keeps the
+    latency of accepted requests bounded.
+
+    Requests may pin the writer and the paper patch, the other styles are
+    picked randomly (see `SynthesisRequest`). Throughput and latency
+    metrics are collected for all requests (see `metrics`).
+    """
+
+    def __init__(
+        self,
+        model_factory: Callable[[], Model] = BaseServiceModel,
+        workers: int = 1,
+        queue_size: int = 16,
+        score_cache_size: int = 16,
+        context: Optional[Any] = None
+    ):
+        """
+        :param model_factory: Builds the model of a worker (e.g. the model
+            class), must use the `ServiceStyler` (see `BaseServiceModel`)
+        :param workers: Number of worker processes, each with one model
+        :param queue_size: Maximum number of requests waiting for a worker
+        :param score_cache_size: Number of parsed scores of requested files
+            each worker keeps, 0 parses the file for every request
+        :param context: Multiprocessing context the workers are started
+            with (the default context by default)
+        """
+        self.model_factory = model_factory
+        self.workers = workers
+        self.queue_size = queue_size
+        self.score_cache_size = score_cache_size
+        self.metrics_counters = ServiceMetrics()
+        "Throughput and latency counters, see `metrics`"
+
+        self._context = context or multiprocessing.get_context()
+        self._requests = self._context.Queue(maxsize=queue_size)
+        self._results = self._context.Queue()
+        self._processes: List[Any] = []
+        self._collector: Optional[threading.Thread] = None
+        self._pending: Dict[int, Tuple[Future, float]] = {}
+        self._pending_lock = threading.Lock()
+        self._request_ids = itertools.count()
+        self._ready = threading.Event()
+        self._ready_count = 0
+        self._startup_error: Optional[Exception] = None
+        self._closing = False
+
+    @property
+    def running(self) -> bool:
+        return self._ready.is_set() and not self._closing
+
+    def start(self, timeout: Optional[float] = None):
+        """Starts the workers and waits until all their models are built"""
+        if self._collector is not None:
+            raise Exception("The service has already been started.")
+        for _ in range(self.workers):
+            process = self._context.Process(
+                target=_service_worker,
+                args=(
+                    self.model_factory,
+                    self.score_cache_size,
+                    self._requests,
+                    self._results
+                ),
+                daemon=True
+            )
+            process.start()
+            self._processes.append(process)
+        self._collector = threading.Thread(target=self._collect, daemon=True)
+        self._collector.start()
+
+        if not self._ready.wait(timeout):
+            self.close()
+            raise TimeoutError("The service workers did not start in time.")
+        if self._startup_error is not None:
+            error = self._startup_error
+            self.close()
+            raise Exception("A service worker failed to start.") from error
+
+    def submit(
+        self,
+        request: SynthesisRequest,
+        block: bool = False,
+        timeout: Optional[float] = None
+    ) -> "Future[SynthesisResult]":
+        """Enqueues the request and returns the future of its result.
+
+        :param block: Wait for a place in the queue when it is full,
+            instead of raising the `ServiceBusyError`
+        :param timeout: How long to wait for a place in the queue
+        """
+        if not self.running:
+            raise Exception("The service is not running.")
+
+        future: "Future[SynthesisResult]" = Future()
+        request_id = next(self._request_ids)
+        with self._pending_lock:
+            self._pending[request_id] = (future, time.monotonic())
+        try:
+            self._requests.put((request_id, request), block, timeout)
+        except queue.Full:
+            with self._pending_lock:
+                del self._pending[request_id]
+            self.metrics_counters.record_rejected()
+            raise ServiceBusyError(
+                f"The request queue is full ({self.queue_size} requests)."
+            )
+        self.metrics_counters.record_submitted()
+        return future
+
+    def synthesize(
+        self,
+        request: SynthesisRequest,
+        timeout: Optional[float] = None
+    ) -> SynthesisResult:
+        """Serves the request and waits for the result, waits for a place
+        in the queue when it is full"""
+        return self.submit(request, block=True).result(timeout)
+
+    async def synthesize_async(
+        self,
+        request: SynthesisRequest
+    ) -> SynthesisResult:
+        """Serves the request without blocking the event loop,
+        raises the `ServiceBusyError` when the queue is full"""
+        return await asyncio.wrap_future(self.submit(request))
+
+    def metrics(self) -> Dict[str, Any]:
+        """Returns the throughput and latency metrics
+        as a JSON-serializable dictionary"""
+        metrics = self.metrics_counters.snapshot()
+        metrics["workers"] = self.workers
+        metrics["queue_size"] = self.queue_size
+        return metrics
+
+    def _collect(self):
+        """Body of the thread that resolves futures with worker results"""
+        while True:
+            try:
+                message = self._results.get(timeout=1.0)
+            except queue.Empty:
+                self._check_workers()
+                continue
+            if message is None:
+                break
+            kind, source, payload = message
+            if kind == "ready":
+                self._ready_count += 1
+                if self._ready_count == self.workers:
+                    self._ready.set()
+            elif kind == "failed":
+                self._startup_error = payload
+                self._ready.set()
+            elif kind == "done":
+                self._resolve(source, *payload)
+
+    def _resolve(
+        self,
+        request_id: int,
+        result: Optional[SynthesisResult],
+        error: Optional[Exception],
+        started_at: float,
+        finished_at: float
+    ):
+        with self._pending_lock:
+            pending = self._pending.pop(request_id, None)
+        if pending is None:
+            return # failed already, when another worker died
+        future, submitted_at = pending
+        queue_seconds = started_at - submitted_at
+        synthesis_seconds = finished_at - started_at
+        total_seconds = time.monotonic() - submitted_at
+        self.metrics_counters.record_finished(
+            queue_seconds,
+            synthesis_seconds,
+            total_seconds,
+            failed=error is not None
+        )
+        if error is not None:
+            future.set_exception(error)
+            return
+        assert result is not None
+        result.metadata["queue_seconds"] = queue_seconds
+        result.metadata["synthesis_seconds"] = synthesis_seconds
+        future.set_result(result)
+
+    def _check_workers(self):
+        """Fails all pending requests when a worker process died,
+        since its request would never be answered"""
+        if self._closing or all(p.is_alive() for p in self._processes):
+            return
+        self._closing = True
+        if not self._ready.is_set():
+            self._startup_error = Exception(
+                "A service worker process died while starting."
+            )
+        self._ready.set()
+        with self._pending_lock:
+            pending = list(self._pending.values())
+            self._pending.clear()
+        for future, _ in pending:
+            future.set_exception(
+                Exception("A service worker process died.")
+            )
+
+    def close(self):
+        """Stops the workers, once they have served the queued requests"""
+        self._closing = True
+        for process in self._processes:
+            if process.is_alive():
+                self._requests.put(None)
+        for process in self._processes:
+            process.join()
+        if self._collector is not None:
+            self._results.put(None)
+            self._collector.join()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
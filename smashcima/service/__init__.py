@@ -0,0 +1,6 @@
+from .ServiceMetrics import ServiceMetrics
+from .ServiceModels import BaseServiceModel, ServiceStyler, TweakedServiceModel
+from .SynthesisHttpServer import SynthesisHttpServer
+from .SynthesisRequest import SynthesisRequest, SynthesisResult
+from .SynthesisService import (ServiceBusyError, SynthesisService,
+                               synthesize_request)
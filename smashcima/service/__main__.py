@@ -0,0 +1,56 @@
+import argparse
+
+from .ServiceModels import BaseServiceModel, TweakedServiceModel
+from .SynthesisHttpServer import SynthesisHttpServer
+from .SynthesisService import SynthesisService
+
+MODEL_TYPES = {
+    "base": BaseServiceModel,
+    "tweaked": TweakedServiceModel
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Serves synthesis requests over a local HTTP/JSON API"
+    )
+    parser.add_argument("--host", type=str, default="127.0.0.1",
+                        help="Address to listen on")
+    parser.add_argument("--port", type=int, default=8000,
+                        help="Port to listen on")
+    parser.add_argument("--model", type=str, default="base",
+                        choices=list(MODEL_TYPES.keys()),
+                        help="Model the workers synthesize with")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Number of worker processes with warm models")
+    parser.add_argument("--queue-size", type=int, default=16,
+                        help="Requests waiting for a worker before " +
+                        "new ones are rejected")
+    parser.add_argument("--allow-files", action="store_true",
+                        help="Accept requests with paths to files " +
+                        "on this machine")
+    args = parser.parse_args()
+
+    with SynthesisService(
+        model_factory=MODEL_TYPES[args.model],
+        workers=args.workers,
+        queue_size=args.queue_size
+    ) as service:
+        server = SynthesisHttpServer(
+            service,
+            host=args.host,
+            port=args.port,
+            allow_files=args.allow_files
+        )
+        print(f"Serving on http://{args.host}:{server.server_port}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+
+
+# python3 -m smashcima.service --workers 2
+if __name__ == "__main__":
+    main()
@@ -21,6 +21,7 @@ from smashcima.scene.semantic.TypeDuration import TypeDuration
 from smashcima.geometry.Transform import Transform
 from smashcima.scene.SmuflLabels import SmuflLabels
 from smashcima.scene.visual.SystemMeasure import SystemMeasure
+from smashcima.StageTimer import timed_laps, timed_stage
 from smashcima.synthesis.GlyphSynthesizer import GlyphSynthesizer
 from ..BeamStemSynthesizer import BeamStemSynthesizer
 from ...LineSynthesizer import LineSynthesizer
@@ -231,6 +232,8 @@ class ColumnLayoutSynthesizer:
             assert staff_visual.space.parent_space is page_space, \
                 "Given staves do not live in the given page space"
 
+        laps = timed_laps()
+
         # === phase 1: synthesizing columns ===
 
         state = _SystemState(
@@ -301,6 +304,8 @@ class ColumnLayoutSynthesizer:
             while state.total_width >= available_width and state.measure_count > 1:
                 state.delete_measure(state.measure_indices[-1])
 
+        laps.lap("phase_1_columns")
+
         # === phase 2: placing columns ===
 
         # tight or flexbox stretch
@@ -319,6 +324,8 @@ class ColumnLayoutSynthesizer:
                 if isinstance(column, ColumnBase):
                     column.place_debug_boxes()
 
+        laps.lap("phase_2_placement")
+
         # === phase 3: construct the system object ===
 
         # TODO: create layout bboxes and add them to the system
@@ -383,20 +390,25 @@ class ColumnLayoutSynthesizer:
                 )
             )
 
+        laps.lap("phase_3_system")
+
         # === phase 4: synthesizing beams, stems and flags ===
 
         for i in range(system.measure_count):
             score_measure = score.get_score_measure(
                 system.first_measure_index + i
             )
-            self.beam_stem_synthesizer.synthesize_beams_and_stems_for_measure(
-                page_space,
-                score_measure
-            )
-            self.synthesize_flags_in_measure(
-                page_space,
-                score_measure
-            )
+            with timed_stage("beams_stems"):
+                self.beam_stem_synthesizer \
+                    .synthesize_beams_and_stems_for_measure(
+                        page_space,
+                        score_measure
+                    )
+            with timed_stage("flags"):
+                self.synthesize_flags_in_measure(
+                    page_space,
+                    score_measure
+                )
         
         # === phase 5: replacing ligatures ===
 
@@ -139,6 +139,6 @@ class Quilter:
     def random_patch(self, source_texture: np.ndarray, block_size_px: int):
         """Take a random square block patch from the source texture"""
         h, w, _ = source_texture.shape
-        i = np.random.randint(h - block_size_px)
-        j = np.random.randint(w - block_size_px)
+        i = self.rng.randrange(h - block_size_px)
+        j = self.rng.randrange(w - block_size_px)
         return source_texture[i:i+block_size_px, j:j+block_size_px]
@@ -7,6 +7,7 @@ from smashcima.scene.ViewBox import ViewBox
 from smashcima.scene.AffineSpace import AffineSpace
 from .StafflinesSynthesizer import StafflinesSynthesizer
 from .PaperSynthesizer import PaperSynthesizer
+from smashcima.StageTimer import timed_stage
 from typing import List
 from dataclasses import dataclass
 
@@ -74,16 +75,18 @@ class SimplePageSynthesizer:
             space=page_space
         )
 
-        self.paper_synthesizer.synthesize_paper(
-            page_space=page_space,
-            placement=Rectangle(
-                0, 0,
-                self.page_setup.size.x,
-                self.page_setup.size.y
+        with timed_stage("paper"):
+            self.paper_synthesizer.synthesize_paper(
+                page_space=page_space,
+                placement=Rectangle(
+                    0, 0,
+                    self.page_setup.size.x,
+                    self.page_setup.size.y
+                )
             )
-        )
 
-        staves = self._synthesize_stafflines(page_space)
+        with timed_stage("stafflines"):
+            staves = self._synthesize_stafflines(page_space)
 
         return Page(
             space=page_space,
@@ -0,0 +1,26 @@
+import unittest
+
+from smashcima.LruCache import LruCache
+
+
+class LruCacheTest(unittest.TestCase):
+    def test_it_evicts_least_recently_used(self):
+        cache: LruCache[str] = LruCache(max_entries=2)
+        cache.put("a", "A")
+        cache.put("b", "B")
+        assert cache.get("a") == "A"
+        cache.put("c", "C")
+        assert "b" not in cache
+        assert cache.get("a") == "A"
+        assert cache.get("b") is None
+        assert (cache.hits, cache.misses) == (2, 1)
+
+    def test_it_bounds_total_size(self):
+        cache: LruCache[bytes] = LruCache(max_size=10, size_of=len)
+        cache.put("a", b"aaaa")
+        cache.put("b", b"bbbb")
+        cache.put("c", b"cccc")
+        assert "a" not in cache and "c" in cache
+        assert cache.size == 8
+        cache.put("big", b"x" * 11)
+        assert "big" not in cache and len(cache) == 2
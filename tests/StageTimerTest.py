@@ -0,0 +1,56 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from smashcima.orchestration.Model import Model
+from smashcima.scene import AffineSpace, Scene
+from smashcima.StageTimer import StageTimer, timed_laps, timed_stage
+
+
+class _TimedModel(Model[Scene]):
+    def call(self, name: str = "") -> Scene:
+        for _ in range(3):
+            with timed_stage("page"):
+                laps = timed_laps()
+                laps.lap("phase_1")
+                with timed_stage("beams"):
+                    pass
+        return Scene(AffineSpace())
+
+
+class StageTimerTest(unittest.TestCase):
+    def test_disabled_timer_leaves_no_metrics(self):
+        scene = _TimedModel()()
+        assert scene.metrics == {}
+        with timed_stage("render", scene.metrics):
+            pass
+        assert scene.metrics == {}
+
+    def test_it_attaches_a_stage_tree_to_the_scene(self):
+        model = _TimedModel()
+        model.timer.enabled = True
+        scene = model(seed=1)
+
+        stages = scene.metrics["stages"]
+        assert set(stages.keys()) == {"pick_style", "page"}
+        assert stages["page"]["calls"] == 3
+        assert stages["page"]["stages"]["phase_1"]["calls"] == 3
+        assert stages["page"]["stages"]["beams"]["calls"] == 3
+        assert scene.metrics["seconds"] >= stages["page"]["seconds"]
+
+        # rendering after the synthesis is added to the scene metrics
+        with timed_stage("render", scene.metrics):
+            pass
+        assert scene.metrics["stages"]["render"]["calls"] == 1
+
+    def test_it_emits_jsonl(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "timings.jsonl"
+            model = _TimedModel()
+            model.timer = StageTimer(enabled=True, jsonl_path=path)
+            list(model.stream(["a", "b"], seeds=7))
+            lines = [json.loads(l) for l in path.read_text().splitlines()]
+        assert [l["sample_key"] for l in lines] == ["a", "b"]
+        assert lines[0]["seed"] == 7
+        assert lines[0]["metrics"]["stages"]["page"]["calls"] == 3
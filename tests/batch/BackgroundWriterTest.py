@@ -0,0 +1,31 @@
+import threading
+import unittest
+
+from smashcima.batch.BackgroundWriter import BackgroundWriter
+
+
+class BackgroundWriterTest(unittest.TestCase):
+    def test_it_runs_tasks(self):
+        with BackgroundWriter(threads=2) as writer:
+            futures = [writer.submit(lambda x: x * 2, i) for i in range(10)]
+            assert [f.result() for f in futures] == list(range(0, 20, 2))
+
+    def test_it_blocks_when_too_many_tasks_are_pending(self):
+        release = threading.Event()
+        writer = BackgroundWriter(threads=1, max_pending=2)
+        writer.submit(release.wait)
+        writer.submit(release.wait)
+
+        submitted = threading.Event()
+        def submit_third():
+            writer.submit(lambda: None)
+            submitted.set()
+        thread = threading.Thread(target=submit_third)
+        thread.start()
+
+        # the third task waits for a free slot
+        assert not submitted.wait(timeout=0.1)
+        release.set()
+        assert submitted.wait(timeout=5)
+        thread.join()
+        writer.close()
@@ -0,0 +1,85 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from smashcima.batch.FolderSink import FolderSink
+from smashcima.batch.Manifest import Manifest, ManifestRecord, hash_bytes
+
+
+class ManifestTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.folder = Path(self.tmp.name)
+        self.path = self.folder / "manifest.jsonl"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _write_output(self, name: str, data: bytes) -> ManifestRecord:
+        (self.folder / name).write_bytes(data)
+        return ManifestRecord(
+            file=name + ".musicxml",
+            seed=1,
+            model_type="base",
+            outputs=[name],
+            hashes=[hash_bytes(data)]
+        )
+
+    def test_it_resumes_completed_items(self):
+        with Manifest(self.path) as manifest:
+            manifest.start_run(42)
+            manifest.add(self._write_output("a.png", b"aaa"))
+
+        with Manifest(self.path) as manifest:
+            assert manifest.run_seed == 42
+            assert manifest.is_done("a.png.musicxml", 1, "base")
+            assert not manifest.is_done("a.png.musicxml", 2, "base")
+            assert not manifest.is_done("b.png.musicxml", 1, "base")
+
+    def test_it_ignores_half_written_line(self):
+        with Manifest(self.path) as manifest:
+            manifest.start_run(42)
+            manifest.add(self._write_output("a.png", b"aaa"))
+        with open(self.path, "a") as file:
+            file.write('{"type": "item", "file": "b.png.mus')
+
+        with Manifest(self.path) as manifest:
+            assert len(manifest.records) == 1
+
+    def test_it_resumes_after_half_written_line(self):
+        with Manifest(self.path) as manifest:
+            manifest.start_run(42)
+            manifest.add(self._write_output("a.png", b"aaa"))
+        with open(self.path, "a") as file:
+            file.write('{"type": "item", "file": "b.png.mus')
+
+        with Manifest(self.path) as manifest:
+            manifest.add(self._write_output("c.png", b"ccc"))
+
+        with Manifest(self.path) as manifest:
+            assert manifest.is_done("a.png.musicxml", 1, "base")
+            assert manifest.is_done("c.png.musicxml", 1, "base")
+            assert len(manifest.records) == 2
+
+    def test_it_refuses_different_seed(self):
+        with Manifest(self.path) as manifest:
+            manifest.start_run(42)
+        with Manifest(self.path) as manifest:
+            with self.assertRaises(Exception):
+                manifest.start_run(43)
+
+    def test_it_detects_corrupted_outputs(self):
+        with Manifest(self.path) as manifest:
+            manifest.start_run(42)
+            manifest.add(self._write_output("a.png", b"aaa"))
+            manifest.add(self._write_output("b.png", b"bbb"))
+            manifest.add(self._write_output("c.png", b"ccc"))
+        (self.folder / "b.png").write_bytes(b"b")
+        (self.folder / "c.png").unlink()
+
+        with Manifest(self.path) as manifest:
+            invalid = manifest.verify(FolderSink(self.folder).verify)
+            assert sorted(r.file for r in invalid) == \
+                ["b.png.musicxml", "c.png.musicxml"]
+            assert manifest.is_done("a.png.musicxml", 1, "base")
+            assert not manifest.is_done("b.png.musicxml", 1, "base")
@@ -0,0 +1,49 @@
+import pickle
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+from smashcima.batch.NpyPageArray import NpyPageArray
+
+
+class NpyPageArrayTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "pages.npy"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_it_fits_pages_into_rows(self):
+        pages = NpyPageArray(self.path, count=2, height=10, width=10)
+        pages.create()
+
+        # a transparent 20x40 page with an opaque black square
+        bitmap = np.zeros((20, 40, 4), dtype=np.uint8)
+        bitmap[0:4, 0:4, 3] = 255
+        fit = pages.write(1, bitmap)
+        assert (fit.scale, fit.offset_x, fit.offset_y) == (0.25, 0, 2)
+
+        array = np.load(self.path, mmap_mode="r")
+        assert array.shape == (2, 10, 10)
+        assert array[1, 2, 0] == 0 and array[1, 9, 9] == 255
+
+        annotations = {
+            "width": 40, "height": 20, "dpi": 300,
+            "regions": [{"label": "x", "bbox": [0, 0, 4, 4]}]
+        }
+        assert fit.apply(annotations)["regions"][0]["bbox"] == [0, 2, 1, 1]
+
+    def test_it_reopens_the_mapping_after_pickling(self):
+        pages = NpyPageArray(self.path, count=1, height=4, width=4)
+        pages.create()
+        copy = pickle.loads(pickle.dumps(pages))
+        copy.write(0, np.zeros((4, 4, 4), dtype=np.uint8))
+        assert pages.row_hash(0) == copy.row_hash(0)
+
+    def test_it_refuses_a_different_shape(self):
+        NpyPageArray(self.path, count=1, height=4, width=4).create()
+        with self.assertRaises(ValueError):
+            NpyPageArray(self.path, count=2, height=4, width=4).create()
@@ -0,0 +1,44 @@
+import multiprocessing
+import unittest
+
+import numpy as np
+
+from smashcima.batch.SharedPageRing import SharedPageRing
+
+
+def _produce(ring: SharedPageRing, pages: int):
+    for i in range(pages):
+        index, array = ring.acquire((4, 3, 4))
+        array[:] = i
+        ring.publish(index, array, {"page": i})
+        del array
+    ring.put_end()
+    ring.close()
+
+
+class SharedPageRingTest(unittest.TestCase):
+    def test_it_hands_pages_over_between_processes(self):
+        with SharedPageRing(slot_count=2, slot_size=64) as ring:
+            producer = multiprocessing.get_context().Process(
+                target=_produce, args=(ring, 5)
+            )
+            producer.start()
+
+            received = []
+            while True:
+                page = ring.get(timeout=10)
+                if page is None:
+                    break
+                with page:
+                    assert page.array is not None
+                    assert page.array.shape == (4, 3, 4)
+                    assert np.all(page.array == page.metadata["page"])
+                    received.append(page.metadata["page"])
+
+            producer.join()
+            assert received == [0, 1, 2, 3, 4]
+
+    def test_it_rejects_pages_larger_than_a_slot(self):
+        with SharedPageRing(slot_count=1, slot_size=16) as ring:
+            with self.assertRaises(ValueError):
+                ring.acquire((4, 4, 4))
@@ -0,0 +1,61 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from smashcima.batch.Sample import Sample
+from smashcima.batch.SqliteSink import SqliteDataset, SqliteSink
+
+
+def _sample(key: str) -> Sample:
+    return Sample(
+        key=key,
+        image=key.encode("utf-8") * 100,
+        image_extension=".png",
+        annotations={"regions": []},
+        metadata={
+            "file": key + ".musicxml",
+            "seed": 42,
+            "mpp_writer": 17,
+            "mzk_background_patch": {"mzk_uuid": "abc"}
+        }
+    )
+
+
+class SqliteSinkTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "dataset.sqlite"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_it_commits_in_batches(self):
+        with SqliteSink(self.path, batch_size=3) as sink:
+            for i in range(4):
+                sink.write(_sample(f"s{i}"))
+            assert sink.committed_count == 3
+            assert sink.verify("s2", _sample("s2").image_hash)
+            assert not sink.verify("s3", _sample("s3").image_hash)
+
+        with SqliteDataset(self.path) as dataset:
+            assert len(dataset) == 4
+            assert dataset[3].key == "s3"
+            sample = dataset.get("s1")
+            assert sample is not None
+            assert sample.image == _sample("s1").image
+            assert sample.metadata["mpp_writer"] == 17
+            assert dataset.get("missing") is None
+            row = dataset.connection.execute(
+                "SELECT seed, mpp_writer, mzk_background_patch " +
+                "FROM samples WHERE key = 's0'"
+            ).fetchone()
+            assert row == (42, 17, "abc")
+
+    def test_it_keeps_samples_stored_by_a_previous_run(self):
+        with SqliteSink(self.path) as sink:
+            sink.write(_sample("s0"))
+        with SqliteSink(self.path) as sink:
+            sink.write(_sample("s0"))
+            sink.write(_sample("s1"))
+        with SqliteDataset(self.path) as dataset:
+            assert [s.key for s in dataset] == ["s0", "s1"]
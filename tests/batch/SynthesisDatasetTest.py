@@ -0,0 +1,79 @@
+import pickle
+import unittest
+
+from smashcima.batch.SynthesisDataset import SynthesisDataset
+from smashcima.exporting import BitmapRenderer
+from smashcima.geometry import Point, Rectangle, Transform, Vector2
+from smashcima.geometry.Contours import Contours
+from smashcima.geometry.Polygon import Polygon
+from smashcima.orchestration import BaseHandwrittenScene
+from smashcima.orchestration.Model import Model
+from smashcima.scene import (AffineSpace, LabeledRegion, Page, Sprite,
+                             ViewBox)
+from smashcima.scene.semantic.Score import Score
+
+
+class _BoxModel(Model[BaseHandwrittenScene]):
+    """Draws one box at a random position on a tiny page"""
+
+    def call(self, file: str) -> BaseHandwrittenScene:
+        root_space = AffineSpace()
+        space = AffineSpace(
+            parent_space=root_space,
+            transform=Transform.translate(Vector2(0, 0))
+        )
+        x = self.rng.uniform(0, 8)
+        Sprite.rectangle(space, Rectangle(x, 0, 2, 2), (0, 0, 0, 255))
+        LabeledRegion(
+            space=space,
+            contours=Contours([Polygon([
+                Point(x, 0), Point(x + 2, 0), Point(x + 2, 2), Point(x, 2)
+            ])]),
+            label=file
+        )
+        view_box = ViewBox(space=space, rectangle=Rectangle(0, 0, 10, 10))
+        page = Page(space=space, view_box=view_box)
+        return BaseHandwrittenScene(
+            root_space, Score(parts=[]), 0, None, # type: ignore
+            [page], BitmapRenderer(dpi=100)
+        )
+
+
+class SynthesisDatasetTest(unittest.TestCase):
+    def _labels(self, dataset: SynthesisDataset):
+        return {
+            annotations["regions"][0]["label"]: image.tobytes()
+            for image, annotations in dataset
+        }
+
+    def test_shards_partition_the_inputs(self):
+        inputs = [f"score_{i}.musicxml" for i in range(5)]
+        full = self._labels(SynthesisDataset(inputs, 1, _BoxModel))
+        assert len(full) == 5
+
+        parts = [
+            self._labels(SynthesisDataset(inputs, 1, _BoxModel, 2, i))
+            for i in range(2)
+        ]
+        assert len(parts[0]) == 3 and len(parts[1]) == 2
+        assert {**parts[0], **parts[1]} == full
+
+    def test_epochs_produce_new_variants(self):
+        dataset = SynthesisDataset(["a.musicxml"], 1, _BoxModel)
+        first = self._labels(dataset)
+        dataset.set_epoch(1)
+        assert self._labels(dataset) != first
+
+    def test_same_names_in_different_folders_differ(self):
+        dataset = SynthesisDataset(
+            ["one/a.musicxml", "two/a.musicxml"], 1, _BoxModel
+        )
+        assert dataset.keys == ["one/a.musicxml", "two/a.musicxml"]
+        images = [image.tobytes() for image, _ in dataset]
+        assert images[0] != images[1]
+
+    def test_model_is_built_in_each_worker(self):
+        dataset = SynthesisDataset(["a.musicxml"], 1, _BoxModel)
+        dataset.model
+        copy = pickle.loads(pickle.dumps(dataset))
+        assert copy._model is None
@@ -0,0 +1,89 @@
+import json
+import tarfile
+import tempfile
+import unittest
+from pathlib import Path
+
+from smashcima.batch.Sample import Sample
+from smashcima.batch.TarShardSink import TarShardSink, read_tar_shard_sample
+
+
+def _sample(key: str, size: int = 1000) -> Sample:
+    return Sample(
+        key=key,
+        image=bytes([len(key)]) * size,
+        image_extension=".png",
+        annotations={"regions": []},
+        metadata={"file": key + ".musicxml"}
+    )
+
+
+class TarShardSinkTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.folder = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_it_writes_webdataset_shards(self):
+        with TarShardSink(self.folder, shard_size=5000) as sink:
+            outputs = [sink.write(_sample(f"s{i}")) for i in range(6)]
+
+        assert outputs[0] == "shard-000000.tar/s0"
+        shards = sorted(p.name for p in self.folder.glob("*.tar"))
+        assert len(shards) == 3 # two samples per shard
+        with tarfile.open(self.folder / shards[0]) as archive:
+            assert archive.getnames()[:3] == \
+                ["s0.png", "s0.json", "s0.meta.json"]
+
+        entries = [json.loads(l) for l in open(self.folder / "index.jsonl")]
+        assert [e["key"] for e in entries] == [f"s{i}" for i in range(6)]
+        files = read_tar_shard_sample(self.folder, entries[4])
+        assert files["s4.png"] == _sample("s4").image
+
+    def test_it_drops_half_written_sample_on_resume(self):
+        sink = TarShardSink(self.folder)
+        sink.write(_sample("a"))
+        sink.write(_sample("b"))
+        sink.close()
+
+        # simulate pre-emption in the middle of writing a sample
+        shard = self.folder / "shard-000000.tar"
+        end = json.loads(open(self.folder / "index.jsonl").readlines()[-1])["end"]
+        with open(shard, "r+b") as file:
+            file.truncate(end)
+            file.seek(end)
+            file.write(b"garbage" * 100)
+        with open(self.folder / "index.jsonl", "a") as file:
+            file.write('{"key": "c", "sha')
+
+        with TarShardSink(self.folder) as sink:
+            assert set(sink.index.keys()) == {"a", "b"}
+            assert sink.verify("shard-000000.tar/b", _sample("b").image_hash)
+            sink.write(_sample("c"))
+            sink.write(_sample("a")) # already stored, ignored
+
+        with tarfile.open(shard) as archive:
+            assert [n for n in archive.getnames() if n.endswith(".png")] \
+                == ["a.png", "b.png", "c.png"]
+
+    def test_input_shards_share_a_folder(self):
+        for part in range(2):
+            suffix = f"-{part:03d}of002"
+            with TarShardSink(
+                self.folder,
+                prefix="shard" + suffix,
+                index_name=f"index{suffix}.jsonl"
+            ) as sink:
+                sink.write(_sample(f"p{part}"))
+
+        # resuming the first part sees only its own samples
+        sink = TarShardSink(
+            self.folder,
+            prefix="shard-000of002",
+            index_name="index-000of002.jsonl"
+        )
+        assert list(sink.index.keys()) == ["p0"]
+        sink.close()
+        assert not (self.folder / "index.jsonl").exists()
@@ -0,0 +1,209 @@
+import unittest
+
+import cv2
+import numpy as np
+
+from smashcima.exporting import BitmapRenderer, PremultipliedCache
+from smashcima.geometry import (Point, Rectangle, Transform, Vector2,
+                                px_to_mm)
+from smashcima.scene import AffineSpace, Sprite, ViewBox
+
+
+class BitmapRendererTest(unittest.TestCase):
+    def setUp(self):
+        root_space = AffineSpace()
+        # a 300 DPI gradient, 100 x 50 mm
+        gradient = np.zeros((591, 1181, 4), dtype=np.uint8)
+        gradient[:, :, 0] = np.linspace(0, 255, 1181)[np.newaxis, :]
+        gradient[:, :, 3] = 255
+        Sprite(
+            space=root_space,
+            bitmap=gradient,
+            bitmap_origin=Point(0, 0),
+            dpi=300
+        )
+        self.view_box = ViewBox(root_space, Rectangle(0, 0, 100, 50))
+
+    def test_low_dpi_preview_matches_full_render(self):
+        renderer = BitmapRenderer(dpi=300)
+        full = renderer.render(self.view_box)
+        preview = renderer.at_dpi(75).render(self.view_box)
+
+        assert renderer.dpi == 300
+        assert preview.shape == renderer.at_dpi(75).bitmap_shape(self.view_box)
+        assert abs(preview.shape[1] * 4 - full.shape[1]) <= 4
+
+        shrunk = cv2.resize(
+            full,
+            (preview.shape[1], preview.shape[0]),
+            interpolation=cv2.INTER_AREA
+        )
+        # the sprite ends near x = 295 of the preview, skip its edges
+        inner = (slice(4, -4), slice(4, 280))
+        diff = np.abs(shrunk[inner].astype(int) - preview[inner].astype(int))
+        assert diff.max() <= 3
+
+    def test_tiles_match_a_single_tile(self):
+        rng = np.random.default_rng(0)
+        for i in range(20):
+            space = AffineSpace(
+                parent_space=self.view_box.space,
+                transform=Transform.rotateDegCC(rng.uniform(-30, 30))
+                    .then(Transform.scale(rng.uniform(0.5, 2)))
+                    .then(Transform.translate(
+                        Vector2(rng.uniform(0, 100), rng.uniform(0, 50))
+                    ))
+            )
+            Sprite(
+                space=space,
+                bitmap=rng.integers(0, 256, (30, 20, 4), dtype=np.uint8),
+                dpi=300
+            )
+
+        single = BitmapRenderer(dpi=300, tile_size=10000) \
+            .render(self.view_box)
+        tiled = BitmapRenderer(dpi=300, tile_size=64).render(self.view_box)
+
+        # the gradient is opaque, so colors are not amplified by
+        # un-premultiplying nearly transparent pixels
+        inner = (slice(4, -4), slice(4, 1150))
+        diff = np.abs(single[inner].astype(int) - tiled[inner].astype(int))
+        assert diff.max() <= 2
+
+    def test_renders_only_the_page_subtree(self):
+        rng = np.random.default_rng(1)
+        root_space = AffineSpace()
+        pages = []
+        for i in range(2):
+            page_origin = Vector2(i * 30, 0)
+            page_space = AffineSpace(
+                parent_space=root_space,
+                transform=Transform.translate(page_origin)
+            )
+            Sprite(
+                space=page_space,
+                bitmap=rng.integers(0, 256, (100, 80, 4), dtype=np.uint8),
+                bitmap_origin=Point(0, 0),
+                dpi=300
+            )
+            pages.append(ViewBox(
+                page_space,
+                Rectangle(page_origin.x, page_origin.y, 20, 20)
+            ))
+
+        # a sprite of the first page reaching over the second page
+        Sprite(
+            space=pages[0].space,
+            bitmap=np.full((100, 600, 4), 255, dtype=np.uint8),
+            bitmap_origin=Point(0, 0),
+            dpi=300
+        )
+
+        renderer = BitmapRenderer(dpi=300)
+        page = renderer.render(pages[1])
+        scene = renderer.render(ViewBox(root_space, pages[1].rectangle))
+        assert page[:, :, 3].any()
+        assert (page != scene).any()
+
+        # detaching the first page makes no difference to the second one
+        pages[0].space.parent_space = None
+        scene = renderer.render(ViewBox(root_space, pages[1].rectangle))
+        assert np.array_equal(page, scene)
+
+    def test_cached_bitmaps_render_the_same(self):
+        glyph = np.random.default_rng(2).integers(
+            0, 256, (40, 30, 4), dtype=np.uint8
+        )
+        for x in [10, 30, 50]:
+            # glyph instances sharing the same source bitmap
+            Sprite(
+                space=AffineSpace(
+                    parent_space=self.view_box.space,
+                    transform=Transform.translate(Vector2(x, 20))
+                ),
+                bitmap=glyph,
+                dpi=300
+            )
+
+        cache = PremultipliedCache()
+        uncached = BitmapRenderer(
+            dpi=300, bitmap_cache=PremultipliedCache(max_bytes=0)
+        )
+        cached = BitmapRenderer(dpi=300, bitmap_cache=cache)
+        expected = uncached.render(self.view_box)
+        assert np.array_equal(cached.render(self.view_box), expected)
+        assert len(cache) == 2 # the gradient and the glyph
+
+        # also at a preview DPI, where the bitmaps are shrunk first
+        expected = uncached.at_dpi(75).render(self.view_box)
+        assert np.array_equal(cached.at_dpi(75).render(self.view_box), expected)
+        assert len(cache) == 4
+
+        misses = cache.misses
+        cached.render(self.view_box)
+        assert cache.misses == misses
+
+    def test_bitmaps_modified_in_place_are_converted_again(self):
+        cache = PremultipliedCache()
+        renderer = BitmapRenderer(dpi=300, bitmap_cache=cache)
+        sprite = Sprite.many_of_space(self.view_box.space)[0]
+        before = renderer.render(self.view_box)
+
+        sprite.bitmap[:, :, 0] = 0
+        after = renderer.render(self.view_box)
+        assert before[:, :, 0].any() and not after[:, :, 0].any()
+
+    def test_large_bitmaps_are_not_cached(self):
+        cache = PremultipliedCache(max_bytes=64 * 2**20)
+        # the gradient takes about 11 MB as float32, over an eighth of 64 MB
+        BitmapRenderer(dpi=300, bitmap_cache=cache).render(self.view_box)
+        assert len(cache) == 0
+
+    def test_whole_pixel_shifts_are_blitted_exactly(self):
+        bitmap = np.random.default_rng(3).integers(
+            0, 256, (40, 30, 4), dtype=np.uint8
+        )
+        bitmap[:, :, 3] = 255
+        root_space = AffineSpace()
+        Sprite(
+            space=root_space,
+            bitmap=bitmap,
+            bitmap_origin=Point(0, 0),
+            dpi=300,
+            transform=Transform.translate(Vector2(
+                px_to_mm(17, dpi=300), px_to_mm(5, dpi=300)
+            ))
+        )
+        view_box = ViewBox(root_space, Rectangle(0, 0, 10, 10))
+        rendered = BitmapRenderer(dpi=300).render(view_box)
+
+        diff = np.abs(
+            rendered[5:45, 17:47].astype(int) - bitmap.astype(int)
+        )
+        assert diff.max() <= 1
+        assert rendered[:, :, 3].sum() == rendered[5:45, 17:47, 3].sum()
+
+    def test_subpixel_shifts_match_warping(self):
+        rng = np.random.default_rng(3)
+        root_space = AffineSpace()
+        for i in range(30):
+            Sprite(
+                space=AffineSpace(
+                    parent_space=root_space,
+                    transform=Transform.translate(
+                        Vector2(*rng.uniform(0, 40, 2))
+                    )
+                ),
+                bitmap=rng.integers(0, 256, (40, 30, 4), dtype=np.uint8),
+                dpi=300
+            )
+        view_box = ViewBox(root_space, Rectangle(0, 0, 45, 45))
+
+        shifted = BitmapRenderer(dpi=300).render(view_box)
+        warped = BitmapRenderer(dpi=300, subpixel_blit=False) \
+            .render(view_box)
+
+        # they differ only by the interpolation precision of warping
+        opaque = warped[:, :, 3] >= 16
+        diff = np.abs(shifted.astype(int) - warped.astype(int))
+        assert diff[opaque].max() <= 8
@@ -0,0 +1,77 @@
+import asyncio
+import threading
+import time
+import unittest
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from smashcima.orchestration import AsyncRunner
+from smashcima.orchestration.Model import Model
+
+
+class _SlowModel(Model[float]):
+    def configure_services(self):
+        super().configure_services()
+        self.running = 0
+        self.max_running = 0
+        self.lock = threading.Lock()
+
+    def call(self) -> float:
+        with self.lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        time.sleep(0.02)
+        with self.lock:
+            self.running -= 1
+        return self.rng.random()
+
+
+class ModelAsyncTest(unittest.TestCase):
+    def test_synthesis_does_not_block_the_loop(self):
+        model = _SlowModel()
+        model.async_runner = AsyncRunner(ThreadPoolExecutor(4))
+
+        async def main():
+            ticks = 0
+            async def tick():
+                nonlocal ticks
+                while True:
+                    ticks += 1
+                    await asyncio.sleep(0.001)
+            ticker = asyncio.ensure_future(tick())
+            scenes = await asyncio.gather(*[
+                model.synthesize_async(seed=i) for i in range(5)
+            ])
+            ticker.cancel()
+            return scenes, ticks
+
+        scenes, ticks = asyncio.run(main())
+        assert scenes == [model(seed=i) for i in range(5)]
+        assert model.max_running == 1 # one model synthesizes serially
+        assert ticks > 5
+
+    def test_runner_limits_concurrency(self):
+        running = 0
+        max_running = 0
+        lock = threading.Lock()
+
+        def work():
+            nonlocal running, max_running
+            with lock:
+                running += 1
+                max_running = max(max_running, running)
+            time.sleep(0.02)
+            with lock:
+                running -= 1
+
+        runner = AsyncRunner(ThreadPoolExecutor(8), max_concurrency=2)
+        async def main():
+            await asyncio.gather(*[runner.run(work) for _ in range(6)])
+        asyncio.run(main())
+        assert max_running == 2
+
+    def test_model_rejects_process_executor(self):
+        model = _SlowModel()
+        with ProcessPoolExecutor(1) as executor:
+            model.async_runner = AsyncRunner(executor)
+            with self.assertRaises(TypeError):
+                asyncio.run(model.synthesize_async())
@@ -0,0 +1,48 @@
+import unittest
+import weakref
+from pathlib import Path
+from typing import List
+
+import numpy as np
+
+from smashcima.orchestration.Model import Model
+
+
+class _Scene:
+    def __init__(self, file: str, value: float):
+        self.file = file
+        self.value = value
+        self.cycle = self # released only by the garbage collector
+
+
+class _MyModel(Model[_Scene]):
+    def call(self, file: str) -> _Scene:
+        return _Scene(file, self.rng.random())
+
+    def render_scene(self, scene: _Scene) -> List[np.ndarray]:
+        return [np.full((2, 2), scene.value)]
+
+
+class ModelStreamTest(unittest.TestCase):
+    def test_it_yields_keyed_scenes_and_releases_them(self):
+        model = _MyModel()
+        previous = None
+        keys = []
+        inputs = ["a/x.musicxml", Path("b/y.musicxml")]
+        for key, scene in model.stream(inputs):
+            assert model.scene is None
+            if previous is not None:
+                assert previous() is None
+            previous = weakref.ref(scene)
+            keys.append(key)
+            del scene
+        assert keys == ["x.musicxml", "y.musicxml"]
+
+    def test_it_seeds_samples_by_key(self):
+        model = _MyModel()
+        [(_, a)] = model.stream(["a.musicxml"], seeds=7, render=True)
+        [(_, b), _] = model.stream(["a.musicxml", "b.musicxml"], seeds=7,
+                                   render=True)
+        assert np.array_equal(a[0], b[0])
+        [(_, c)] = model.stream(["a.musicxml"], seeds=[8], render=True)
+        assert not np.array_equal(a[0], c[0])
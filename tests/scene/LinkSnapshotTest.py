@@ -0,0 +1,43 @@
+import unittest
+from dataclasses import dataclass
+from typing import List
+
+from smashcima.scene.LinkSnapshot import LinkSnapshot
+from smashcima.scene.SceneObject import SceneObject
+
+
+@dataclass
+class Note(SceneObject):
+    pitch: str
+
+
+@dataclass
+class Chord(SceneObject):
+    notes: List[Note]
+
+
+@dataclass
+class Notehead(SceneObject):
+    note: Note
+
+    @classmethod
+    def of_note(cls, note: Note):
+        return cls.of(note, lambda n: n.note)
+
+
+class LinkSnapshotTest(unittest.TestCase):
+    def test_it_detaches_links_added_after_the_snapshot(self):
+        notes = [Note("C4"), Note("E4")]
+        chord = Chord(notes)
+        snapshot = LinkSnapshot(notes[0])
+        assert len(snapshot.objects) == 3 # reached via the chord
+
+        first = Notehead(notes[0])
+        assert Notehead.of_note(notes[0]) is first
+
+        snapshot.restore()
+        assert first.outlinks == []
+        assert notes[0].inlinks == chord.outlinks[:1]
+
+        second = Notehead(notes[0])
+        assert Notehead.of_note(notes[0]) is second
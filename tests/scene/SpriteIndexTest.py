@@ -0,0 +1,60 @@
+import unittest
+
+import numpy as np
+
+from smashcima.exporting import BitmapRenderer, SvgExporter
+from smashcima.geometry import Rectangle, Transform, Vector2
+from smashcima.scene import AffineSpace, Sprite, SpriteIndex, ViewBox
+
+
+class SpriteIndexTest(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        root_space = AffineSpace()
+        self.page_space = AffineSpace(
+            parent_space=root_space,
+            transform=Transform.translate(Vector2(300, 0))
+        )
+        for i in range(50):
+            space = AffineSpace(
+                parent_space=self.page_space,
+                transform=Transform.rotateDegCC(rng.uniform(-30, 30))
+                    .then(Transform.translate(
+                        Vector2(rng.uniform(0, 100), rng.uniform(0, 100))
+                    ))
+            )
+            Sprite(
+                space=space,
+                bitmap=rng.integers(0, 256, (40, 30, 4), dtype=np.uint8),
+                dpi=300
+            )
+        self.index = SpriteIndex(self.page_space, cell_size=7.0)
+        # a crop of the page, in the scene space
+        self.crop = Rectangle(320, 30, 40, 25)
+
+    def test_query_matches_the_brute_force(self):
+        assert len(self.index) == 50
+        found = [e.sprite for e in self.index.query(self.crop)]
+        expected = [
+            e.sprite for e in self.index.entries
+            if not e.bbox.intersect_with(self.crop).has_no_area
+        ]
+        assert 0 < len(found) < 50
+        assert found == expected
+
+    def test_rendering_with_the_index_matches_traversal(self):
+        view_box = ViewBox(self.page_space, self.crop)
+        renderer = BitmapRenderer(dpi=300)
+        traversed = renderer.render(view_box)
+        indexed = renderer.render(view_box, sprite_index=self.index)
+        assert traversed[:, :, 3].any()
+        assert np.array_equal(traversed, indexed)
+
+    def test_svg_export_contains_only_the_sprites_in_view(self):
+        # the SVG view starts at the origin of the view box space
+        view = Rectangle(300, 0, 20, 20)
+        view_box = ViewBox(self.page_space, view)
+        svg = SvgExporter().export(view_box, sprite_index=self.index)
+        images = svg.findall(".//{http://www.w3.org/2000/svg}image")
+        assert len(images) == len(self.index.query(view))
+        assert 0 < len(images) < 50
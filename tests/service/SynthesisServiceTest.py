@@ -0,0 +1,153 @@
+import base64
+import tempfile
+import json
+import os
+import threading
+import unittest
+import urllib.error
+import urllib.request
+from types import SimpleNamespace
+from pathlib import Path
+from typing import Optional
+
+from smashcima.LruCache import LruCache
+from smashcima.exporting import BitmapRenderer
+from smashcima.geometry import Rectangle
+from smashcima.orchestration import BaseHandwrittenScene
+from smashcima.orchestration.Model import Model
+from smashcima.scene import AffineSpace, Page, Sprite, ViewBox
+from smashcima.scene.semantic.Score import Score
+from smashcima.service import (ServiceBusyError, ServiceStyler,
+                               SynthesisHttpServer, SynthesisRequest,
+                               SynthesisService, synthesize_request)
+from smashcima.synthesis.style.Styler import Styler
+
+
+class _BoxServiceModel(Model[BaseHandwrittenScene]):
+    """Draws one box on a tiny page, with fake writer and paper styles"""
+
+    def register_services(self):
+        super().register_services()
+        self.container.interface(Styler, ServiceStyler)
+
+    def resolve_services(self):
+        super().resolve_services()
+        self.mpp_style_domain = SimpleNamespace(
+            all_writers=[1, 2, 3], current_writer=1
+        )
+        self.mzk_paper_style_domain = SimpleNamespace(
+            all_patches=["white", "yellow"], current_patch="white"
+        )
+        self.loaded_scores = 0
+
+    def load_score(self, file: Path, format: Optional[str]) -> Score:
+        self.loaded_scores += 1
+        return Score(parts=[])
+
+    def call(
+        self,
+        file: Optional[str] = None,
+        data: Optional[str] = None,
+        format: Optional[str] = None,
+        score: Optional[Score] = None
+    ) -> BaseHandwrittenScene:
+        root_space = AffineSpace()
+        x = self.rng.uniform(0, 8)
+        Sprite.rectangle(root_space, Rectangle(x, 0, 2, 2), (0, 0, 0, 255))
+        view_box = ViewBox(root_space, Rectangle(0, 0, 10, 10))
+        return BaseHandwrittenScene(
+            root_space, score or Score(parts=[]),
+            self.mpp_style_domain.current_writer,
+            self.mzk_paper_style_domain.current_patch, # type: ignore
+            [Page(space=root_space, view_box=view_box)],
+            BitmapRenderer(dpi=100)
+        )
+
+
+def _dying_model_factory() -> Model:
+    os._exit(1)
+
+
+class SynthesisServiceTest(unittest.TestCase):
+    def test_it_fails_to_start_when_a_worker_dies(self):
+        service = SynthesisService(_dying_model_factory)
+        with self.assertRaisesRegex(Exception, "failed to start"):
+            service.start(timeout=30)
+        assert not service.running
+
+    def test_it_serves_requests_with_style_overrides(self):
+        with SynthesisService(_BoxServiceModel, workers=2) as service:
+            result = service.synthesize(SynthesisRequest(
+                data="<score/>", seed=1, writer=3, paper_patch=1
+            ))
+            again = service.synthesize(SynthesisRequest(
+                data="<score/>", seed=1, writer=2
+            ))
+            with self.assertRaises(ValueError):
+                service.synthesize(SynthesisRequest(data="", writer=42))
+            metrics = service.metrics()
+
+        assert result.image[1:4] == b"PNG"
+        assert (result.writer, result.paper_patch) == (3, 1)
+        assert (again.writer, again.paper_patch) == (2, 0)
+        # the styles do not shift the randomness of a seeded request
+        assert again.image == result.image
+        assert metrics["completed"] == 2
+        assert metrics["failed"] == 1
+        assert metrics["latency_seconds"]["total"]["max"] > 0
+
+    def test_it_rejects_requests_when_the_queue_is_full(self):
+        service = SynthesisService(_BoxServiceModel, queue_size=1)
+        service.start()
+        try:
+            with self.assertRaises(ServiceBusyError):
+                for _ in range(100):
+                    service.submit(SynthesisRequest(data=""))
+            assert service.metrics()["rejected"] == 1
+        finally:
+            service.close()
+
+    def test_http_server(self):
+        with SynthesisService(_BoxServiceModel) as service:
+            server = SynthesisHttpServer(service, port=0)
+            thread = threading.Thread(target=server.serve_forever)
+            thread.start()
+            url = f"http://127.0.0.1:{server.server_port}"
+            try:
+                response = urllib.request.urlopen(urllib.request.Request(
+                    url + "/synthesize",
+                    data=json.dumps({"data": "", "writer": 2}).encode(),
+                    method="POST"
+                ))
+                result = json.loads(response.read())
+                with self.assertRaises(urllib.error.HTTPError) as context:
+                    urllib.request.urlopen(urllib.request.Request(
+                        url + "/synthesize",
+                        data=json.dumps({"file": "/etc/passwd"}).encode(),
+                        method="POST"
+                    ))
+                metrics = json.loads(
+                    urllib.request.urlopen(url + "/metrics").read()
+                )
+            finally:
+                server.shutdown()
+                server.server_close()
+                thread.join()
+
+        assert result["writer"] == 2
+        assert base64.b64decode(result["image"])[1:4] == b"PNG"
+        assert context.exception.code == 400
+        assert metrics["completed"] == 1
+
+    def test_it_parses_cached_files_once(self):
+        model = _BoxServiceModel()
+        cache = LruCache(max_entries=4)
+        with tempfile.TemporaryDirectory() as tmp:
+            file = Path(tmp) / "score.musicxml"
+            file.write_text("<score/>")
+            for seed in range(3):
+                synthesize_request(
+                    model, SynthesisRequest(file=str(file), seed=seed), cache
+                )
+        assert model.loaded_scores == 1
+        assert cache.hits == 2